@@ -0,0 +1,72 @@
+import time
+
+## output file that stays open for the whole run and batches rows in memory
+## shared by the measurement steppables instead of open/append/close every MCS
+
+
+class BufferedWriter:
+    """
+    Appends to `path`, keeping written rows in memory until the buffer holds
+    max_bytes or max_seconds have passed since the last flush; then writes them
+    with a single call. flush() is also called at checkpoints and close() in finish().
+    Counters: bytes_written, n_flushes, flush_seconds (total) and max_flush_seconds.
+    """
+
+    def __init__(self, path, max_bytes=1 << 20, max_seconds=30.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.file = open(path, "ab")
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.last_flush = time.monotonic()
+
+        self.bytes_written = 0
+        self.n_flushes = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def write(self, data):
+        """Queue `data` (str or bytes) for writing."""
+        if isinstance(data, str):
+            data = data.encode()
+        self.buffer.append(data)
+        self.buffered_bytes += len(data)
+        if self.buffered_bytes >= self.max_bytes or time.monotonic() - self.last_flush >= self.max_seconds:
+            self.flush()
+
+    def flush(self):
+        if self.file.closed:
+            return
+        t0 = time.perf_counter()
+        if self.buffer:
+            self.file.write(b"".join(self.buffer))
+            self.bytes_written += self.buffered_bytes
+            self.buffer = []
+            self.buffered_bytes = 0
+        self.file.flush()
+        dt = time.perf_counter() - t0
+
+        self.n_flushes += 1
+        self.flush_seconds += dt
+        self.max_flush_seconds = max(self.max_flush_seconds, dt)
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+    def stats(self):
+        return {
+            "bytes_written": self.bytes_written,
+            "n_flushes": self.n_flushes,
+            "flush_seconds": self.flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+        }
+
+    def summary(self):
+        mean_ms = 1e3 * self.flush_seconds / self.n_flushes if self.n_flushes else 0.0
+        return (f"{self.bytes_written} bytes in {self.n_flushes} flushes "
+                f"(mean {mean_ms:.2f} ms, max {1e3*self.max_flush_seconds:.2f} ms)")
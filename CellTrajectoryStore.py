@@ -0,0 +1,261 @@
+from pathlib import Path
+import numpy as np
+
+## binary columnar format for the per-cell trajectories of CellVolumeMeasurement
+##
+## cell_field_data_<run_id>.bin
+##   file header (HEADER_DTYPE, 64 bytes): magic, grid size, target/lambda volume, wound centre,
+##   COM scale and layout
+##   one block per recorded mcs:
+##     block header (BLOCK_DTYPE): mcs int32, n int32, flags uint32
+##     n x int32 cell_id (only if flags & HAS_IDS), then the columns of the layout (LAYOUTS)
+## cell_field_data_<run_id>.idx
+##   INDEX_DTYPE records (mcs, byte offset of the block) for random access
+##
+## the cell ids are only written when they differ from the previous block (cells created or
+## deleted), a block without ids has the ids of the last block that had them.
+## layout "full" (cell_output_format "binary", the default) keeps what the text rows hold:
+##   float32 xCOM, yCOM, lambda_volume and the (integer) volume, about 14 bytes per cell and mcs
+## layout "compact" (cell_output_format "binary_compact", opt-in) is lossy, about 6 bytes:
+##   int16 xCOM, yCOM in 1/COM_SCALE px (grids up to 2047 px) and no lambda_volume, which
+##   readers recompute with the rule of WoundMakerSteppable.update_lambda_volume
+## radial_distance is not stored, readers derive it from the COM and the wound centre.
+## All columns of a file can be memory-mapped and loaded in one pass (load_cell_trajectories).
+
+MAGIC = b"CFDBIN03"
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("grid_x", "<i4"), ("grid_y", "<i4"),
+    ("target_volume", "<f8"), ("lambda_volume", "<f8"),
+    ("center_x", "<f8"), ("center_y", "<f8"),
+    ("com_scale", "<f8"), ("layout", "<i4"), ("reserved", "<i4"),
+])
+BLOCK_DTYPE = np.dtype([("mcs", "<i4"), ("n", "<i4"), ("flags", "<u4")])
+INDEX_DTYPE = np.dtype([("mcs", "<i8"), ("offset", "<i8")])
+HAS_IDS = 1  # block flag: the cell_id column is present
+ID_DTYPE = np.dtype("<i4")
+# columns per layout, in file order; the header stores the layout as its index in LAYOUT_NAMES
+LAYOUTS = {
+    "full": [("xCOM", "<f4"), ("yCOM", "<f4"), ("volume", "<u2"), ("lambda_volume", "<f4")],
+    "compact": [("xCOM", "<i2"), ("yCOM", "<i2"), ("volume", "<u2")],
+}
+LAYOUT_NAMES = tuple(LAYOUTS)
+COM_SCALE = 16  # compact layout: COM in 1/16 px as int16
+MAX_COMPACT_GRID = np.iinfo(np.int16).max // COM_SCALE
+MAX_VOLUME = np.iinfo(np.uint16).max
+
+
+def bytes_per_cell(layout):
+    """Bytes per cell of a block without the cell_id column."""
+    return sum(np.dtype(dtype).itemsize for _, dtype in LAYOUTS[layout])
+
+
+def block_size(n, flags, layout):
+    return BLOCK_DTYPE.itemsize + n * (bytes_per_cell(layout) + (ID_DTYPE.itemsize if flags & HAS_IDS else 0))
+
+
+def lambda_volumes(volume, target_volume, lambda_volume):
+    """lambdaVolume of cells of `volume`, as set by WoundMakerSteppable.update_lambda_volume (compact layout)."""
+    volume = np.asarray(volume, dtype=np.float64)
+    return lambda_volume * (volume + target_volume) / np.maximum(volume, 1.0)
+
+
+def index_path(path):
+    return Path(path).with_suffix(".idx")
+
+
+def write_header(path, grid_x, grid_y, target_volume, lambda_volume, center, layout="full"):
+    """Start a new trajectory file (and an empty index next to it)."""
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown cell trajectory layout {layout!r}, expected one of {LAYOUT_NAMES}")
+    if layout == "compact" and max(grid_x, grid_y) > MAX_COMPACT_GRID:
+        raise ValueError(f"the compact layout stores the COM as int16, grids above {MAX_COMPACT_GRID} px do not fit")
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["grid_x"], header["grid_y"] = grid_x, grid_y
+    header["target_volume"], header["lambda_volume"] = target_volume, lambda_volume
+    header["center_x"], header["center_y"] = center
+    header["com_scale"] = COM_SCALE if layout == "compact" else 1
+    header["layout"] = LAYOUT_NAMES.index(layout)
+    with open(path, "wb") as f:
+        f.write(header.tobytes())
+    open(index_path(path), "wb").close()
+
+
+def read_header(path):
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not a binary cell trajectory file")
+    return header[0]
+
+
+def header_layout(header):
+    return LAYOUT_NAMES[int(header["layout"])]
+
+
+def encode_block(mcs, cell_id, xCOM, yCOM, volume, lambda_volume=None, with_ids=True, layout="full"):
+    """Bytes of one mcs block; columns are converted to their storage dtypes."""
+    volume = np.asarray(volume)
+    if len(volume) and volume.max() > MAX_VOLUME:
+        raise ValueError(f"cell volume {volume.max()} at mcs {mcs} does not fit the uint16 volume column")
+    block = np.array([(mcs, len(cell_id), HAS_IDS if with_ids else 0)], dtype=BLOCK_DTYPE).tobytes()
+    if with_ids:
+        block += np.asarray(cell_id, dtype=ID_DTYPE).tobytes()
+    if layout == "compact":
+        columns = (np.rint(np.asarray(xCOM) * COM_SCALE), np.rint(np.asarray(yCOM) * COM_SCALE), volume)
+    else:
+        columns = (xCOM, yCOM, volume, lambda_volume)
+    return block + b"".join(np.asarray(values).astype(dtype).tobytes()
+                            for values, (_, dtype) in zip(columns, LAYOUTS[layout]))
+
+
+class CellTrajectoryWriter:
+    """
+    Appends mcs blocks to a trajectory file and its index through two
+    BufferedWriter-like objects (write/flush/close); `offset` is the current
+    end of the data file, so index entries can be produced without seeking.
+    The cell ids are written with the first block and whenever they change.
+    `layout` must be the layout of the file header.
+    """
+
+    def __init__(self, data_writer, index_writer, offset, layout="full"):
+        self.data_writer = data_writer
+        self.index_writer = index_writer
+        self.offset = offset
+        self.layout = layout
+        self.last_ids = None
+
+    def append(self, mcs, cell_id, xCOM, yCOM, volume, lambda_volume=None):
+        cell_id = np.asarray(cell_id)
+        with_ids = self.last_ids is None or not np.array_equal(cell_id, self.last_ids)
+        block = encode_block(mcs, cell_id, xCOM, yCOM, volume, lambda_volume, with_ids, self.layout)
+        if with_ids:
+            self.last_ids = cell_id.copy()
+        self.index_writer.write(np.array([(mcs, self.offset)], dtype=INDEX_DTYPE).tobytes())
+        self.data_writer.write(block)
+        self.offset += len(block)
+
+    def flush(self):
+        self.data_writer.flush()
+        self.index_writer.flush()
+
+    def close(self):
+        self.data_writer.close()
+        self.index_writer.close()
+
+
+def scan_blocks(path, last_mcs=None):
+    """
+    Walk the block headers of a trajectory file. Returns the INDEX_DTYPE records of
+    all complete blocks (up to last_mcs if given) and the byte offset where they end.
+    """
+    layout = header_layout(read_header(path))
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    size = len(data)
+    pos = HEADER_DTYPE.itemsize
+    entries = []
+    while pos + BLOCK_DTYPE.itemsize <= size:
+        mcs, n, flags = np.frombuffer(data, dtype=BLOCK_DTYPE, count=1, offset=pos)[0]
+        end = pos + block_size(int(n), int(flags), layout)
+        if end > size or (last_mcs is not None and mcs > last_mcs):
+            break
+        entries.append((int(mcs), pos))
+        pos = end
+    return np.array(entries, dtype=INDEX_DTYPE), pos
+
+
+def truncate_cell_trajectories(path, last_mcs):
+    """Cut a trajectory file and its index after the block of last_mcs (drops partial blocks too)."""
+    if not Path(path).exists():
+        return
+    entries, end = scan_blocks(path, last_mcs)
+    with open(path, "r+b") as f:
+        f.truncate(end)
+    with open(index_path(path), "wb") as f:
+        f.write(entries.tobytes())
+
+
+def load_index(path):
+    """(mcs, offset) records; rebuilt from the data file if the index is missing or does not cover it."""
+    idx = index_path(path)
+    size = Path(path).stat().st_size
+    layout = header_layout(read_header(path))
+    if idx.exists():
+        entries = np.fromfile(idx, dtype=INDEX_DTYPE)
+        if len(entries) == 0:
+            end = HEADER_DTYPE.itemsize
+        else:
+            last = np.fromfile(path, dtype=BLOCK_DTYPE, count=1, offset=int(entries["offset"][-1]))
+            end = int(entries["offset"][-1]) + block_size(int(last["n"][0]), int(last["flags"][0]), layout) if len(last) else -1
+        if end == size:
+            return entries
+    return scan_blocks(path)[0]
+
+
+def load_cell_trajectories(path):
+    """
+    All blocks of a trajectory file as flat column arrays (memory-mapped reads):
+    mcs, cell_id, xCOM, yCOM, volume, lambda_volume, radial_distance.
+    """
+    header = read_header(path)
+    layout = header_layout(header)
+    entries = load_index(path)
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+
+    parts = {name: [] for name in ("cell_id", *(name for name, _ in LAYOUTS[layout]))}
+    mcs_parts = []
+    ids = None
+    for mcs, offset in zip(entries["mcs"].tolist(), entries["offset"].tolist()):
+        block = np.frombuffer(data, dtype=BLOCK_DTYPE, count=1, offset=offset)[0]
+        n = int(block["n"])
+        pos = offset + BLOCK_DTYPE.itemsize
+        if block["flags"] & HAS_IDS:
+            ids = np.frombuffer(data, dtype=ID_DTYPE, count=n, offset=pos)
+            pos += n * ID_DTYPE.itemsize
+        elif ids is None or len(ids) != n:
+            raise ValueError(f"{path}: block of mcs {mcs} has no cell ids to continue from")
+        parts["cell_id"].append(ids)
+        for name, dtype in LAYOUTS[layout]:
+            parts[name].append(np.frombuffer(data, dtype=dtype, count=n, offset=pos))
+            pos += n * np.dtype(dtype).itemsize
+        mcs_parts.append(np.full(n, mcs, dtype=np.int32))
+
+    def concatenate(name, dtype):
+        return np.concatenate(parts[name]).astype(dtype) if parts[name] else np.zeros(0, dtype=dtype)
+
+    columns = {
+        "mcs": np.concatenate(mcs_parts) if mcs_parts else np.zeros(0, dtype=np.int32),
+        "cell_id": concatenate("cell_id", np.int32),
+        "xCOM": concatenate("xCOM", np.float32) / np.float32(header["com_scale"]),
+        "yCOM": concatenate("yCOM", np.float32) / np.float32(header["com_scale"]),
+        "volume": concatenate("volume", np.int32),
+    }
+    if layout == "full":
+        columns["lambda_volume"] = concatenate("lambda_volume", np.float32)
+    else:
+        columns["lambda_volume"] = lambda_volumes(columns["volume"], header["target_volume"],
+                                                  header["lambda_volume"]).astype(np.float32)
+    columns["radial_distance"] = np.hypot(
+        columns["xCOM"] - header["center_x"], columns["yCOM"] - header["center_y"]
+    ).astype(np.float32)
+    return columns
+
+
+def export_text(path, text_path):
+    """
+    Write a trajectory file in the text format of cell_field_data_<run_id>.txt
+    (rows of each mcs sorted by radial distance). Values carry float32 precision; from a
+    compact file the COM has 1/COM_SCALE px resolution and lambda_volume is recomputed.
+    """
+    header = read_header(path)
+    c = load_cell_trajectories(path)
+    order = np.lexsort((c["radial_distance"], c["mcs"]))
+    with open(text_path, "w") as f:
+        f.write(f"# Domain Size: Lx={header['grid_x']}, Ly={header['grid_y']}\n")
+        f.write(f"# Fixed Target Volume: {header['target_volume']:g}\n")
+        f.write(f"# Fixed Lambda Volume: {header['lambda_volume']:g}\n")
+        f.write("# Columns: mcs, cell_id, xCOM, yCOM, volume, radial_distance, lambda_volume\n")
+        rows = zip(*(c[name][order].tolist() for name in
+                     ("mcs", "cell_id", "xCOM", "yCOM", "volume", "radial_distance", "lambda_volume")))
+        f.writelines(f"{mcs},{cid},{x:.3f},{y:.3f},{vol:g},{dist:.3f},{lam:g}\n"
+                     for mcs, cid, x, y, vol, dist, lam in rows)
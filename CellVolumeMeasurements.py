@@ -1,10 +1,19 @@
 import cc3d
 from cc3d.core.PySteppables import SteppableBasePy
 #from Parameters import *
-import Parameters
+from RunContext import RunContext
 from pathlib import Path
 import numpy as np
 import glob
+from Checkpoint import truncate_text_output
+from BufferedWriter import BufferedWriter
+from CellTrajectoryStore import (CellTrajectoryWriter, header_layout, index_path, read_header,
+                                 truncate_cell_trajectories, write_header)
+import StrainBinning
+from LatticeSnapshot import SnapshotProvider, medium_pixel_count
+from SamplingCadence import SamplingCadence
+
+CELL_OUTPUT_FORMATS = ("binary", "binary_compact", "text", "bins")
 #from WoundMakerForce import WoundMakerSteppable
 
 class CellVolumeMeasurement(SteppableBasePy):
@@ -12,86 +21,153 @@ class CellVolumeMeasurement(SteppableBasePy):
     Steppable to record CELL type volumes and positions every MCS,
     including lambda_volume and radial distance from wound center.
     Cells are written sorted by radial distance for easier post-processing.
+    output_format "binary" writes cell_field_data_<run_id>.bin (+ .idx), see CellTrajectoryStore.py;
+    "binary_compact" the same file in the lossy compact layout (int16 COM, no lambda_volume);
+    "text" writes the original cell_field_data_<run_id>.txt.
+    "bins" writes only the per-radial-bin strain sums, strain_bins_<run_id>.bin, see StrainBinning.py.
     """
 
-    def __init__(self, frequency=1, run_id=0):
+    def __init__(self, frequency=1, context=None, output_format=None, cadence=None, snapshots=None):
         super().__init__(frequency=frequency)
-        self.run_id = run_id
+        # parameters and phase state of this simulation (wound_mcs etc. set by WoundMakerSteppable)
+        self.context = context if context is not None else RunContext()
+        # per-MCS cell table shared with the other steppables (LatticeSnapshot.SnapshotProvider)
+        self.snapshots = snapshots if snapshots is not None else SnapshotProvider.for_context(self.context)
+        self.run_id = self.context.run_id
+        self.cadence = cadence if cadence is not None else SamplingCadence(**self.context.cell_volume_cadence)
         self.output_file = None
+        self.output_format = output_format if output_format is not None else self.context.cell_output_format
+        if self.output_format not in CELL_OUTPUT_FORMATS:
+            raise ValueError(f"Unknown cell output format {self.output_format!r}, expected one of {CELL_OUTPUT_FORMATS}")
+        self.trajectory = None  # CellTrajectoryWriter in binary mode
+        self.bin_width, self.n_bins = StrainBinning.bin_layout(self.context.grid_x, self.context.target_volume)
         # Wound center
-        self.wound_center = np.array([Parameters.grid_x/2, Parameters.grid_y/2])
-        self.header_updated = False
+        self.wound_center = np.array([self.context.grid_x/2, self.context.grid_y/2])
+        self.resumed_mcs = None  # set by restore_checkpoint: keep the file up to this mcs
 
     def start(self, run_id=0):
         # Build folder path: Runs/Lx*_Ly*/R*/
-        self.run_dir = Path("Runs") / f"Lx{Parameters.grid_x}_Ly{Parameters.grid_y}" / f"R{Parameters.wR}"
+        self.run_dir = self.context.run_dir
         self.run_dir.mkdir(parents=True, exist_ok=True)
 
-        # File name: cell_field_data_<run_id>.txt
-        self.output_file = self.run_dir / f"cell_field_data_{self.run_id}.txt"
-        
         #for f in self.run_dir.glob("cell_field_data_*.txt"): #deletes existing files from previous runs 
         #    f.unlink()
         #wound_steppable = self.get_steppable_by_class(WoundMakerSteppable)
         #wound_mcs = wound_steppable.wound_mcs 
 
-        # Write header
-        with open(self.output_file, "w") as f:
-            f.write(f"# Domain Size: Lx={Parameters.grid_x}, Ly={Parameters.grid_y}\n")
-            f.write(f"# Wound Radius: R={Parameters.wR}\n")
-            f.write(f"# Fixed Target Volume: {Parameters.target_volume}\n")
-            f.write(f"# Fixed Lambda Volume: {Parameters.lambda_volume}\n")
-            f.write(f"# Wound created at mcs: {Parameters.wound_mcs}\n")
-            f.write("# Columns: mcs, cell_id, xCOM, yCOM, volume, radial_distance, lambda_volume\n")
+        if self.output_format in ("binary", "binary_compact"):
+            self._start_binary()
+            return
+        if self.output_format == "bins":
+            self._start_bins()
+            return
+
+        # File name: cell_field_data_<run_id>.txt
+        self.output_file = self.run_dir / f"cell_field_data_{self.run_id}.txt"
+
+        if self.resumed_mcs is not None:
+            truncate_text_output(self.output_file, self.resumed_mcs)
+        else:
+            # Write header
+            with open(self.output_file, "w") as f:
+                f.write(f"# Domain Size: Lx={self.context.grid_x}, Ly={self.context.grid_y}\n")
+                f.write(f"# Wound Radius: R={self.context.wR}\n")
+                f.write(f"# Fixed Target Volume: {self.context.target_volume}\n")
+                f.write(f"# Fixed Lambda Volume: {self.context.lambda_volume}\n")
+                f.write(f"# Run metadata: run_metadata_{self.run_id}.json\n")
+                f.write("# Columns: mcs, cell_id, xCOM, yCOM, volume, radial_distance, lambda_volume\n")
+
+        # rows are buffered and written in batches, see BufferedWriter.py
+        self.writer = BufferedWriter(self.output_file, self.context.output_buffer_bytes, self.context.output_flush_seconds)
+
+    def _start_binary(self):
+        # File name: cell_field_data_<run_id>.bin, index cell_field_data_<run_id>.idx
+        self.output_file = self.run_dir / f"cell_field_data_{self.run_id}.bin"
+
+        if self.resumed_mcs is not None:
+            truncate_cell_trajectories(self.output_file, self.resumed_mcs)
+        else:
+            write_header(self.output_file, self.context.grid_x, self.context.grid_y,
+                         self.context.target_volume, self.context.lambda_volume, self.wound_center,
+                         layout="compact" if self.output_format == "binary_compact" else "full")
+
+        self.writer = BufferedWriter(self.output_file, self.context.output_buffer_bytes, self.context.output_flush_seconds)
+        index_writer = BufferedWriter(index_path(self.output_file), self.context.output_buffer_bytes, self.context.output_flush_seconds)
+        # a resumed run keeps appending in the layout its file was started with
+        self.trajectory = CellTrajectoryWriter(self.writer, index_writer, self.output_file.stat().st_size,
+                                               header_layout(read_header(self.output_file)))
+
+    def _start_bins(self):
+        # File name: strain_bins_<run_id>.bin
+        self.output_file = self.run_dir / f"strain_bins_{self.run_id}.bin"
+
+        if self.resumed_mcs is not None:
+            StrainBinning.truncate_strain_bins(self.output_file, self.resumed_mcs)
+        else:
+            StrainBinning.write_header(self.output_file, self.n_bins, self.bin_width, self.context.target_volume,
+                                       self.context.grid_x, self.context.grid_y, self.wound_center)
+
+        self.writer = BufferedWriter(self.output_file, self.context.output_buffer_bytes, self.context.output_flush_seconds)
 
     def step(self, mcs):
+        mcs = mcs + self.context.mcs_offset  # resumed runs continue the mcs count of the checkpoint
         #for cell in self.cell_list_by_type(self.FLUID):
             #print("2:",cell.lambdaVolume,cell.targetVolume)
 
-        if not self.header_updated:
-            #wound_steppable = self.get_steppable_by_class(WoundMakerSteppable)
-            #wound_mcs = wound_steppable.wound_mcs
-
-            if Parameters.wound_mcs is not None:
-                self._update_wound_header(Parameters.wound_mcs)
-                self.header_updated = True
-
-        # Collect data for all CELLs
-        cell_data = []
-        for cell in self.cell_list_by_type(self.CELL):
-            if cell is None:
-                continue  # safety
-            com = np.array([cell.xCOM, cell.yCOM])
-            radial_dist = np.linalg.norm(com - self.wound_center)
-            cell_data.append((
-                radial_dist,
-                cell.id,
-                cell.xCOM,
-                cell.yCOM,
-                cell.volume,
-                cell.lambdaVolume
-            ))
-
-        # Sort cells by radial distance
-        cell_data.sort(key=lambda x: x[0])
-
-        # Write to file
-        with open(self.output_file, "a") as f:
-            for dist, cid, x, y, vol, lam in cell_data:
-                f.write(f"{mcs},{cid},{x:.3f},{y:.3f},{vol},{dist:.3f},{lam}\n")
+        wound_area = None
+        if self.cadence.needs_wound_area and self.context.wound_mcs is not None:
+            wound_area = medium_pixel_count(self.snapshots.table(self, mcs).volume, self.context.grid_x, self.context.grid_y)
+        if not self.cadence.should_sample(mcs, self.context.domain_filled, self.context.domain_filled_mcs,
+                                          self.context.wound_mcs, wound_area):
+            return
 
-    def finish(self):
-        print(f"[CellVolumeMeasurement] All data saved to {self.output_file.name}")
-    
+        # Collect data for all CELLs from the shared cell table
+        table = self.snapshots.table(self, mcs)
+        rows = table.of_type(self.CELL)
+        ids = table.id[rows]
+        xs = table.x[rows]
+        ys = table.y[rows]
+        volumes = table.volume[rows]
+        lambdas = table.lambda_volume[rows]
+
+        if self.trajectory is not None:
+            # typed column block, radial distance is derived by the readers
+            self.trajectory.append(mcs, ids, xs, ys, volumes, lambdas)
+            return
+
+        com = np.column_stack((xs, ys))
+        radial_dist = np.linalg.norm(com - self.wound_center, axis=1)
 
-    def _update_wound_header(self, wound_mcs):
-        with open(self.output_file, "r") as f:
-            lines = f.readlines()
+        if self.output_format == "bins":
+            # one n_bins record per MCS instead of one row per cell
+            sums = StrainBinning.bin_strain(radial_dist, volumes, self.context.target_volume, self.bin_width, self.n_bins)
+            self.writer.write(StrainBinning.encode_record(mcs, *sums))
+            return
 
-        for i, line in enumerate(lines):
-            if line.startswith("# Wound created at mcs:"):
-                lines[i] = f"# Wound created at mcs: {wound_mcs}\n"
-                break
+        # Sort cells by radial distance (stable, same order as sorting the rows)
+        order = np.argsort(radial_dist, kind="stable").tolist()
+        radial_dist = radial_dist.tolist()
+        ids, xs, ys, volumes, lambdas = ids.tolist(), xs.tolist(), ys.tolist(), volumes.tolist(), lambdas.tolist()
 
-        with open(self.output_file, "w") as f:
-            f.writelines(lines)
\ No newline at end of file
+        # one formatted block per MCS instead of one write per line
+        row = f"{mcs},%d,%.3f,%.3f,%s,%.3f,%s\n"
+        self.writer.write("".join([
+            row % (ids[i], xs[i], ys[i], volumes[i], radial_dist[i], lambdas[i]) for i in order
+        ]))
+
+    def checkpoint_state(self):
+        return {}
+
+    def restore_checkpoint(self, state, mcs):
+        self.resumed_mcs = mcs
+
+    def flush_outputs(self):
+        if self.trajectory is not None:
+            self.trajectory.flush()
+        self.writer.flush()
+
+    def finish(self):
+        if self.trajectory is not None:
+            self.trajectory.close()
+        self.writer.close()
+        print(f"[CellVolumeMeasurement] All data saved to {self.output_file.name}: {self.writer.summary()}")
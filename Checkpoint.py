@@ -0,0 +1,125 @@
+import json
+import os
+import random
+import time
+from pathlib import Path
+import numpy as np
+
+import cc3d
+from cc3d.core.PySteppables import SteppableBasePy
+from RunContext import RunContext
+from LatticeSnapshot import SnapshotProvider, capture_lattice_state
+
+## periodic checkpoints of a running simulation and the helpers to resume from them
+## Runs/Lx*_Ly*/R*/checkpoint_<run_id>.npz holds the lattice label array, per-cell
+## attributes, the state of the registered steppables, the phase state of the
+## RunContext and the python/numpy RNG state.
+## The Potts engine's own RNG lives inside CC3D and cannot be captured from Python,
+## so a resumed run is statistically equivalent to, not bit-identical with, an
+## uninterrupted one.
+
+def checkpoint_path(context):
+    return context.run_dir / f"checkpoint_{context.run_id}.npz"
+
+
+def save_checkpoint(path, mcs, lattice_state, steppable_states, phase_state, completed=False):
+    """Write a checkpoint atomically (temp file + rename), so a crash mid-write keeps the previous one."""
+    _, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    version, internal_state, gauss_next = random.getstate()
+    meta = {
+        "mcs": mcs,
+        "completed": completed,
+        "steppables": steppable_states,
+        "parameters": phase_state,
+        "python_rng": [version, list(internal_state), gauss_next],
+        "numpy_rng": [int(pos), int(has_gauss), float(cached_gaussian)],
+    }
+    tmp_path = path.with_name(f"{path.stem}.tmp.npz")
+    np.savez_compressed(tmp_path, meta=np.array(json.dumps(meta)), numpy_rng_keys=keys, **lattice_state)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """Returns (meta, lattice_state) of a checkpoint written by save_checkpoint."""
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        numpy_rng_keys = data["numpy_rng_keys"]
+        lattice_state = {name: data[name] for name in data.files if name not in ("meta", "numpy_rng_keys")}
+    meta["numpy_rng_keys"] = numpy_rng_keys
+    return meta, lattice_state
+
+
+def restore_run_state(context, meta):
+    """Put the phase state of `context` and the python/numpy RNG state back, and set the mcs offset."""
+    context.restore_phase_state(meta["parameters"])
+    context.mcs_offset = meta["mcs"] + 1
+
+    version, internal_state, gauss_next = meta["python_rng"]
+    random.setstate((version, tuple(internal_state), gauss_next))
+    pos, has_gauss, cached_gaussian = meta["numpy_rng"]
+    np.random.set_state(("MT19937", meta["numpy_rng_keys"], pos, has_gauss, cached_gaussian))
+
+
+def truncate_text_output(path, last_mcs):
+    """
+    Cut a text output file (header lines + rows starting with the mcs) after the
+    rows of last_mcs. A trailing partial line from an interrupted write is dropped too.
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "r+b") as f:
+        offset = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            if line[:1].isdigit() and int(line.split(b",", 1)[0]) > last_mcs:
+                break
+            offset += len(line)
+        f.truncate(offset)
+
+
+class CheckpointSteppable(SteppableBasePy):
+    """
+    Saves a checkpoint every `interval` MCS (0 disables) and a final one marked
+    completed in finish(). `steppables` maps a name to each steppable whose state
+    must be saved; they implement checkpoint_state() and restore_checkpoint(state).
+    Register it after all other steppables so a checkpoint holds the end-of-MCS state.
+    """
+
+    def __init__(self, frequency=1, context=None, interval=5000, steppables=None, snapshots=None):
+        super().__init__(frequency=frequency)
+        self.context = context if context is not None else RunContext()
+        # label array shared with the other steppables (LatticeSnapshot.SnapshotProvider)
+        self.snapshots = snapshots if snapshots is not None else SnapshotProvider.for_context(self.context)
+        self.run_id = self.context.run_id
+        self.interval = interval
+        self.steppables = steppables or {}
+        self.last_mcs = None
+
+    def start(self):
+        self.path = checkpoint_path(self.context)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def step(self, mcs):
+        mcs = mcs + self.context.mcs_offset  # resumed runs continue the mcs count of the checkpoint
+        self.last_mcs = mcs
+        if self.interval and mcs > 0 and mcs % self.interval == 0:
+            self.save(mcs)
+
+    def finish(self):
+        if self.interval and self.last_mcs is not None:
+            self.save(self.last_mcs, completed=True)
+
+    def save(self, mcs, completed=False):
+        t0 = time.perf_counter()
+        # buffered output rows up to this mcs must be on disk before the checkpoint refers to them
+        for steppable in self.steppables.values():
+            flush_outputs = getattr(steppable, "flush_outputs", None)
+            if flush_outputs is not None:
+                flush_outputs()
+        lattice_state = capture_lattice_state(self, self.dim.x, self.dim.y, labels=self.snapshots.labels(self, mcs))
+        steppable_states = {name: steppable.checkpoint_state() for name, steppable in self.steppables.items()}
+        save_checkpoint(self.path, mcs, lattice_state, steppable_states, self.context.phase_state(),
+                        completed=completed)
+        print(f"[Checkpoint] mcs {mcs} saved to {self.path.name} in {time.perf_counter() - t0:.2f} s")
@@ -1,24 +1,31 @@
 import cc3d
 from cc3d.core.PySteppables import SteppableBasePy
-import Parameters
+from RunContext import RunContext
 import numpy as np
+from DomainGeometry import domain_geometry, voronoi_labels
+from LatticeSnapshot import paint_label_array, restore_lattice_state
+
+SEEDING_MODES = ("rings", "voronoi")
 
 class CircularDomainInitialiser(SteppableBasePy):
-    def __init__(self, frequency=1):
+    def __init__(self, frequency=1, context=None, seeding=None, lattice_state=None):
         super().__init__(frequency)
+        self.context = context if context is not None else RunContext()
+        # lattice_state: relaxed tissue from TissueCache or a checkpoint; painted instead of seeding
+        self.lattice_state = lattice_state
+        # "rings": small disks on concentric rings, the domain is filled by force afterwards
+        # "voronoi": confluent tessellation of the r_fc disk, domain is full at mcs 0
+        self.seeding = seeding if seeding is not None else self.context.seeding
+        if self.seeding not in SEEDING_MODES:
+            raise ValueError(f"Unknown seeding mode {self.seeding!r}, expected one of {SEEDING_MODES}")
 
     def start(self):
-        thick_f = 4
-        thick_w = 2
-
-        cx = Parameters.grid_x // 2
-        cy = Parameters.grid_y // 2
-
-        r_fw = (min(Parameters.grid_x, Parameters.grid_y) // 2) - thick_w  # outer radius (wall)
-        r_fc = (min(Parameters.grid_x, Parameters.grid_y) // 2) - (thick_w + thick_f)  # inner radius (cells)
+        if self.lattice_state is not None:
+            cells_by_label = restore_lattice_state(self, self.lattice_state)
+            print(f"Restored lattice with {len(cells_by_label)} cells (incl. wall and fluid)")
+            return
 
-        spacing = np.sqrt(Parameters.target_volume*0.8)   # distance between cell centers
-        seed_radius = 2                       # multi-pixel seed radius
+        geometry = domain_geometry(self.context.grid_x, self.context.grid_y, self.context.thick_w, self.context.thick_f, self.context.wR)
 
         wall = self.new_cell(self.WALL)
         fluid = self.new_cell(self.FLUID)
@@ -30,23 +37,65 @@ class CircularDomainInitialiser(SteppableBasePy):
             cell.targetVolume = 0
             cell.lambdaVolume = 0
 
+        if self.seeding == "voronoi":
+            cells_created = self.seed_voronoi(geometry)
+        else:
+            cells_created = self.seed_rings(geometry)
+
+        print(f"Seeded {cells_created} cells ({self.seeding}, expected ~{self.context.N_expected})")
+
+        # --- Paint wall and fluid outside ---
+        for x, y in geometry.wall_xy.tolist():
+            self.cell_field[x, y, 0] = wall
+        for x, y in geometry.fluid_xy.tolist():
+            self.cell_field[x, y, 0] = fluid
+
+        # --- Initial slow growth for all cells ---
+        #for cell in self.cell_list_by_type(self.CELL):
+        #    if cell.targetVolume < self.context.target_volume:
+        #        cell.lambdaVolume = 0.05 * self.context.lambda_volume
+
+    def seed_voronoi(self, geometry):
+        # --- Space-filling seeding: nearest-seed tessellation of the cell disk ---
+        labels = voronoi_labels(geometry, self.context.target_volume)
+        n_cells = int(labels.max())
+
+        cells_by_label = {}
+        for label in range(1, n_cells + 1):
+            cell = self.new_cell(self.CELL)
+            cell.targetVolume = self.context.target_volume
+            cell.lambdaVolume = self.context.lambda_volume
+            cells_by_label[label] = cell
+
+        paint_label_array(self.cell_field, labels, cells_by_label)
+        return n_cells
+
+    def seed_rings(self, geometry):
+        cx = self.context.grid_x // 2
+        cy = self.context.grid_y // 2
+
+        r_fc = geometry.r_fc  # inner radius (cells); wall starts at geometry.r_fw
+
+        spacing = np.sqrt(self.context.target_volume*0.8)   # distance between cell centers
+        seed_radius = 2                       # multi-pixel seed radius
+
         cells_created = 0
         r = spacing / 2  # start radius
 
         # --- Radial multi-pixel seeding ---
-        while r < r_fc and cells_created < Parameters.N_expected:
+        while r < r_fc and cells_created < self.context.N_expected:
             circumference = 2 * np.pi * r
             n_on_ring = max(1, int(circumference / spacing))
 
             for k in range(n_on_ring):
-                if cells_created >= Parameters.N_expected:
+                if cells_created >= self.context.N_expected:
                     break
 
                 theta = 2 * np.pi * k / n_on_ring
                 x0 = int(cx + r * np.cos(theta))
                 y0 = int(cy + r * np.sin(theta))
 
-                if not (0 <= x0 < Parameters.grid_x and 0 <= y0 < Parameters.grid_y):
+                if not (0 <= x0 < self.context.grid_x and 0 <= y0 < self.context.grid_y):
                     continue
                 if (x0 - cx)**2 + (y0 - cy)**2 > r_fc**2:
                     continue
@@ -58,7 +107,7 @@ class CircularDomainInitialiser(SteppableBasePy):
                         if dx*dx + dy*dy <= seed_radius**2:
                             x = x0 + dx
                             y = y0 + dy
-                            if not (0 <= x < Parameters.grid_x and 0 <= y < Parameters.grid_y and self.cell_field[x, y, 0] is None):
+                            if not (0 <= x < self.context.grid_x and 0 <= y < self.context.grid_y and self.cell_field[x, y, 0] is None):
                                 footprint_ok = False
                                 break
                     if not footprint_ok:
@@ -68,8 +117,8 @@ class CircularDomainInitialiser(SteppableBasePy):
 
                 # Create cell and paint multi-pixel disk
                 cell = self.new_cell(self.CELL)
-                cell.targetVolume = Parameters.target_volume
-                cell.lambdaVolume = Parameters.lambda_volume
+                cell.targetVolume = self.context.target_volume
+                cell.lambdaVolume = self.context.lambda_volume
                 
                 
                 for dx in range(-seed_radius, seed_radius + 1):
@@ -81,17 +130,4 @@ class CircularDomainInitialiser(SteppableBasePy):
 
             r += spacing
 
-        print(f"Seeded {cells_created} cells (expected ~{Parameters.N_expected})")
-
-        # --- Paint wall and fluid outside ---
-        for x, y, z in self.every_pixel():
-            r2 = (x - cx)**2 + (y - cy)**2
-            if r2 > r_fw**2:
-                self.cell_field[x, y, 0] = wall
-            elif r_fw**2 >= r2 > r_fc**2:
-                self.cell_field[x, y, 0] = fluid
-
-        # --- Initial slow growth for all cells ---
-        #for cell in self.cell_list_by_type(self.CELL):
-        #    if cell.targetVolume < Parameters.target_volume:
-        #        cell.lambdaVolume = 0.05 * Parameters.lambda_volume
+        return cells_created
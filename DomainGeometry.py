@@ -0,0 +1,98 @@
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+
+## boolean masks and pixel index lists of the circular domain:
+## wall annulus, fluid annulus, cell disk and wound disk
+## computed once per (grid_x, grid_y, thick_w, thick_f, wR) and memoized
+
+DomainGeometry = namedtuple(
+    "DomainGeometry",
+    [
+        "r_fw", "r_fc",                                  # outer (wall) and inner (cells) radius
+        "wall_mask", "fluid_mask", "cell_mask", "wound_mask",  # (grid_x, grid_y) bool
+        "wall_xy", "fluid_xy", "cell_xy", "wound_xy",    # (n, 2) pixel coordinates
+    ],
+)
+
+
+@lru_cache(maxsize=None)
+def domain_geometry(grid_x, grid_y, thick_w, thick_f, wR):
+    """
+    Masks of the circular domain centred on (grid_x//2, grid_y//2), using the same
+    radius tests as the original per-pixel loops:
+    wall r2 > r_fw^2, fluid r_fc^2 < r2 <= r_fw^2, cells r2 <= r_fc^2, wound r2 <= wR^2.
+    Returned arrays are read-only because they are shared between callers.
+    """
+    cx = grid_x // 2
+    cy = grid_y // 2
+    r_fw = (min(grid_x, grid_y) // 2) - thick_w
+    r_fc = (min(grid_x, grid_y) // 2) - (thick_w + thick_f)
+
+    xs, ys = np.meshgrid(np.arange(grid_x), np.arange(grid_y), indexing="ij")
+    r2 = (xs - cx)**2 + (ys - cy)**2
+
+    masks = [
+        r2 > r_fw**2,
+        (r2 <= r_fw**2) & (r2 > r_fc**2),
+        r2 <= r_fc**2,
+        r2 <= wR**2,
+    ]
+    pixels = [np.argwhere(mask) for mask in masks]
+    for array in masks + pixels:
+        array.flags.writeable = False
+
+    return DomainGeometry(r_fw, r_fc, *masks, *pixels)
+
+
+def voronoi_labels(geometry, target_volume, jitter=0.25):
+    """
+    Tessellate the cell disk of `geometry` into cells of ~target_volume pixels.
+    Seeds sit on a square lattice of spacing sqrt(target_volume) around the disk
+    centre, each moved by up to jitter*spacing (np.random, so seeded per run).
+    Every disk pixel goes to its nearest seed inside the disk; with jitter <= 0.25
+    the nearest seed always lies in the 3x3 neighbouring lattice buckets, so only
+    those are compared.
+    Returns a (grid_x, grid_y) int32 label array, 0 outside the disk, cells 1..n.
+    """
+    grid_x, grid_y = geometry.cell_mask.shape
+    cx = grid_x // 2
+    cy = grid_y // 2
+    spacing = np.sqrt(target_volume)
+
+    # seed lattice with one bucket of padding on each side for the 3x3 lookup
+    n_half = int(np.ceil(geometry.r_fc / spacing)) + 1
+    n_buckets = 2 * n_half
+    origin = np.array([cx, cy]) - n_half * spacing
+    centres = origin + (np.indices((n_buckets, n_buckets)).transpose(1, 2, 0) + 0.5) * spacing
+    seeds = centres + np.random.uniform(-jitter, jitter, centres.shape) * spacing
+    seed_valid = ((seeds[..., 0] - cx)**2 + (seeds[..., 1] - cy)**2) <= geometry.r_fc**2
+
+    pixels = geometry.cell_xy
+    bucket = np.floor((pixels - origin) / spacing).astype(int)
+
+    best_dist = np.full(len(pixels), np.inf)
+    best_seed = np.full(len(pixels), -1)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            bx = np.clip(bucket[:, 0] + dx, 0, n_buckets - 1)
+            by = np.clip(bucket[:, 1] + dy, 0, n_buckets - 1)
+            dist = np.sum((pixels - seeds[bx, by])**2, axis=1)
+            dist[~seed_valid[bx, by]] = np.inf
+            closer = dist < best_dist
+            best_dist[closer] = dist[closer]
+            best_seed[closer] = bx[closer] * n_buckets + by[closer]
+
+    # rim pixels whose neighbouring seeds all fell outside the disk: nearest valid seed overall
+    orphans = np.flatnonzero(best_seed < 0)
+    if len(orphans):
+        valid_ids = np.flatnonzero(seed_valid.reshape(-1))
+        valid_seeds = seeds.reshape(-1, 2)[valid_ids]
+        dist = np.sum((pixels[orphans, None, :] - valid_seeds[None, :, :])**2, axis=2)
+        best_seed[orphans] = valid_ids[np.argmin(dist, axis=1)]
+
+    # compact labels 1..n in seed order
+    _, compact = np.unique(best_seed, return_inverse=True)
+    labels = np.zeros((grid_x, grid_y), dtype=np.int32)
+    labels[pixels[:, 0], pixels[:, 1]] = compact.reshape(-1) + 1
+    return labels
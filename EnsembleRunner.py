@@ -0,0 +1,187 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from RunStatus import MONITOR_INTERVAL, StatusMonitor, status_path
+
+## runs the replicates of StretchableBC_main.py as parallel subprocesses
+## each replicate streams its output to its own log file; the pool threads only wait
+## on the child processes, the simulations themselves run in separate interpreters
+## warm=True starts one WarmWorker.py process per worker instead, which imports cc3d
+## once and runs its share of the replicates back to back
+## while they run, a StatusMonitor (RunStatus.py) prints the progress the replicates
+## publish in log_dir/status_<run_id>.json, with an ETA per replicate and for the ensemble
+
+SIMULATION_SCRIPT = "StretchableBC_main.py"
+WARM_WORKER_SCRIPT = "WarmWorker.py"
+
+RunResult = namedtuple("RunResult", ["run_id", "returncode", "attempts", "seconds", "log_path"])
+
+
+def run_command(run_id, extra_args=(), resume=False):
+    """Command line of one replicate, with the interpreter running this script."""
+    command = [sys.executable, SIMULATION_SCRIPT, str(run_id), *extra_args]
+    if resume:
+        command.append("--resume")
+    return command
+
+
+def child_env(env=None):
+    """Environment of a simulation process: os.environ plus `env`, numpy limited to one thread."""
+    env = {**os.environ, **(env or {})}
+    # one core per replicate: keep numpy from starting its own thread pool in every process
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        env.setdefault(name, "1")
+    return env
+
+
+def read_results(results_path):
+    """RunResults appended to a JSONL file by WarmWorker.run_all, by run_id (missing file: none)."""
+    results = {}
+    if Path(results_path).exists():
+        with open(results_path, "r") as f:
+            for line in f:
+                try:
+                    result = RunResult(**json.loads(line))
+                except (json.JSONDecodeError, TypeError):
+                    continue  # partial last line of a worker that died
+                results[result.run_id] = result
+    return results
+
+
+def run_replicate(run_id, log_path, extra_args=(), retries=1, env=None, resume=False):
+    """
+    Run one replicate, retrying up to `retries` times if it exits with an error.
+    Retries pass --resume, so they continue from the last checkpoint if there is one;
+    resume=True passes it to the first attempt too.
+    `env` adds environment variables for the child (e.g. Parameters.OVERRIDE_ENV).
+    All attempts are appended to log_path. Returns a RunResult.
+    """
+    env = child_env(env)
+    t0 = time.perf_counter()
+    returncode = None
+    attempt = 0
+    with open(log_path, "a" if resume else "w") as log:
+        for attempt in range(1, retries + 2):
+            command = run_command(run_id, extra_args, resume=resume or attempt > 1)
+            log.write(f"### attempt {attempt}: {' '.join(command)}\n")
+            log.flush()
+            returncode = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, env=env).returncode
+            log.write(f"### attempt {attempt} exited with {returncode}\n")
+            log.flush()
+            if returncode == 0:
+                break
+    return RunResult(run_id, returncode, attempt, time.perf_counter() - t0, str(log_path))
+
+
+class EnsembleRunner:
+    """
+    Runs the replicates `run_ids` with at most `workers` at a time (default: one per
+    CPU core). Logs go to log_dir/run_<run_id>.log and a summary of exit codes,
+    attempts and wallclock per replicate to log_dir/ensemble_summary.json.
+    With warm=True each worker is one WarmWorker.py process running a share of the
+    replicates in-process; replicates it fails (or does not reach, if it crashes)
+    are retried as separate --resume processes.
+    Every `status_interval` seconds a progress table of the replicates is printed
+    (0: none); log_dir must be the logs folder of their Runs/Lx*_Ly*/R* folder,
+    where the simulations write their status files.
+    """
+
+    def __init__(self, run_ids, log_dir, workers=None, retries=1, extra_args=(), warm=False,
+                 status_interval=MONITOR_INTERVAL):
+        self.run_ids = list(run_ids)
+        self.log_dir = Path(log_dir)
+        self.workers = workers or min(len(self.run_ids), os.cpu_count() or 1)
+        self.retries = retries
+        self.extra_args = list(extra_args)
+        self.warm = warm
+        self.status_interval = status_interval
+        self.monitor = None
+        self.results = {}
+
+    def log_path(self, run_id):
+        return self.log_dir / f"run_{run_id}.log"
+
+    def run_one(self, run_id):
+        self.monitor.set_state(run_id, "started")
+        return run_replicate(run_id, self.log_path(run_id), self.extra_args, self.retries)
+
+    def run_warm(self, index, run_ids):
+        """Run `run_ids` in WarmWorker process `index`, then retry what it did not finish."""
+        for run_id in run_ids:
+            self.monitor.set_state(run_id, "started")
+        results_path = self.log_dir / f"warm_worker_{index}.jsonl"
+        results_path.unlink(missing_ok=True)
+        command = [sys.executable, WARM_WORKER_SCRIPT, *map(str, run_ids), "--log-dir", str(self.log_dir),
+                   "--results", str(results_path)]
+        if self.extra_args:
+            command += ["--", *self.extra_args]
+        with open(self.log_dir / f"warm_worker_{index}.log", "w") as log:
+            subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, env=child_env())
+
+        warm_results = read_results(results_path)
+        results = []
+        for run_id in run_ids:
+            result = warm_results.get(run_id)
+            if result is None:
+                # not reached (or not finished) by the worker: no warm attempt to count,
+                # the cold run is the first attempt with the full retry budget
+                result = run_replicate(run_id, self.log_path(run_id), self.extra_args, self.retries, resume=True)
+            elif result.returncode != 0 and self.retries > 0:
+                retry = run_replicate(run_id, self.log_path(run_id), self.extra_args, self.retries - 1, resume=True)
+                result = retry._replace(attempts=retry.attempts + result.attempts,
+                                        seconds=retry.seconds + result.seconds)
+            results.append(result)
+        return results
+
+    def run(self):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        mode = "warm workers" if self.warm else "workers"
+        print(f"[EnsembleRunner] {len(self.run_ids)} replicates on {self.workers} {mode}, logs in {self.log_dir}")
+        t0 = time.perf_counter()
+        self.monitor = StatusMonitor({run_id: status_path(self.log_dir, run_id) for run_id in self.run_ids},
+                                     self.workers, self.status_interval).start()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            if self.warm:
+                chunks = [self.run_ids[i::self.workers] for i in range(self.workers)]
+                futures = [pool.submit(self.run_warm, i, chunk) for i, chunk in enumerate(chunks) if chunk]
+            else:
+                futures = [pool.submit(self.run_one, run_id) for run_id in self.run_ids]
+            for future in as_completed(futures):
+                results = future.result()
+                for result in results if self.warm else [results]:
+                    self.results[result.run_id] = result
+                    self.monitor.set_state(result.run_id, "done" if result.returncode == 0 else "failed")
+                    status = "ok" if result.returncode == 0 else f"FAILED (exit {result.returncode})"
+                    print(f"[EnsembleRunner] run {result.run_id}: {status} after {result.attempts} attempt(s), "
+                          f"{result.seconds:.1f} s")
+        self.monitor.stop()
+
+        self.wallclock = time.perf_counter() - t0
+        self.write_summary()
+        return [self.results[run_id] for run_id in self.run_ids]
+
+    @property
+    def failed(self):
+        return [result for result in self.results.values() if result.returncode != 0]
+
+    def write_summary(self):
+        summary = {
+            "workers": self.workers,
+            "warm": self.warm,
+            "retries": self.retries,
+            "wallclock_seconds": self.wallclock,
+            "runs": [self.results[run_id]._asdict() for run_id in self.run_ids if run_id in self.results],
+        }
+        with open(self.log_dir / "ensemble_summary.json", "w") as f:
+            json.dump(summary, f, indent=2)
+
+        total = sum(result.seconds for result in self.results.values())
+        print(f"[EnsembleRunner] {len(self.results) - len(self.failed)}/{len(self.run_ids)} replicates succeeded, "
+              f"wallclock {self.wallclock:.1f} s for {total:.1f} s of runs ({total / max(self.wallclock, 1e-9):.1f}x)")
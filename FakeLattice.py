@@ -0,0 +1,386 @@
+import sys
+import types
+from collections import namedtuple
+import numpy as np
+
+## numpy stand-in for the parts of CC3D the steppables use, to run and time them
+## without a CC3D install or a Potts engine (bench_steppables.py)
+## - FakeLattice: label array plus per-cell volume, COM sums and bounding boxes,
+##   kept up to date on every pixel change, so cell.volume / xCOM / yCOM are O(1)
+## - FakeSteppableBase: the SteppableBasePy attributes and methods the steppables call
+## - LatticeDriver: scripted, seeded lattice evolution in place of the Potts engine
+## - FakeSimulation: register / start / step / finish like CC3DSimService
+## install_fake_cc3d() must run before the steppable modules are imported; it puts
+## FakeSteppableBase in place of cc3d.core.PySteppables.SteppableBasePy
+
+# cell type ids as CC3D assigns them for CellTypePlugin("Cell", "Wall", "Fluid")
+MEDIUM, CELL, WALL, FLUID = 0, 1, 2, 3
+
+Point3D = namedtuple("Point3D", ["x", "y", "z"])
+PixelTrackerData = namedtuple("PixelTrackerData", ["pixel"])
+
+NEIGHBOR_OFFSETS = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])
+
+
+class FakeCell:
+    """CC3D cell: id, type and the volume/force attributes; volume and COM come from the lattice."""
+
+    def __init__(self, lattice, cell_id, cell_type):
+        self.lattice = lattice
+        self.id = cell_id
+        self.type = cell_type
+        self.targetVolume = 0.0
+        self.lambdaVolume = 0.0
+        self.lambdaVecX = 0.0
+        self.lambdaVecY = 0.0
+
+    @property
+    def volume(self):
+        return int(self.lattice.volume[self.id])
+
+    @property
+    def xCOM(self):
+        return self.lattice.sum_x[self.id] / max(self.lattice.volume[self.id], 1)
+
+    @property
+    def yCOM(self):
+        return self.lattice.sum_y[self.id] / max(self.lattice.volume[self.id], 1)
+
+
+class FakeCellField:
+    """cell_field[x, y, 0]: the cell at a pixel or None for medium; assignment moves the pixel."""
+
+    def __init__(self, lattice):
+        self.lattice = lattice
+
+    def __getitem__(self, index):
+        label = self.lattice.labels[index[0], index[1]]
+        return self.lattice.cells.get(int(label)) if label else None
+
+    def __setitem__(self, index, cell):
+        self.lattice.set_pixel(index[0], index[1], cell.id if cell is not None else 0)
+
+
+class FakeLattice:
+    """
+    2D lattice of cell ids (0 = medium) with the per-cell sums CC3D keeps:
+    volume, sum_x, sum_y (for the COM) and a bounding box that bounds every pixel
+    of the cell (tightened whenever the cell's pixels are listed).
+    Cells whose volume drops to 0 are removed, as in CC3D.
+    """
+
+    def __init__(self, grid_x, grid_y):
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.labels = np.zeros((grid_x, grid_y), dtype=np.int64)
+        self.cells = {}
+        self.next_id = 1
+        self._allocate(64)
+
+    @classmethod
+    def from_labels(cls, labels, types):
+        """Lattice painted with `labels`; types maps each non-zero label to its cell type."""
+        lattice = cls(*labels.shape)
+        lattice._allocate(int(labels.max()) + 1)
+        for label, cell_type in types.items():
+            lattice.cells[int(label)] = FakeCell(lattice, int(label), cell_type)
+            lattice.cell_type[int(label)] = cell_type
+        lattice.next_id = max(lattice.cells, default=0) + 1
+        lattice.labels[...] = labels
+        xs, ys = np.nonzero(labels)
+        lattice._add_pixels(labels[xs, ys], xs, ys)
+        return lattice
+
+    def _allocate(self, capacity):
+        old = getattr(self, "volume", None)
+        n_old = 0 if old is None else len(old)
+        if capacity <= n_old:
+            return
+        capacity = max(capacity, 2 * n_old)
+
+        def grow(array, fill, dtype):
+            grown = np.full(capacity, fill, dtype=dtype)
+            if array is not None:
+                grown[:len(array)] = array
+            return grown
+
+        self.volume = grow(old, 0, np.int64)
+        self.cell_type = grow(getattr(self, "cell_type", None), MEDIUM, np.int64)
+        self.sum_x = grow(getattr(self, "sum_x", None), 0, np.int64)
+        self.sum_y = grow(getattr(self, "sum_y", None), 0, np.int64)
+        self.box_min_x = grow(getattr(self, "box_min_x", None), self.grid_x, np.int64)
+        self.box_min_y = grow(getattr(self, "box_min_y", None), self.grid_y, np.int64)
+        self.box_max_x = grow(getattr(self, "box_max_x", None), -1, np.int64)
+        self.box_max_y = grow(getattr(self, "box_max_y", None), -1, np.int64)
+
+    def _add_pixels(self, ids, xs, ys):
+        np.add.at(self.volume, ids, 1)
+        np.add.at(self.sum_x, ids, xs)
+        np.add.at(self.sum_y, ids, ys)
+        np.minimum.at(self.box_min_x, ids, xs)
+        np.minimum.at(self.box_min_y, ids, ys)
+        np.maximum.at(self.box_max_x, ids, xs)
+        np.maximum.at(self.box_max_y, ids, ys)
+
+    def _remove_pixels(self, ids, xs, ys):
+        np.subtract.at(self.volume, ids, 1)
+        np.subtract.at(self.sum_x, ids, xs)
+        np.subtract.at(self.sum_y, ids, ys)
+
+    def _drop_empty(self, ids):
+        for cell_id in np.unique(ids).tolist():
+            if cell_id and self.volume[cell_id] == 0 and cell_id in self.cells:
+                del self.cells[cell_id]
+
+    def new_cell(self, cell_type):
+        cell = FakeCell(self, self.next_id, cell_type)
+        self._allocate(self.next_id + 1)
+        self.cells[cell.id] = cell
+        self.cell_type[cell.id] = cell_type
+        self.next_id += 1
+        return cell
+
+    def set_pixel(self, x, y, cell_id):
+        old = int(self.labels[x, y])
+        if old == cell_id:
+            return
+        self.labels[x, y] = cell_id
+        if old:
+            self.volume[old] -= 1
+            self.sum_x[old] -= x
+            self.sum_y[old] -= y
+            if self.volume[old] == 0:
+                self.cells.pop(old, None)
+        if cell_id:
+            self.volume[cell_id] += 1
+            self.sum_x[cell_id] += x
+            self.sum_y[cell_id] += y
+            self.box_min_x[cell_id] = min(self.box_min_x[cell_id], x)
+            self.box_min_y[cell_id] = min(self.box_min_y[cell_id], y)
+            self.box_max_x[cell_id] = max(self.box_max_x[cell_id], x)
+            self.box_max_y[cell_id] = max(self.box_max_y[cell_id], y)
+
+    def copy_pixels(self, xs, ys, new_ids):
+        """Assign new_ids to the pixels (xs, ys) in one batch; each pixel at most once."""
+        old_ids = self.labels[xs, ys]
+        moved = old_ids != new_ids
+        xs, ys, old_ids, new_ids = xs[moved], ys[moved], old_ids[moved], new_ids[moved]
+        self.labels[xs, ys] = new_ids
+        owned = old_ids != 0
+        self._remove_pixels(old_ids[owned], xs[owned], ys[owned])
+        owned = new_ids != 0
+        self._add_pixels(new_ids[owned], xs[owned], ys[owned])
+        self._drop_empty(old_ids)
+
+    def delete_cell(self, cell):
+        xs, ys = self.pixels(cell.id).T
+        self.copy_pixels(xs, ys, np.zeros(len(xs), dtype=np.int64))
+        self.cells.pop(cell.id, None)
+
+    def pixels(self, cell_id):
+        """(n, 2) pixel coordinates of a cell, from a scan of its bounding box (then tightened)."""
+        if self.volume[cell_id] == 0:
+            return np.empty((0, 2), dtype=np.int64)
+        x0, y0 = self.box_min_x[cell_id], self.box_min_y[cell_id]
+        window = self.labels[x0:self.box_max_x[cell_id] + 1, y0:self.box_max_y[cell_id] + 1]
+        pixels = np.argwhere(window == cell_id) + (x0, y0)
+        self.box_min_x[cell_id], self.box_min_y[cell_id] = pixels.min(axis=0)
+        self.box_max_x[cell_id], self.box_max_y[cell_id] = pixels.max(axis=0)
+        return pixels
+
+    def neighbor_labels(self, pixels):
+        """(n, 4) labels of the 4 neighbours of each pixel, -1 outside the lattice."""
+        xy = pixels[:, None, :] + NEIGHBOR_OFFSETS[None, :, :]
+        inside = (xy[..., 0] >= 0) & (xy[..., 0] < self.grid_x) & (xy[..., 1] >= 0) & (xy[..., 1] < self.grid_y)
+        labels = np.full(inside.shape, -1, dtype=np.int64)
+        labels[inside] = self.labels[xy[..., 0][inside], xy[..., 1][inside]]
+        return labels
+
+
+class FakeSteppableBase:
+    """
+    The SteppableBasePy interface used by the steppables of this project; the
+    lattice is attached by FakeSimulation.register_steppable (CC3D does the same on
+    registration), so subclasses are constructed exactly as in StretchableBC_main.py.
+    """
+
+    MEDIUM, CELL, WALL, FLUID = MEDIUM, CELL, WALL, FLUID
+
+    def __init__(self, frequency=1, *args, **kwargs):
+        self.frequency = frequency
+        self.lattice = None
+        self.simulation = None
+
+    def start(self):
+        pass
+
+    def step(self, mcs):
+        pass
+
+    def finish(self):
+        pass
+
+    def attach(self, lattice, simulation=None):
+        self.lattice = lattice
+        self.simulation = simulation
+        self.cell_field = self.cellField = FakeCellField(lattice)
+        self.dim = Point3D(lattice.grid_x, lattice.grid_y, 1)
+
+    @property
+    def cell_list(self):
+        return list(self.lattice.cells.values())
+
+    def cell_list_by_type(self, *cell_types):
+        return [cell for cell in self.lattice.cells.values() if cell.type in cell_types]
+
+    def fetch_cell_by_id(self, cell_id):
+        return self.lattice.cells.get(int(cell_id))
+
+    def new_cell(self, cell_type):
+        return self.lattice.new_cell(cell_type)
+
+    def delete_cell(self, cell):
+        self.lattice.delete_cell(cell)
+
+    deleteCell = delete_cell
+
+    def get_cell_pixel_list(self, cell):
+        return [PixelTrackerData(Point3D(x, y, 0)) for x, y in self.lattice.pixels(cell.id).tolist()]
+
+    def get_cell_boundary_pixel_list(self, cell):
+        """Pixels of the cell with at least one 4-neighbour outside it (or outside the lattice)."""
+        pixels = self.lattice.pixels(cell.id)
+        boundary = (self.lattice.neighbor_labels(pixels) != cell.id).any(axis=1)
+        return [PixelTrackerData(Point3D(x, y, 0)) for x, y in pixels[boundary].tolist()]
+
+    def get_cell_neighbor_data_list(self, cell):
+        """(neighbour cell or None for medium, common surface area) for every 4-neighbour contact."""
+        neighbors = self.lattice.neighbor_labels(self.lattice.pixels(cell.id)).reshape(-1)
+        neighbors = neighbors[(neighbors != cell.id) & (neighbors >= 0)]
+        ids, counts = np.unique(neighbors, return_counts=True)
+        return [(self.lattice.cells.get(cell_id) if cell_id else None, count)
+                for cell_id, count in zip(ids.tolist(), counts.tolist())]
+
+    def stop_simulation(self):
+        if self.simulation is not None:
+            self.simulation.stopped = True
+
+
+class LatticeDriver:
+    """
+    Seeded stand-in for the Potts engine: each mcs, `attempts` random pixels plus
+    each medium pixel with probability fill_probability try to copy the id of a
+    random 4-neighbour. CELLs spread into medium and swap pixels with other CELLs
+    (with probability cell_swap_probability); wall, fluid and medium never spread,
+    so gaps and wounds only close. The same seed gives the same sequence of lattices.
+    """
+
+    def __init__(self, lattice, seed=0, attempts=None, fill_probability=0.5, cell_swap_probability=0.1):
+        self.lattice = lattice
+        self.rng = np.random.default_rng(seed)
+        self.attempts = attempts if attempts is not None else max(lattice.grid_x * lattice.grid_y // 50, 1)
+        self.fill_probability = fill_probability
+        self.cell_swap_probability = cell_swap_probability
+
+    def mcs(self):
+        lattice = self.lattice
+        gx, gy = lattice.grid_x, lattice.grid_y
+        xs = self.rng.integers(1, gx - 1, self.attempts)
+        ys = self.rng.integers(1, gy - 1, self.attempts)
+        medium = np.flatnonzero(lattice.labels == 0)
+        medium = medium[self.rng.random(len(medium)) < self.fill_probability]
+        mx, my = np.divmod(medium, gy)
+        interior = (mx > 0) & (mx < gx - 1) & (my > 0) & (my < gy - 1)
+        flat = np.unique(np.concatenate([xs * gy + ys, medium[interior]]))
+        xs, ys = np.divmod(flat, gy)
+        offsets = NEIGHBOR_OFFSETS[self.rng.integers(0, 4, len(xs))]
+        swap = self.rng.random(len(xs)) < self.cell_swap_probability
+
+        targets = lattice.labels[xs, ys]
+        sources = lattice.labels[xs + offsets[:, 0], ys + offsets[:, 1]]
+        target_types = lattice.cell_type[targets]
+        source_types = lattice.cell_type[sources]
+        accept = (source_types == CELL) & ((targets == 0) | ((target_types == CELL) & swap))
+        # a cell never gives away its last pixel
+        accept &= (targets == 0) | (lattice.volume[targets] > 1)
+        lattice.copy_pixels(xs[accept], ys[accept], sources[accept])
+
+
+class FakeSimulation:
+    """
+    The CC3DSimService calls of StretchableBC_main.py on a FakeLattice: steppables
+    run in registration order after each LatticeDriver mcs; stop_simulation() in a
+    steppable ends the run after the current mcs.
+    """
+
+    def __init__(self, lattice, driver=None):
+        self.lattice = lattice
+        self.driver = driver if driver is not None else LatticeDriver(lattice)
+        self.steppables = []
+        self.current_step = 0
+        self.stopped = False
+
+    def register_steppable(self, steppable):
+        steppable.attach(self.lattice, self)
+        self.steppables.append(steppable)
+
+    def start(self):
+        for steppable in self.steppables:
+            steppable.start()
+
+    def step(self):
+        self.driver.mcs()
+        for steppable in self.steppables:
+            if self.current_step % steppable.frequency == 0:
+                steppable.step(self.current_step)
+        self.current_step += 1
+
+    def finish(self):
+        for steppable in self.steppables:
+            steppable.finish()
+
+
+def domain_lattice(geometry, target_volume, wall=True):
+    """
+    FakeLattice with a confluent Voronoi tissue in the cell disk of `geometry`
+    (DomainGeometry.voronoi_labels, seeded through np.random), one fluid cell and one
+    wall cell, like CircularDomainInitialiser with seeding "voronoi".
+    Returns (lattice, fluid_id, wall_id).
+    """
+    from DomainGeometry import voronoi_labels
+
+    labels = voronoi_labels(geometry, target_volume).astype(np.int64)
+    n_cells = int(labels.max())
+    types = {label: CELL for label in range(1, n_cells + 1)}
+    fluid_id, wall_id = n_cells + 1, n_cells + 2
+    labels[geometry.fluid_mask] = fluid_id
+    types[fluid_id] = FLUID
+    if wall:
+        labels[geometry.wall_mask] = wall_id
+        types[wall_id] = WALL
+    lattice = FakeLattice.from_labels(labels, types)
+    for cell in lattice.cells.values():
+        if cell.type == CELL:
+            cell.targetVolume = target_volume
+    return lattice, fluid_id, wall_id
+
+
+def install_fake_cc3d():
+    """
+    Register stand-in cc3d, cc3d.core and cc3d.core.PySteppables modules with
+    FakeSteppableBase as SteppableBasePy. Call before importing the steppable modules
+    (Parameters.py and the steppables import cc3d at module level).
+    """
+    if "cc3d.core.PySteppables" in sys.modules and \
+            getattr(sys.modules["cc3d.core.PySteppables"], "SteppableBasePy", None) is FakeSteppableBase:
+        return
+    for name in ("WoundMakerForce", "Measurements", "CellVolumeMeasurements", "CircularDomainBuffer", "Checkpoint"):
+        if name in sys.modules:
+            raise RuntimeError(f"install_fake_cc3d() must run before {name} is imported")
+    cc3d = types.ModuleType("cc3d")
+    core = types.ModuleType("cc3d.core")
+    steppables = types.ModuleType("cc3d.core.PySteppables")
+    steppables.SteppableBasePy = FakeSteppableBase
+    cc3d.core = core
+    core.PySteppables = steppables
+    sys.modules.update({"cc3d": cc3d, "cc3d.core": core, "cc3d.core.PySteppables": steppables})
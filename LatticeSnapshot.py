@@ -0,0 +1,236 @@
+import itertools
+import numpy as np
+
+from DomainGeometry import domain_geometry
+
+## helpers to read the CC3D lattice into numpy arrays
+## (no cc3d import here so post-processing and benchmark scripts can use them)
+
+
+def cell_volumes(cells):
+    """Volumes of all `cells` (any iterable of CC3D cells) as an int64 array."""
+    return np.fromiter((cell.volume for cell in cells), dtype=np.int64)
+
+
+def medium_pixel_count(volumes, grid_x, grid_y):
+    """
+    Number of medium pixels on a grid_x*grid_y lattice.
+    Every non-medium pixel belongs to exactly one cell (Cell, Wall or Fluid)
+    and cell.volume is that cell's pixel count, so
+    medium pixels = lattice area - sum of all cell volumes.
+    """
+    return grid_x * grid_y - int(np.sum(volumes))
+
+
+class DomainFillTracker:
+    """
+    Keeps the medium pixel count of the domain during the filling phase.
+    The count comes from the cell volumes CC3D already maintains, so a check
+    costs one pass over the cell inventory instead of a full lattice scan,
+    and nothing at all once the domain has been reported filled.
+    Medium can only exist inside the r_fc disk (wall and fluid own the rest),
+    so this is the number of gaps left in the tissue.
+    """
+
+    def __init__(self, grid_x, grid_y):
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.medium_pixels = None
+        self.filled = False
+
+    def update(self, cells, tolerance=0):
+        """Refresh the medium count from `cells` and return whether the domain is filled."""
+        if self.filled:
+            return True
+        return self.update_volumes(cell_volumes(cells), tolerance)
+
+    def update_volumes(self, volumes, tolerance=0):
+        """Same as update, from the volumes of all cells (e.g. CellTable.volume)."""
+        if self.filled:
+            return True
+        self.medium_pixels = medium_pixel_count(volumes, self.grid_x, self.grid_y)
+        self.filled = self.medium_pixels <= tolerance
+        return self.filled
+
+
+def label_array(steppable, grid_x, grid_y, geometry=None):
+    """
+    Lattice label array (grid_x, grid_y) of cell ids, 0 = medium, built from the
+    pixel tracker lists of the cells known to `steppable` (needs PixelTrackerPlugin).
+    With the DomainGeometry of the run, the Wall cell (frozen, so it always owns
+    exactly geometry.wall_mask) is painted from the mask in one assignment instead of
+    walking its pixel list, which covers the lattice corners. Fluid cells are walked:
+    they are unfrozen at the wound and their pixels move.
+    """
+    labels = np.zeros((grid_x, grid_y), dtype=np.int32)
+    wall_pixels = len(geometry.wall_xy) if geometry is not None else None
+    for cell in steppable.cell_list:
+        if cell.type == steppable.WALL and cell.volume == wall_pixels:
+            labels[geometry.wall_mask] = cell.id
+            continue
+        pixels = np.fromiter(
+            itertools.chain.from_iterable((p.pixel.x, p.pixel.y) for p in steppable.get_cell_pixel_list(cell)),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        labels[pixels[:, 0], pixels[:, 1]] = cell.id
+    return labels
+
+
+class CellTable:
+    """
+    Struct-of-arrays view of all cells at one MCS: id, type, volume, xCOM, yCOM,
+    lambda_volume, plus `cells`, the CC3D cell objects in the same row order.
+    Built with one pass of attribute reads over steppable.cell_list.
+    """
+
+    def __init__(self, cells):
+        self.cells = [cell for cell in cells if cell is not None]
+        n = len(self.cells)
+        self.id = np.fromiter((cell.id for cell in self.cells), dtype=np.int64, count=n)
+        self.type = np.fromiter((cell.type for cell in self.cells), dtype=np.int64, count=n)
+        self.volume = np.fromiter((cell.volume for cell in self.cells), dtype=np.int64, count=n)
+        self.x = np.fromiter((cell.xCOM for cell in self.cells), dtype=np.float64, count=n)
+        self.y = np.fromiter((cell.yCOM for cell in self.cells), dtype=np.float64, count=n)
+        self.lambda_volume = np.fromiter((cell.lambdaVolume for cell in self.cells), dtype=np.float64, count=n)
+        self._row_of_id = None
+
+    def __len__(self):
+        return len(self.cells)
+
+    def of_type(self, cell_type):
+        """Row indices of the cells of `cell_type`, in table order."""
+        return np.flatnonzero(self.type == cell_type)
+
+    def rows(self, ids):
+        """Row index of each id in `ids`, -1 for ids not in the table."""
+        if self._row_of_id is None:
+            self._row_of_id = np.full(int(self.id.max()) + 1 if len(self.id) else 1, -1, dtype=np.int64)
+            self._row_of_id[self.id] = np.arange(len(self.id))
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        known = ids < len(self._row_of_id)
+        rows[known] = self._row_of_id[ids[known]]
+        return rows
+
+
+class SnapshotProvider:
+    """
+    Per-MCS cache of the CellTable and the lattice label array, shared by all
+    steppables of a simulation so each is built at most once per MCS.
+    Entries are dropped when a different mcs is requested and by invalidate(),
+    which a steppable must call after adding or deleting cells or moving pixels.
+    Steppables that change cell attributes in the table (e.g. lambdaVolume)
+    update the table column in place instead.
+    """
+
+    def __init__(self, grid_x, grid_y, geometry=None):
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.geometry = geometry  # DomainGeometry for label_array, see for_context
+        self.mcs = None
+        self._table = None
+        self._labels = None
+        self.table_builds = 0
+        self.label_builds = 0
+        self.requests = 0
+
+    @classmethod
+    def for_context(cls, context):
+        """Provider for the lattice and domain geometry of a RunContext."""
+        return cls(context.grid_x, context.grid_y,
+                   domain_geometry(context.grid_x, context.grid_y, context.thick_w, context.thick_f, context.wR))
+
+    def invalidate(self):
+        self._table = None
+        self._labels = None
+
+    def _at(self, mcs):
+        self.requests += 1
+        if mcs != self.mcs:
+            self.invalidate()
+            self.mcs = mcs
+
+    def table(self, steppable, mcs):
+        self._at(mcs)
+        if self._table is None:
+            self._table = CellTable(steppable.cell_list)
+            self.table_builds += 1
+        return self._table
+
+    def labels(self, steppable, mcs):
+        self._at(mcs)
+        if self._labels is None:
+            self._labels = label_array(steppable, self.grid_x, self.grid_y, self.geometry)
+            self.label_builds += 1
+        return self._labels
+
+    def summary(self):
+        return f"{self.requests} requests, {self.table_builds} cell tables and {self.label_builds} label arrays built"
+
+
+class VolumeCache:
+    """
+    Last seen volume per cell id, stored in a compact array indexed by id that
+    grows with the largest id seen. Used to skip per-cell updates that only
+    depend on the volume when the volume did not change.
+    """
+
+    def __init__(self, capacity=1024):
+        self.volumes = np.full(capacity, -1, dtype=np.int64)
+
+    def changed(self, ids, volumes):
+        """Mask of the cells whose volume differs from the cached one; caches the new volumes."""
+        if len(ids) and ids.max() >= len(self.volumes):
+            grown = np.full(max(2 * len(self.volumes), ids.max() + 1), -1, dtype=np.int64)
+            grown[:len(self.volumes)] = self.volumes
+            self.volumes = grown
+        mask = self.volumes[ids] != volumes
+        self.volumes[ids] = volumes
+        return mask
+
+
+def paint_label_array(cell_field, labels, cells_by_label):
+    """
+    Write a label array to the CC3D cell field: every pixel with a non-zero label
+    is assigned cells_by_label[label]; pixels labelled 0 are left untouched.
+    """
+    xs, ys = np.nonzero(labels)
+    for x, y, label in zip(xs.tolist(), ys.tolist(), labels[xs, ys].tolist()):
+        cell_field[x, y, 0] = cells_by_label[label]
+
+
+# per-cell attributes saved with a lattice state (CC3D attribute names)
+CELL_STATE_ATTRIBUTES = ("targetVolume", "lambdaVolume", "lambdaVecX", "lambdaVecY")
+
+
+def capture_lattice_state(steppable, grid_x, grid_y, labels=None):
+    """
+    Label array plus the type and CELL_STATE_ATTRIBUTES of every cell, as plain
+    numpy arrays (ready for np.savez). Cell ids are the labels used in the array.
+    `labels` can be passed in when a current label array exists (SnapshotProvider).
+    """
+    cells = list(steppable.cell_list)
+    state = {
+        "labels": labels if labels is not None else label_array(steppable, grid_x, grid_y),
+        "cell_id": np.array([cell.id for cell in cells], dtype=np.int32),
+        "cell_type": np.array([cell.type for cell in cells], dtype=np.int32),
+    }
+    for name in CELL_STATE_ATTRIBUTES:
+        state[name] = np.array([getattr(cell, name) for cell in cells], dtype=np.float64)
+    return state
+
+
+def restore_lattice_state(steppable, state):
+    """
+    Recreate the cells of a captured lattice state (new CC3D ids) and paint them.
+    Returns a dict mapping the saved cell ids to the new cells.
+    """
+    cells_by_label = {}
+    for i, cell_id in enumerate(state["cell_id"].tolist()):
+        cell = steppable.new_cell(int(state["cell_type"][i]))
+        for name in CELL_STATE_ATTRIBUTES:
+            setattr(cell, name, float(state[name][i]))
+        cells_by_label[cell_id] = cell
+
+    paint_label_array(steppable.cell_field, state["labels"], cells_by_label)
+    return cells_by_label
@@ -5,21 +5,34 @@ import numpy as np
 import math
 
 #from Parameters import *
-import Parameters
+from RunContext import RunContext
+from LatticeSnapshot import SnapshotProvider, medium_pixel_count
+from Checkpoint import truncate_text_output
+from BufferedWriter import BufferedWriter
+from RunMetadata import RUN_PARAMETERS, metadata_path, start_metadata, update_metadata
+from SamplingCadence import SamplingCadence
 from pathlib import Path
 
 class Measurements(SteppableBasePy):
-    def __init__(self, frequency=1, run_id=0):
+    def __init__(self, frequency=1, context=None, cadence=None, snapshots=None):
         super().__init__(frequency=frequency)
+        # parameters and phase state of this simulation (wound_mcs etc. set by WoundMakerSteppable)
+        self.context = context if context is not None else RunContext()
+        # per-MCS cell table shared with the other steppables (LatticeSnapshot.SnapshotProvider)
+        self.snapshots = snapshots if snapshots is not None else SnapshotProvider.for_context(self.context)
 
-        self.run_id=run_id
+        self.run_id=self.context.run_id
+        # which mcs are written; the wound area is still computed every mcs for the closure test
+        self.cadence = cadence if cadence is not None else SamplingCadence(**self.context.measurement_cadence)
         self.wound_closed_flag = False # it is not yet opened really
-        self.header_updated = False
+        self.wound_recorded = False # wound_mcs written to the run metadata sidecar
         self.closed_counter = 0
+        self.wound_area = None  # of the last mcs, for the status file (RunStatus.py)
+        self.resumed_mcs = None  # set by restore_checkpoint: keep the file up to this mcs
 
 
     def start(self,run_id=0):
-        self.run_dir = Path("Runs") / f"Lx{Parameters.grid_x}_Ly{Parameters.grid_y}" / f"R{Parameters.wR}"
+        self.run_dir = self.context.run_dir
         self.run_dir.mkdir(parents=True, exist_ok=True)
 
         # Optional: delete all old measurement files for this wound folder
@@ -29,38 +42,48 @@ class Measurements(SteppableBasePy):
 
         # create file path
         self.output_file = self.run_dir / f"simulation_results_{self.run_id}.txt"
+        # phase events go to run_metadata_<run_id>.json, see RunMetadata.py
+        self.metadata_file = metadata_path(self.run_dir, self.run_id)
 
         #self.output_file = f"simulation_results_{run_id}.txt"
         #with open(self.output_file, "a") as f:
         #    f.write("mcs, wound Area\n")
 
-        with open(self.output_file, "w") as f:
-            f.write(f"# Domain Size: Lx={Parameters.grid_x}, Ly={Parameters.grid_y}\n")
-            f.write(f"# Wound Radius Created: R={Parameters.wR}\n")
-            f.write("# Wound created at mcs: {wound_mcs}\n")  # placeholder
-            f.write("mcs,woundArea\n")
+        if self.resumed_mcs is not None:
+            truncate_text_output(self.output_file, self.resumed_mcs)
+        else:
+            with open(self.output_file, "w") as f:
+                f.write(f"# Domain Size: Lx={self.context.grid_x}, Ly={self.context.grid_y}\n")
+                f.write(f"# Wound Radius Created: R={self.context.wR}\n")
+                f.write(f"# Run metadata: {self.metadata_file.name}\n")
+                f.write("mcs,woundArea\n")
+            start_metadata(self.metadata_file, self.run_id, self.context.parameters(RUN_PARAMETERS))
+
+        # rows are buffered and written in batches, see BufferedWriter.py
+        self.writer = BufferedWriter(self.output_file, self.context.output_buffer_bytes, self.context.output_flush_seconds)
   
     def step(self,mcs):
-        #print("wound_mcs seen by Measurements:", Parameters.wound_mcs)
-        if not self.header_updated:
+        mcs = mcs + self.context.mcs_offset  # resumed runs continue the mcs count of the checkpoint
+        #print("wound_mcs seen by Measurements:", self.context.wound_mcs)
+        if not self.wound_recorded:
             #wound_steppable = self.get_steppable_by_class(WoundMakerSteppable)
             #wound_mcs = wound_steppable.wound_mcs
 
-            if Parameters.wound_mcs is not None:
-                self._update_wound_header(Parameters.wound_mcs)
-                self.header_updated = True
+            if self.context.wound_mcs is not None:
+                update_metadata(self.metadata_file, wound_mcs=self.context.wound_mcs,
+                                domain_filled_mcs=self.context.domain_filled_mcs)
+                self.wound_recorded = True
         #print(f"Measurements step called at MCS={mcs}")  # Debug line
         # woundArea=0
         # occupiedArea=0
         # for cell in self.cell_list:
         #     occupiedArea += cell.volume
         # woundArea=(grid_x-3)*(grid_y-3) - occupiedArea
-        woundArea = self.compute_wound_area()
-        
-        with open(self.output_file, "a") as f:
-            f.write(f"{mcs},{woundArea}\n")
-        
-        if self.header_updated and not self.wound_closed_flag:
+        woundArea = self.compute_wound_area(mcs)
+        self.wound_area = woundArea
+
+        closed_now = False
+        if self.wound_recorded and not self.wound_closed_flag:
             if woundArea == 0:
                 self.closed_counter += 1
             else:
@@ -68,26 +91,39 @@ class Measurements(SteppableBasePy):
 
             if self.closed_counter >= 3:
                 print(f"Wound stably closed at mcs {mcs}")
+                update_metadata(self.metadata_file, closure_mcs=mcs)
                 self.wound_closed_flag = True
+                closed_now = True
                 self.stop_simulation()
 
+        # the closure mcs is always written, whatever the cadence
+        if closed_now or self.cadence.should_sample(mcs, self.context.domain_filled, self.context.domain_filled_mcs,
+                                                    self.context.wound_mcs, woundArea):
+            self.writer.write(f"{mcs},{woundArea}\n")
+
+
+    def flush_outputs(self):
+        self.writer.flush()
+
+    def finish(self):
+        self.writer.close()
+        print(f"[Measurements] {self.output_file.name}: {self.writer.summary()}")
+
+    def checkpoint_state(self):
+        return {
+            "wound_closed_flag": self.wound_closed_flag,
+            "wound_recorded": self.wound_recorded,
+            "closed_counter": self.closed_counter,
+        }
+
+    def restore_checkpoint(self, state, mcs):
+        self.wound_closed_flag = state["wound_closed_flag"]
+        self.wound_recorded = state["wound_recorded"]
+        self.closed_counter = state["closed_counter"]
+        self.resumed_mcs = mcs
 
-    def compute_wound_area(self):
-        woundArea = 0
-        for x in range(Parameters.grid_x):
-            for y in range(Parameters.grid_y):
-                if self.cellField[x, y, 0] is None:  # medium pixel
-                    woundArea += 1
-        return woundArea
-    
-    def _update_wound_header(self, wound_mcs):
-        with open(self.output_file, "r") as f:
-            lines = f.readlines()
-
-        for i, line in enumerate(lines):
-            if line.startswith("# Wound created at mcs:"):
-                lines[i] = f"# Wound created at mcs: {wound_mcs}\n"
-                break
-
-        with open(self.output_file, "w") as f:
-            f.writelines(lines)
\ No newline at end of file
+    def compute_wound_area(self, mcs):
+        # medium pixels = lattice area - pixels owned by cells (Cell, Wall and Fluid)
+        # volumes of the shared cell table instead of grid_x*grid_y field lookups
+        table = self.snapshots.table(self, mcs)
+        return medium_pixel_count(table.volume, self.context.grid_x, self.context.grid_y)
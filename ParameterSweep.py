@@ -0,0 +1,263 @@
+import filecmp
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import Parameters
+from EnsembleRunner import run_replicate
+from RunStatus import MONITOR_INTERVAL, StatusMonitor, status_path
+
+## parameter sweeps over StretchableBC_main.py without editing Parameters.py
+## every job (parameter overrides + run_id) is passed to its process through
+## Parameters.OVERRIDE_ENV and logged in an append-only JSONL ledger; a restarted
+## sweep skips the jobs the ledger reports as done and resumes interrupted ones
+## every combination of the parameters that change the dynamics (TAG_PARAMETERS) writes
+## to its own run_tag subfolder of Runs/Lx*_Ly*/R* with run ids 0..replicates-1, so the
+## post-processing never pools different values and replicate i has the same seed everywhere
+## for batch arrays, shard_jobs splits a sweep into n cost-balanced shards; each shard
+## writes to its own root (SHARDS_DIR/shard_<i>_of_<n>) and merge_shards combines them
+
+LEDGER_NAME = "sweep_ledger.jsonl"
+LEDGER_PATH = Path(Parameters.runs_root) / LEDGER_NAME
+SHARDS_DIR = Path(Parameters.runs_root) / "shards"
+
+Job = namedtuple("Job", ["params", "run_id"])
+
+# run parameters that change the dynamics of a run, with their prefix in the run_tag folder name
+TAG_PARAMETERS = {
+    "target_volume": "V", "lambda_volume": "LV", "relaxation_mcs": "RX", "seeding": "S",
+    "force": "F", "frontier_refresh_mcs": "FR", "thick_f": "TF", "thick_w": "TW",
+}
+
+
+def resolved(params, name):
+    """Value of a parameter for a job: its override, else the Parameters.py default."""
+    if name in params:
+        return params[name]
+    if name == "grid_y" and "grid_x" in params:
+        return params["grid_x"]  # grid_y follows grid_x as in Parameters.py
+    return getattr(Parameters, name)
+
+
+def run_tag(params):
+    """
+    Name of the folder for the TAG_PARAMETERS set in params, e.g. LV2_F600 for
+    force=600 and lambda_volume=2; "" if params sets none of them.
+    """
+    return "_".join(f"{prefix}{params[name]}" for name, prefix in TAG_PARAMETERS.items() if name in params)
+
+
+def job_run_dir(job, runs_root=None):
+    """Runs/Lx*_Ly*/R*[/<run_tag>] folder the job writes to (below runs_root, default Parameters.runs_root)."""
+    params = job.params
+    return (Path(runs_root or Parameters.runs_root) / f"Lx{resolved(params, 'grid_x')}_Ly{resolved(params, 'grid_y')}"
+            / f"R{resolved(params, 'wR')}" / resolved(params, "run_tag"))
+
+
+def job_key(job):
+    return f"{json.dumps(job.params, sort_keys=True)}#{job.run_id}"
+
+
+def job_label(job):
+    """Short name of a job for the progress table: its overrides and run_id."""
+    return ",".join(f"{name}={value}" for name, value in sorted(job.params.items())
+                    if name != "run_tag") + f"#{job.run_id}"
+
+
+def job_cost(job):
+    """Relative cost estimate for scheduling: lattice area times maximum MCS."""
+    params = job.params
+    return resolved(params, "grid_x") * resolved(params, "grid_y") * resolved(params, "t")
+
+
+def expand_sweep(grid, fixed=None, replicates=1):
+    """
+    Jobs for every combination of the values in `grid` (name -> list of values),
+    plus the overrides in `fixed`, with run ids 0..replicates-1 each.
+    Combinations that set TAG_PARAMETERS (e.g. a force sweep) write to their own
+    run_tag subfolder of Runs/Lx*_Ly*/R*, named after the values and not the grid
+    order, so editing the grid and resuming never moves a job to another folder.
+    """
+    names = sorted(grid)
+    jobs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(fixed or {})
+        params.update(zip(names, values))
+        tag = run_tag(params)
+        if tag:
+            params["run_tag"] = tag
+        jobs.extend(Job(params, run_id) for run_id in range(replicates))
+    return jobs
+
+
+def shard_jobs(jobs, n_shards):
+    """
+    Partition `jobs` into n_shards lists of about equal total job_cost: jobs are
+    taken largest first and each goes to the shard with the smallest total so far
+    (ties to the lowest shard index). Deterministic for the same job list, so every
+    shard of an array job computes the same partition independently.
+    Jobs within a shard stay in largest-first order.
+    """
+    shards = [[] for _ in range(n_shards)]
+    totals = [0] * n_shards
+    for job in sorted(jobs, key=lambda job: (-job_cost(job), job_key(job))):
+        i = min(range(n_shards), key=lambda i: (totals[i], i))
+        shards[i].append(job)
+        totals[i] += job_cost(job)
+    return shards
+
+
+def shard_root(index, n_shards, shards_dir=SHARDS_DIR):
+    """Output root of shard `index` (0-based) of n_shards."""
+    return Path(shards_dir) / f"shard_{index}_of_{n_shards}"
+
+
+def merge_shards(shards_dir=SHARDS_DIR, runs_root=None):
+    """
+    Copy the Lx*_Ly*/R* trees (with their run_tag subfolders) of all shards below shards_dir into runs_root, so the
+    post-processing scripts see one Runs/ tree; the shard ledgers are appended to
+    the ledger of runs_root. Files already present with the same content are skipped
+    (merging again is safe); a file with different content at the same path is an
+    error, since shards of one sweep never write the same run.
+    Returns the number of files copied.
+    """
+    runs_root = Path(runs_root or Parameters.runs_root)
+    copied = 0
+    ledger_lines = []
+    for shard in sorted(Path(shards_dir).glob("shard_*_of_*")):
+        for source in sorted(shard.glob("Lx*_Ly*/R*/**/*")):
+            if not source.is_file():
+                continue
+            target = runs_root / source.relative_to(shard)
+            if target.exists():
+                if not filecmp.cmp(source, target, shallow=False):
+                    raise FileExistsError(f"{target} differs from {source}, shards overlap")
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target)
+            copied += 1
+        ledger = shard / LEDGER_NAME
+        if ledger.exists():
+            with open(ledger, "r") as f:
+                ledger_lines.extend(line for line in f if line.strip())
+
+    if ledger_lines:
+        merged_ledger = runs_root / LEDGER_NAME
+        known = set()
+        if merged_ledger.exists():
+            with open(merged_ledger, "r") as f:
+                known = set(f)
+        with open(merged_ledger, "a") as f:
+            f.writelines(line if line.endswith("\n") else line + "\n"
+                         for line in ledger_lines if line not in known)
+    return copied
+
+
+class JobLedger:
+    """
+    Append-only JSONL file, one record per job status change:
+    {"key", "params", "run_id", "status": running|done|failed, "time", ...}.
+    The last record of a key is its current status. Safe to use from several threads.
+    """
+
+    def __init__(self, path=LEDGER_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.latest = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # partial last line of an interrupted sweep
+                    self.latest[record["key"]] = record
+
+    def status(self, job):
+        record = self.latest.get(job_key(job))
+        return record["status"] if record is not None else None
+
+    def record(self, job, status, **fields):
+        record = {"key": job_key(job), "params": job.params, "run_id": job.run_id,
+                  "status": status, "time": time.time(), **fields}
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.latest[record["key"]] = record
+
+
+class ParameterSweep:
+    """
+    Runs `jobs` with at most `workers` processes at a time, largest (job_cost) first
+    so the long runs do not end up alone at the end of the sweep. Jobs the ledger
+    has as done are skipped; jobs left running or failed by an earlier sweep are
+    restarted with --resume (from their last checkpoint, if any).
+    runs_root moves all output (and by default the ledger) of the jobs below another
+    root, e.g. shard_root(i, n) for one shard of a sharded sweep.
+    Every `status_interval` seconds a progress table of the running jobs is printed (0: none).
+    """
+
+    def __init__(self, jobs, ledger_path=None, workers=None, retries=1, extra_args=(), runs_root=None,
+                 status_interval=MONITOR_INTERVAL):
+        self.jobs = list(jobs)
+        self.runs_root = Path(runs_root or Parameters.runs_root)
+        self.ledger = JobLedger(ledger_path or self.runs_root / LEDGER_NAME)
+        self.workers = workers or os.cpu_count() or 1
+        self.retries = retries
+        self.extra_args = list(extra_args)
+        self.status_interval = status_interval
+        self.monitor = None
+
+    def pending(self):
+        jobs = [job for job in self.jobs if self.ledger.status(job) != "done"]
+        return sorted(jobs, key=job_cost, reverse=True)
+
+    def run_job(self, job):
+        resume = self.ledger.status(job) in ("running", "failed")
+        log_dir = job_run_dir(job, self.runs_root) / "logs"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self.ledger.record(job, "running")
+        self.monitor.set_state(job_label(job), "started")
+        overrides = {**job.params, "runs_root": str(self.runs_root)}
+        result = run_replicate(job.run_id, log_dir / f"run_{job.run_id}.log", self.extra_args, self.retries,
+                               env={Parameters.OVERRIDE_ENV: json.dumps(overrides)}, resume=resume)
+        self.ledger.record(job, "done" if result.returncode == 0 else "failed",
+                           returncode=result.returncode, attempts=result.attempts,
+                           seconds=result.seconds, log_path=result.log_path)
+        self.monitor.set_state(job_label(job), "done" if result.returncode == 0 else "failed")
+        return result
+
+    def run(self):
+        pending = self.pending()
+        print(f"[ParameterSweep] {len(self.jobs)} jobs, {len(self.jobs) - len(pending)} already done, "
+              f"{len(pending)} to run on {self.workers} workers")
+        t0 = time.perf_counter()
+        results = []
+        # progress of the running jobs from their status files, see RunStatus.py
+        self.monitor = StatusMonitor({job_label(job): status_path(job_run_dir(job, self.runs_root) / "logs", job.run_id)
+                                      for job in pending}, self.workers, self.status_interval).start()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.run_job, job): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                result = future.result()
+                results.append(result)
+                status = "ok" if result.returncode == 0 else f"FAILED (exit {result.returncode})"
+                print(f"[ParameterSweep] {job.params} run {job.run_id}: {status}, {result.seconds:.1f} s")
+        self.monitor.stop()
+        n_failed = sum(result.returncode != 0 for result in results)
+        print(f"[ParameterSweep] finished {len(results) - n_failed}/{len(results)} jobs in "
+              f"{time.perf_counter() - t0:.1f} s")
+        return results
@@ -3,27 +3,63 @@ from cc3d.core.PySteppables import SteppableBasePy
 #from cc3d.core.PyCoreSpecs import PixelTrackerPlugin, BoundaryPixelTrackerPlugin, NeighborTrackerPlugin
 import numpy as np 
 #import math
+import json
+import os
+
+# defaults of the run parameters; each simulation copies them into its own RunContext (RunContext.py)
+
+# overrides injected by a parameter sweep (ParameterSweep.py): JSON object in this environment variable
+OVERRIDE_ENV = "STRETCHABLE_PARAMS"
+_overrides = json.loads(os.environ.get(OVERRIDE_ENV) or "{}")
+_overridden = set()
+
+def _override(name, default):
+    if name in _overrides:
+        _overridden.add(name)
+        return _overrides[name]
+    return default
 
 #important! need square domain from wound creation logic
-grid_x = 252 #multiple of 12 bc of layers 
-grid_y = grid_x
+grid_x = _override("grid_x", 252) #multiple of 12 bc of layers 
+grid_y = _override("grid_y", grid_x)
 
 
 #woundMakerTime=100 #mcs when wound is created -- No longer needed with WoundMakerForce.py instead of Steppable_S.py
-wR = 40 # wound radius in pixels 
-target_volume, lambda_volume = 100, 1
-wound_mcs = None
-relaxation_mcs = 200 #after domain completely filled wait relaxation_mcs before opening wound 
-force=1200
+wR = _override("wR", 40) # wound radius in pixels 
+target_volume = _override("target_volume", 100)
+lambda_volume = _override("lambda_volume", 1)
+relaxation_mcs = _override("relaxation_mcs", 200) #after domain completely filled wait relaxation_mcs before opening wound 
+seeding = _override("seeding", "rings") # "rings": small seeds on concentric rings + filling phase, "voronoi": confluent tessellation at mcs 0
+tissue_cache = _override("tissue_cache", False) # reuse relaxed pre-wound tissue from Runs/TissueCache (independent of wR)
+force = _override("force", 1200)
+frontier_refresh_mcs = _override("frontier_refresh_mcs", 1) # recompute polarity of every cell every N mcs, in between only cells at the medium frontier
+                              # 1 = every cell every mcs (exact); > 1 is an opt-in approximation, medium opening away from the frontier is missed until the next refresh
 
-N=8 #repeated runs
-t=100001 #not inclusive: last mcs = t-1 ----- Maximum MCS 
+N = _override("N", 8) #repeated runs
+t = _override("t", 100001) #not inclusive: last mcs = t-1 ----- Maximum MCS 
 
-thick_f = 4
-thick_w = 2
+thick_f = _override("thick_f", 4)
+thick_w = _override("thick_w", 2)
 r_fc = (min(grid_x, grid_y) // 2) - (thick_w + thick_f)
 N_expected = int(np.pi * r_fc**2 / target_volume)
 
-domain_filled = False
-domain_filled_mcs = None
+runs_root = _override("runs_root", "Runs") # output tree Runs/Lx*_Ly*/R*/..., sharded sweeps give each shard its own root
+run_tag = _override("run_tag", "") # subfolder of Runs/Lx*_Ly*/R* for one parameter combination of a sweep (set by ParameterSweep.expand_sweep), "" = the R* folder itself
+checkpoint_interval = _override("checkpoint_interval", 5000) # mcs between checkpoints (0 = off), resume with StretchableBC_main.py <run_id> --resume
+
+output_buffer_bytes = _override("output_buffer_bytes", 1 << 20) # measurement rows are written to disk once this many bytes are buffered ...
+output_flush_seconds = _override("output_flush_seconds", 30.0) # ... or this many seconds passed since the last write
+status_interval = _override("status_interval", 10.0) # seconds between updates of logs/status_<run_id>.json (live progress, see RunStatus.py), 0 = off
+cell_output_format = _override("cell_output_format", "binary") # per-cell data: "binary" (cell_field_data_<id>.bin, see CellTrajectoryStore.py) or "text" (.txt)
+                              # "binary_compact": same .bin in the lossy compact layout (int16 COM, no lambda_volume), about 2x smaller
+                              # "bins": only radial strain bins per mcs (strain_bins_<id>.bin, see StrainBinning.py)
+
+# sampling cadence of Measurements / CellVolumeMeasurement, keyword arguments of SamplingCadence.py
+# intervals in mcs per phase; mcs 0, domain filled and wound made are always recorded. All 1 = every mcs.
+# e.g. dict(fill_every=50, relax_every=10, heal_every=10, dense_every=1, dense_after_wound=200, dense_below_area=5*target_volume)
+measurement_cadence = _override("measurement_cadence", dict(fill_every=1, relax_every=1, heal_every=1, dense_every=1, dense_after_wound=0, dense_below_area=None))
+cell_volume_cadence = _override("cell_volume_cadence", dict(fill_every=1, relax_every=1, heal_every=1, dense_every=1, dense_after_wound=0, dense_below_area=None))
 
+_unknown = set(_overrides) - _overridden
+if _unknown:
+    raise ValueError(f"{OVERRIDE_ENV} sets unknown parameters: {sorted(_unknown)}")
@@ -0,0 +1,83 @@
+import numpy as np
+
+## batched version of WoundMakerSteppable.get_local_polarity_vector:
+## all cells are handled in a few vectorized passes over one concatenated
+## boundary-pixel table, with segment reductions (bincount) by cell index
+
+
+def boundary_pixel_table(pixel_lists):
+    """
+    Concatenate per-cell pixel tracker lists into one table.
+    Returns xy (n_pixels, 2) int array of pixel coordinates and owner (n_pixels,)
+    holding the position in `pixel_lists` of the cell each pixel belongs to.
+    """
+    coords = []
+    counts = np.zeros(len(pixel_lists), dtype=np.int64)
+    for i, pixels in enumerate(pixel_lists):
+        cell_coords = [(p.pixel.x, p.pixel.y) for p in pixels]
+        counts[i] = len(cell_coords)
+        coords.extend(cell_coords)
+
+    xy = np.array(coords, dtype=np.int64).reshape(-1, 2)
+    owner = np.repeat(np.arange(len(pixel_lists)), counts)
+    return xy, owner
+
+
+def project_boundary(xy, owner, com, dim_x, dim_y):
+    """
+    Unit vectors from each cell's COM to its boundary pixels and the pixels one
+    step further out along them. Projected pixels outside the lattice are dropped.
+    Returns (proj, vec_norm, owner) restricted to projections inside the lattice.
+    """
+    vec = xy - com[owner]
+    norm = np.linalg.norm(vec, axis=1, keepdims=True)
+    vec_norm = np.divide(vec, norm, out=np.zeros_like(vec), where=norm > 1e-6)
+    proj = np.round(xy + vec_norm).astype(int)
+    inside = (
+        (proj[:, 0] >= 0) &
+        (proj[:, 0] < dim_x) &
+        (proj[:, 1] >= 0) &
+        (proj[:, 1] < dim_y)
+    )
+    return proj[inside], vec_norm[inside], owner[inside]
+
+
+def mean_medium_normals(vec_norm, owner, medium, n_cells):
+    """
+    Per-cell mean of the unit vectors whose projected pixel is medium;
+    [0, 0] for cells without any medium next to their boundary.
+    """
+    owner_m = owner[medium]
+    counts = np.bincount(owner_m, minlength=n_cells)
+    sums = np.column_stack((
+        np.bincount(owner_m, weights=vec_norm[medium, 0], minlength=n_cells),
+        np.bincount(owner_m, weights=vec_norm[medium, 1], minlength=n_cells),
+    ))
+    vectors = np.zeros((n_cells, 2))
+    has_medium = counts > 0
+    vectors[has_medium] = sums[has_medium] / counts[has_medium, None]
+    return vectors
+
+
+def polarity_vectors(labels, xy, owner, com):
+    """
+    Polarity vectors for all cells at once.
+    labels: (dim_x, dim_y) lattice label array, 0 = medium
+    xy, owner: boundary-pixel table from boundary_pixel_table
+    com: (n_cells, 2) centres of mass in the same cell order as owner
+    Returns (n_cells, 2), row i matches get_local_polarity_vector for cell i.
+    """
+    dim_x, dim_y = labels.shape
+    is_medium = lambda proj: labels[proj[:, 0], proj[:, 1]] == 0
+    return polarity_vectors_at(is_medium, xy, owner, com, dim_x, dim_y)
+
+
+def polarity_vectors_at(is_medium, xy, owner, com, dim_x, dim_y):
+    """
+    Same as polarity_vectors, but the medium test is a callable
+    is_medium(proj) -> bool array for (n, 2) projected pixels. Used when only a
+    few cells are recomputed and building a full label array is not worth it.
+    """
+    proj, vec_norm, owner = project_boundary(xy, owner, com, dim_x, dim_y)
+    medium = np.asarray(is_medium(proj), dtype=bool).reshape(-1)
+    return mean_medium_normals(vec_norm, owner, medium, len(com))
@@ -0,0 +1,142 @@
+import bisect
+import json
+import time
+from collections import defaultdict
+
+## opt-in timing of a run (StretchableBC_main.py --profile), written to
+## Runs/Lx*_Ly*/R*/profile_<run_id>.json
+## the profiler replaces step() and the hot methods of the registered steppables with
+## timed wrappers on the instance; without --profile nothing is wrapped, so a normal
+## run pays nothing. Per call it costs two perf_counter() reads and a bisect.
+
+# steppable step() times are counted in log-spaced bins, 4 per decade from 1 us to 10 s
+HISTOGRAM_EDGES = [10 ** (exponent / 4) for exponent in range(-24, 5)]
+
+# methods timed per steppable name, besides step()
+HOT_METHODS = {
+    "wound_maker": ("apply_polarity_forces", "get_local_polarity_vector", "is_domain_filled",
+                    "update_lambda_volume", "make_wound"),
+    "measurements": ("compute_wound_area",),
+}
+
+PHASES = ("fill", "relax", "heal")
+
+
+def profile_path(context):
+    return context.run_dir / f"profile_{context.run_id}.json"
+
+
+def run_phase(context):
+    """fill (domain not yet filled), relax (filled, no wound yet) or heal."""
+    if not context.domain_filled:
+        return "fill"
+    return "relax" if context.wound_mcs is None else "heal"
+
+
+class TimeStats:
+    """Call count, total and max seconds, and optionally a histogram over HISTOGRAM_EDGES."""
+
+    def __init__(self, histogram=False):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_EDGES) + 1) if histogram else None
+
+    def add(self, dt):
+        self.calls += 1
+        self.seconds += dt
+        if dt > self.max_seconds:
+            self.max_seconds = dt
+        if self.histogram is not None:
+            self.histogram[bisect.bisect_right(HISTOGRAM_EDGES, dt)] += 1
+
+    def report(self):
+        report = {
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "mean_seconds": self.seconds / self.calls if self.calls else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+        if self.histogram is not None:
+            report["histogram"] = self.histogram
+        return report
+
+
+class Profiler:
+    """
+    Times the steppables of one run (instrument) and the MCS of the stepping loop
+    (wrap_step). For each MCS the Potts engine time is the sim.step() time minus the
+    time spent in the steppables' step(). MCS are assigned to the phase the run is in
+    at the end of the MCS.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.steppables = {}
+        self.step_stats = {}
+        self.method_stats = defaultdict(dict)
+        self.steppable_seconds = 0.0  # running total of all steppable step() times
+        self.phases = {phase: {"mcs": 0, "seconds": 0.0, "engine_seconds": 0.0} for phase in PHASES}
+
+    def _timed(self, function, stats, count_steppable=False):
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                dt = time.perf_counter() - t0
+                stats.add(dt)
+                if count_steppable:
+                    self.steppable_seconds += dt
+        return timed
+
+    def instrument(self, name, steppable):
+        """Time step() and the HOT_METHODS of `steppable`; call before sim.run()."""
+        self.steppables[name] = steppable
+        self.step_stats[name] = TimeStats(histogram=True)
+        steppable.step = self._timed(steppable.step, self.step_stats[name], count_steppable=True)
+        for method in HOT_METHODS.get(name, ()):
+            stats = self.method_stats[name][method] = TimeStats()
+            setattr(steppable, method, self._timed(getattr(steppable, method), stats))
+
+    def wrap_step(self, step):
+        """sim.step with per-MCS and per-phase timing."""
+        def timed_step():
+            before = self.steppable_seconds
+            t0 = time.perf_counter()
+            step()
+            dt = time.perf_counter() - t0
+            phase = self.phases[run_phase(self.context)]
+            phase["mcs"] += 1
+            phase["seconds"] += dt
+            phase["engine_seconds"] += dt - (self.steppable_seconds - before)
+        return timed_step
+
+    def report(self):
+        writers = {}
+        for name, steppable in self.steppables.items():
+            writer = getattr(steppable, "writer", None)
+            if writer is not None:
+                writers[name] = writer.stats()
+            trajectory = getattr(steppable, "trajectory", None)
+            if trajectory is not None:
+                writers[f"{name}_index"] = trajectory.index_writer.stats()
+        return {
+            "run_id": self.context.run_id,
+            "histogram_edges_seconds": HISTOGRAM_EDGES,
+            "phases": {
+                phase: {**stats, "mcs_per_second": stats["mcs"] / stats["seconds"] if stats["seconds"] else 0.0}
+                for phase, stats in self.phases.items()
+            },
+            "steppables": {name: stats.report() for name, stats in self.step_stats.items()},
+            "methods": {name: {method: stats.report() for method, stats in methods.items()}
+                        for name, methods in self.method_stats.items()},
+            "writers": writers,
+        }
+
+    def write(self, path=None):
+        path = path or profile_path(self.context)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
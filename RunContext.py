@@ -0,0 +1,68 @@
+from pathlib import Path
+import numpy as np
+
+import Parameters
+
+## parameters and phase state of one simulation, created per run and passed to every
+## steppable of it; Parameters.py only supplies the defaults
+## the phase (domain filled, wound made) used to travel between the steppables through
+## Parameters module globals, so two simulations in one process (WarmWorker.py, threads)
+## would have seen each other's wound
+
+# per-run parameters, defaults from Parameters.py (N is the ensemble size, not a run parameter)
+PARAMETER_NAMES = (
+    "grid_x", "grid_y", "wR", "target_volume", "lambda_volume", "relaxation_mcs",
+    "seeding", "tissue_cache", "force", "frontier_refresh_mcs", "t", "thick_f", "thick_w",
+    "runs_root", "run_tag", "checkpoint_interval", "output_buffer_bytes", "output_flush_seconds",
+    "status_interval", "cell_output_format", "measurement_cadence", "cell_volume_cadence",
+)
+# phase state set by WoundMakerSteppable and read by the measurement steppables; saved in checkpoints
+PHASE_STATE = ("wound_mcs", "domain_filled", "domain_filled_mcs")
+
+
+class RunContext:
+    """
+    One simulation: run_id, its parameters (keyword overrides of the Parameters.py
+    defaults, unknown names are an error) and its phase state:
+    wound_mcs, domain_filled, domain_filled_mcs, and mcs_offset (mcs of the resumed
+    checkpoint or cached tissue + 1, CC3D itself restarts counting at 0).
+    All steppables of one simulation must share the same context.
+    """
+
+    def __init__(self, run_id=0, **parameters):
+        unknown = set(parameters) - set(PARAMETER_NAMES)
+        if unknown:
+            raise ValueError(f"unknown run parameters: {sorted(unknown)}")
+        if "grid_x" in parameters and "grid_y" not in parameters:
+            parameters["grid_y"] = parameters["grid_x"]  # grid_y follows grid_x as in Parameters.py
+        self.run_id = run_id
+        for name in PARAMETER_NAMES:
+            setattr(self, name, parameters.get(name, getattr(Parameters, name)))
+
+        self.wound_mcs = None
+        self.domain_filled = False
+        self.domain_filled_mcs = None
+        self.mcs_offset = 0
+
+    @property
+    def r_fc(self):
+        return (min(self.grid_x, self.grid_y) // 2) - (self.thick_w + self.thick_f)
+
+    @property
+    def N_expected(self):
+        return int(np.pi * self.r_fc**2 / self.target_volume)
+
+    @property
+    def run_dir(self):
+        """Runs/Lx*_Ly*/R*[/<run_tag>] folder of this run's output."""
+        return Path(self.runs_root) / f"Lx{self.grid_x}_Ly{self.grid_y}" / f"R{self.wR}" / self.run_tag
+
+    def parameters(self, names=PARAMETER_NAMES):
+        return {name: getattr(self, name) for name in names}
+
+    def phase_state(self):
+        return {name: getattr(self, name) for name in PHASE_STATE}
+
+    def restore_phase_state(self, state):
+        for name in PHASE_STATE:
+            setattr(self, name, state[name])
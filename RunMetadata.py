@@ -0,0 +1,108 @@
+import json
+import os
+import re
+from pathlib import Path
+
+## per-run metadata sidecar: Runs/Lx*_Ly*/R*[/<run_tag>]/run_metadata_<run_id>.json
+## phase events (domain_filled_mcs, wound_mcs, closure_mcs) and the run parameters live
+## here instead of in the headers of the output files, so the (large) data files are
+## only ever appended to. The sidecar is small and replaced atomically on each event.
+
+# Parameters recorded in the sidecar
+RUN_PARAMETERS = (
+    "grid_x", "grid_y", "wR", "thick_w", "thick_f",
+    "target_volume", "lambda_volume", "relaxation_mcs", "force",
+    "seeding", "frontier_refresh_mcs", "t", "run_tag",
+)
+PHASE_FIELDS = ("domain_filled_mcs", "wound_mcs", "closure_mcs")
+
+
+def metadata_path(run_dir, run_id):
+    return Path(run_dir) / f"run_metadata_{run_id}.json"
+
+
+def read_metadata(path):
+    """Sidecar contents as a dict, or None if there is no sidecar."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_metadata(path, metadata):
+    """Write the sidecar atomically (temp file + rename)."""
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.stem}.tmp.json")
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def start_metadata(path, run_id, parameters):
+    """New sidecar for a fresh run, phase events not yet reached."""
+    metadata = {"run_id": run_id, "parameters": parameters}
+    metadata.update({name: None for name in PHASE_FIELDS})
+    write_metadata(path, metadata)
+    return metadata
+
+
+def update_metadata(path, **fields):
+    metadata = read_metadata(path) or {name: None for name in PHASE_FIELDS}
+    metadata.update(fields)
+    write_metadata(path, metadata)
+    return metadata
+
+
+def sidecar_for(data_file):
+    """run_metadata_<run_id>.json next to an output file named *_<run_id>.<ext>."""
+    data_file = Path(data_file)
+    match = re.search(r"_(\d+)$", data_file.stem)
+    if match is None:
+        return None
+    return metadata_path(data_file.parent, match.group(1))
+
+
+def read_wound_mcs(data_file):
+    """
+    wound_mcs of the run that wrote `data_file`: from its sidecar, or from the
+    '# Wound created at mcs:' header line of files written before the sidecar existed.
+    None if the wound was never made.
+    """
+    sidecar = sidecar_for(data_file)
+    metadata = read_metadata(sidecar) if sidecar is not None else None
+    if metadata is not None:
+        return metadata.get("wound_mcs")
+
+    with open(data_file, "r") as f:
+        for line in f:
+            if not line.startswith("#"):
+                break
+            if line.startswith("# Wound created at mcs:"):
+                value = line.split(":", 1)[1].strip()
+                return int(value) if value.isdigit() else None
+    return None
+
+
+def read_closure_mcs(data_file):
+    """
+    closure_mcs of the run that wrote `data_file` as recorded by Measurements (the
+    mcs of the third consecutive zero wound area). Returns (found, closure_mcs):
+    found is False for runs without a sidecar, whose closure has to be read from
+    the data rows; closure_mcs is None if the wound never closed.
+    """
+    sidecar = sidecar_for(data_file)
+    metadata = read_metadata(sidecar) if sidecar is not None else None
+    if metadata is None:
+        return False, None
+    return True, metadata.get("closure_mcs")
+
+
+def dataset_dirs(wound_dir):
+    """
+    Folders holding the runs of one Runs/Lx*_Ly*/R* folder that are averaged
+    together: the folder itself and its run_tag subfolders, one per parameter
+    combination of a sweep. Folders without output files are listed too.
+    """
+    wound_dir = Path(wound_dir)
+    return [wound_dir] + sorted(path for path in wound_dir.iterdir() if path.is_dir() and path.name != "logs")
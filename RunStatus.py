@@ -0,0 +1,192 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+
+from Profiling import run_phase
+
+## live status of running simulations
+## every run rewrites logs/status_<run_id>.json in its Runs/Lx*_Ly*/R* folder at most every
+## status_interval seconds (StatusReporter, called from the stepping loop of
+## StretchableBC_main.py); EnsembleRunner / ParameterSweep read these files in a
+## StatusMonitor thread and print a table with an ETA per run and for the whole ensemble.
+## The files are replaced atomically and the monitor only reads them, so a slow or
+## stopped monitor never blocks a simulation; per MCS the reporter costs one clock read.
+
+STATUS_INTERVAL = 10.0  # seconds between status file updates of a run
+MONITOR_INTERVAL = 30.0  # seconds between status tables of EnsembleRunner / ParameterSweep
+
+
+def status_path(log_dir, run_id):
+    return Path(log_dir) / f"status_{run_id}.json"
+
+
+def rss_mb():
+    """Resident set size of this process in MB (peak RSS where /proc is missing)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def read_status(path):
+    """Status record of a run, None if it has not written one yet."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+class StatusReporter:
+    """
+    Publishes the status of one run to `path` (default: logs/status_<run_id>.json
+    in the run folder): state, phase, mcs, mcs/s since the last update, wound area
+    and RSS. update() is called after every MCS and writes only once `interval`
+    seconds have passed; interval 0 disables the reporter.
+    """
+
+    def __init__(self, context, path=None, interval=STATUS_INTERVAL):
+        self.context = context
+        self.path = Path(path) if path is not None else status_path(context.run_dir / "logs", context.run_id)
+        self.interval = interval
+        self.last_time = None
+        self.last_mcs = None
+
+    def write(self, state, mcs, wound_area=None):
+        now = time.perf_counter()
+        rate = None
+        if self.last_time is not None and now > self.last_time:
+            rate = (mcs - self.last_mcs) / (now - self.last_time)
+        status = {
+            "run_id": self.context.run_id,
+            "pid": os.getpid(),
+            "state": state,
+            "phase": run_phase(self.context),
+            "mcs": mcs,
+            "t": self.context.t,
+            "mcs_per_second": rate,
+            "wound_area": wound_area,
+            "rss_mb": rss_mb(),
+            "time": time.time(),
+        }
+        # written next to the file and renamed: readers never see a partial record
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(status, f)
+        os.replace(tmp, self.path)
+        self.last_time = now
+        self.last_mcs = mcs
+
+    def start(self, mcs):
+        if self.interval > 0:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.write("running", mcs)
+
+    def update(self, mcs, wound_area=None):
+        if self.interval > 0 and time.perf_counter() - self.last_time >= self.interval:
+            self.write("running", mcs, wound_area)
+
+    def finish(self, mcs, wound_area=None, state="finished"):
+        if self.interval > 0:
+            self.write(state, mcs, wound_area)
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class StatusMonitor:
+    """
+    Table of the runs of an ensemble, printed every `interval` seconds by a daemon
+    thread. `runs` maps a label to the status file of the run. The runner sets the
+    state of a run (pending, started, done, failed) with set_state; while a started
+    run has a status file its state, phase and progress come from that file.
+    ETA of a run: remaining mcs up to t at its current mcs/s, an upper bound since
+    most runs stop at wound closure. ETA of the ensemble: the remaining work of the
+    running and pending runs (pending at the mean estimated run length) over `workers`.
+    """
+
+    def __init__(self, runs, workers, interval=MONITOR_INTERVAL, stream=None):
+        self.runs = dict(runs)
+        self.workers = workers
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stdout
+        self.states = {label: "pending" for label in self.runs}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_state(self, label, state):
+        if state == "started":
+            # a status file left by an earlier attempt would show up as this run's progress
+            Path(self.runs[label]).unlink(missing_ok=True)
+        self.states[label] = state
+
+    def rows(self):
+        rows = []
+        for label, path in self.runs.items():
+            state = self.states[label]
+            status = read_status(path) if state == "started" else None
+            row = {"label": label, "state": state, "status": status, "eta": None, "run_seconds": None}
+            if status is not None:
+                row["state"] = status["state"]
+                rate = status["mcs_per_second"]
+                if rate:
+                    row["eta"] = max(status["t"] - status["mcs"], 0) / rate
+                    row["run_seconds"] = status["t"] / rate
+            rows.append(row)
+        return rows
+
+    def table(self):
+        rows = self.rows()
+        width = max([len("run")] + [len(str(label)) for label in self.runs])
+        lines = [f"{'run':>{width}} {'state':>9} {'phase':>6} {'mcs':>15} {'mcs/s':>8} {'wound':>7} {'rss [MB]':>9} "
+                 f"{'eta':>9}"]
+        for row in rows:
+            status = row["status"]
+            if status is None:
+                lines.append(f"{row['label']:>{width}} {row['state']:>9}")
+                continue
+            rate = status["mcs_per_second"]
+            wound_area = status["wound_area"]
+            lines.append(f"{row['label']:>{width}} {row['state']:>9} {status['phase']:>6} "
+                         f"{status['mcs']:>7}/{status['t']:<7} {rate or 0:>8.1f} "
+                         f"{'-' if wound_area is None else wound_area:>7} {status['rss_mb']:>9.0f} "
+                         f"{format_seconds(row['eta']):>9}")
+
+        # remaining work: running runs at their ETA, pending runs at the mean estimated run length
+        estimates = [row["run_seconds"] for row in rows if row["run_seconds"] is not None]
+        running = [row for row in rows if row["status"] is not None and row["state"] == "running"]
+        n_pending = sum(row["state"] in ("pending", "started") and row["status"] is None for row in rows)
+        n_done = sum(row["state"] in ("done", "failed", "finished", "closed") for row in rows)
+        eta = None
+        if all(row["eta"] is not None for row in running) and (estimates or not n_pending):
+            remaining = sum(row["eta"] for row in running)
+            if n_pending:
+                remaining += n_pending * sum(estimates) / len(estimates)
+            eta = remaining / max(min(self.workers, len(running) + n_pending), 1)
+        lines.append(f"{n_done}/{len(rows)} finished, {len(running)} running, {n_pending} pending, "
+                     f"ensemble eta {format_seconds(eta)} (upper bound: runs stop at wound closure)")
+        return "\n".join(lines)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            print(self.table(), file=self.stream, flush=True)
+
+    def start(self):
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="StatusMonitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,49 @@
+## sampling cadence of the measurement steppables
+## the steppables still run every mcs (frequency=1) and ask the policy whether to record;
+## the policy only looks at the mcs and the phase state of the RunContext, so it needs no checkpoint state
+
+
+class SamplingCadence:
+    """
+    Record every `fill_every` mcs while the domain fills, every `relax_every` mcs during
+    relaxation and every `heal_every` mcs after the wound is made. Within
+    `dense_after_wound` mcs of make_wound, and while the wound area is below
+    `dense_below_area` pixels (if given), every `dense_every` mcs instead.
+    mcs 0, domain_filled_mcs and wound_mcs are always recorded.
+    All intervals 1 (the default) = every mcs, the original behaviour.
+    """
+
+    def __init__(self, fill_every=1, relax_every=1, heal_every=1, dense_every=1,
+                 dense_after_wound=0, dense_below_area=None):
+        for name, every in (("fill_every", fill_every), ("relax_every", relax_every),
+                            ("heal_every", heal_every), ("dense_every", dense_every)):
+            if every < 1:
+                raise ValueError(f"{name} must be >= 1, got {every}")
+        self.fill_every = fill_every
+        self.relax_every = relax_every
+        self.heal_every = heal_every
+        self.dense_every = dense_every
+        self.dense_after_wound = dense_after_wound
+        self.dense_below_area = dense_below_area
+
+    @property
+    def needs_wound_area(self):
+        return self.dense_below_area is not None
+
+    @property
+    def every_mcs(self):
+        return max(self.fill_every, self.relax_every, self.heal_every, self.dense_every) == 1
+
+    def interval(self, mcs, domain_filled, wound_mcs, wound_area=None):
+        if wound_mcs is None:
+            return self.relax_every if domain_filled else self.fill_every
+        if mcs - wound_mcs <= self.dense_after_wound:
+            return self.dense_every
+        if self.dense_below_area is not None and wound_area is not None and wound_area < self.dense_below_area:
+            return self.dense_every
+        return self.heal_every
+
+    def should_sample(self, mcs, domain_filled, domain_filled_mcs, wound_mcs, wound_area=None):
+        if mcs == 0 or mcs == domain_filled_mcs or mcs == wound_mcs:
+            return True
+        return mcs % self.interval(mcs, domain_filled, wound_mcs, wound_area) == 0
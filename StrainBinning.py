@@ -0,0 +1,119 @@
+from pathlib import Path
+import numpy as np
+
+## in-simulation radial binning of the relative cell strain (volume - V_t)/V_t
+## the reduced form of cell_field_data_<run_id> that binning_plot_relative_strain.py needs
+##
+## strain_bins_<run_id>.bin
+##   file header (HEADER_DTYPE, 64 bytes): magic, n_bins, bin width, target volume, grid size, wound centre
+##   one fixed-size record per recorded mcs (record_dtype(n_bins)):
+##     mcs int32, per-bin count int32, sum float64, sum of squares float64
+## Fixed-size records make truncation on resume and memory-mapped reads trivial.
+
+MAGIC = b"STRBIN01"
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("n_bins", "<i4"), ("bin_width", "<i4"),
+    ("target_volume", "<f8"),
+    ("grid_x", "<i4"), ("grid_y", "<i4"),
+    ("center_x", "<f8"), ("center_y", "<f8"),
+    ("reserved", "<i8", (2,)),
+])
+
+
+def bin_layout(grid_x, target_volume):
+    """
+    Bin width and number of bins used by binning_plot_relative_strain.py:
+    BIN_WIDTH = int(sqrt(V_t)), bins cover radii 0 .. grid_x/2 (plus one).
+    """
+    bin_width = int(np.sqrt(target_volume))
+    n_bins = int(np.floor((grid_x / 2) / bin_width)) + 1
+    return bin_width, n_bins
+
+
+def record_dtype(n_bins):
+    return np.dtype([
+        ("mcs", "<i4"),
+        ("count", "<i4", (n_bins,)),
+        ("sum", "<f8", (n_bins,)),
+        ("sumsq", "<f8", (n_bins,)),
+    ])
+
+
+def bin_strain(radial_distance, volume, target_volume, bin_width, n_bins):
+    """
+    Per-bin count, sum and sum of squares of the relative strain of all cells.
+    Cells beyond the last bin are left out, as in the plotting script.
+    """
+    strain = (np.asarray(volume, dtype=float) - target_volume) / target_volume
+    bins = np.floor(np.asarray(radial_distance, dtype=float) / bin_width).astype(int)
+    inside = bins < n_bins
+    bins, strain = bins[inside], strain[inside]
+    count = np.bincount(bins, minlength=n_bins)
+    total = np.bincount(bins, weights=strain, minlength=n_bins)
+    total_sq = np.bincount(bins, weights=strain * strain, minlength=n_bins)
+    return count, total, total_sq
+
+
+def write_header(path, n_bins, bin_width, target_volume, grid_x, grid_y, center):
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["n_bins"], header["bin_width"] = n_bins, bin_width
+    header["target_volume"] = target_volume
+    header["grid_x"], header["grid_y"] = grid_x, grid_y
+    header["center_x"], header["center_y"] = center
+    with open(path, "wb") as f:
+        f.write(header.tobytes())
+
+
+def read_header(path):
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not a strain bin file")
+    return header[0]
+
+
+def encode_record(mcs, count, total, total_sq):
+    record = np.zeros(1, dtype=record_dtype(len(count)))
+    record["mcs"] = mcs
+    record["count"], record["sum"], record["sumsq"] = count, total, total_sq
+    return record.tobytes()
+
+
+def load_strain_bins(path):
+    """Header and all complete records of a strain bin file (memory-mapped, a trailing partial record is ignored)."""
+    header = read_header(path)
+    dtype = record_dtype(int(header["n_bins"]))
+    n_records = (Path(path).stat().st_size - HEADER_DTYPE.itemsize) // dtype.itemsize
+    if n_records <= 0:
+        return header, np.zeros(0, dtype=dtype)
+    records = np.memmap(path, dtype=dtype, mode="r", offset=HEADER_DTYPE.itemsize, shape=(n_records,))
+    return header, records
+
+
+def truncate_strain_bins(path, last_mcs):
+    """Cut a strain bin file after the record of last_mcs (drops a partial record too)."""
+    if not Path(path).exists():
+        return
+    header, records = load_strain_bins(path)
+    n_keep = int(np.count_nonzero(records["mcs"] <= last_mcs))
+    del records
+    with open(path, "r+b") as f:
+        f.truncate(HEADER_DTYPE.itemsize + n_keep * record_dtype(int(header["n_bins"])).itemsize)
+
+
+def mean_strain_matrix(records):
+    """(n_bins, n_mcs) mean relative strain, NaN for empty bins."""
+    count = records["count"].T.astype(float)
+    mean = np.full(count.shape, np.nan)
+    np.divide(records["sum"].T, count, out=mean, where=count > 0)
+    return mean
+
+
+def std_strain_matrix(records):
+    """(n_bins, n_mcs) population standard deviation of the relative strain, NaN for empty bins."""
+    count = records["count"].T.astype(float)
+    mean = mean_strain_matrix(records)
+    var = np.full(count.shape, np.nan)
+    np.divide(records["sumsq"].T, count, out=var, where=count > 0)
+    return np.sqrt(np.maximum(var - mean**2, 0.0))
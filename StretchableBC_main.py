@@ -1,5 +1,6 @@
 import cc3d
 import sys
+import argparse
 
 import warnings; warnings.filterwarnings("ignore", category=UserWarning, module="cc3d.core.logging")
 
@@ -15,18 +16,60 @@ from WoundMakerForce import WoundMakerSteppable # new wound making logic
 from Parameters import *
 from Measurements import Measurements
 from CellVolumeMeasurements import CellVolumeMeasurement
-from CircularDomainBuffer import CircularDomainInitialiser
+from CircularDomainBuffer import CircularDomainInitialiser, SEEDING_MODES
+from TissueCache import prewound_parameters, tissue_cache_key, load_tissue
+from Checkpoint import CheckpointSteppable, checkpoint_path, load_checkpoint, restore_run_state
+from LatticeSnapshot import SnapshotProvider
+from RunContext import RunContext
+from Profiling import Profiler
+from RunStatus import StatusReporter
 #from CellGrowthRampSteppable import CellGrowthRampSteppable
 #from GapFillerSteppable import GapFillerSteppable
 
 cc3d.CC3D_OpenCL_enabled = False
-run_id = int(sys.argv[1]) if len(sys.argv) > 1 else 0
 
-
-
-def specs_gen():
-
-    specs = [PottsCore(dim_x=grid_x, dim_y=grid_y, neighbor_order=1)]
+# contact energies used by specs_gen (also part of the relaxed-tissue cache key)
+CONTACT_NEIGHBOR_ORDER = 4
+CONTACT_ENERGIES = [
+    ("Medium", "Cell", 10),
+    ("Cell", "Cell", 10),
+    ("Medium", "Wall", 10),
+    ("Wall", "Wall", 10),
+    ("Medium", "Fluid", 10),
+    ("Fluid", "Fluid", 10),
+
+    ("Cell", "Wall", 100),
+    ("Cell", "Fluid", 10),
+    #("Wall", "Fluid", 10),
+    ("Wall", "Fluid", -10),
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stretchable BC wound healing simulation (one replicate)")
+    parser.add_argument("run_id", nargs="?", type=int, default=0, help="replicate id, also used as RNG seed")
+    parser.add_argument("--seeding", choices=SEEDING_MODES, default=seeding,
+                        help="initial tissue: rings (seeds + filling phase) or voronoi (confluent at mcs 0)")
+    parser.add_argument("--tissue-cache", action=argparse.BooleanOptionalAction, default=tissue_cache,
+                        help="reuse/store the relaxed pre-wound tissue in Runs/TissueCache")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from Runs/Lx*_Ly*/R*/checkpoint_<run_id>.npz if it exists")
+    parser.add_argument("--checkpoint-interval", type=int, default=checkpoint_interval,
+                        help="mcs between checkpoints, 0 disables checkpointing")
+    parser.add_argument("--headless", action="store_true",
+                        help="no visualization (compute nodes): skip sim.visualize() and report progress as text")
+    parser.add_argument("--progress-every", type=int, default=1000, metavar="MCS",
+                        help="mcs between progress reports (mcs, mcs/s) of a headless run")
+    parser.add_argument("--profile", action="store_true",
+                        help="time steppables, hot methods and phases, write Runs/Lx*_Ly*/R*/profile_<run_id>.json")
+    return parser.parse_args(argv)
+
+
+
+def specs_gen(context=None):
+    context = context if context is not None else RunContext()
+
+    specs = [PottsCore(dim_x=context.grid_x, dim_y=context.grid_y, neighbor_order=1)]
 
     cell_types = CellTypePlugin("Cell","Wall","Fluid")
     cell_types.frozen_set("Wall", True)
@@ -41,21 +84,9 @@ def specs_gen():
 
 
 
-    contact_specs = ContactPlugin(neighbor_order=4)
-    contact_specs.param_new(type_1="Medium", type_2="Cell", energy=10)
-    contact_specs.param_new(type_1="Cell", type_2="Cell", energy=10)
-    contact_specs.param_new(type_1="Medium", type_2="Wall", energy=10)
-    contact_specs.param_new(type_1="Wall", type_2="Wall", energy=10)
-    contact_specs.param_new(type_1="Medium", type_2="Fluid", energy=10)
-    contact_specs.param_new(type_1="Fluid", type_2="Fluid", energy=10)
-
-
-    contact_specs.param_new(type_1="Cell", type_2="Wall", energy=100)
-    contact_specs.param_new(type_1="Cell", type_2="Fluid", energy=10)
-    #contact_specs.param_new(type_1="Wall", type_2="Fluid", energy=10)
-    contact_specs.param_new(type_1="Wall", type_2="Fluid", energy=-10)
-
-
+    contact_specs = ContactPlugin(neighbor_order=CONTACT_NEIGHBOR_ORDER)
+    for type_1, type_2, energy in CONTACT_ENERGIES:
+        contact_specs.param_new(type_1=type_1, type_2=type_2, energy=energy)
     specs.append(contact_specs)
 
 
@@ -79,6 +110,7 @@ def specs_gen():
     
 
 import random
+import time
 import numpy as np 
 
 
@@ -86,44 +118,124 @@ import numpy as np
 
 #from pathlib import Path
 
-if __name__ == '__main__':
-
+def run_simulation(args, specs=None, parameters=None):
+    """
+    One replicate with the options `args` (parse_args). `specs` (specs_gen) can be
+    passed in by callers that run several replicates in one process (WarmWorker.py);
+    every replicate gets its own CC3DSimService, steppables and RunContext, so the
+    replicates share no state. `parameters` overrides the Parameters.py defaults for
+    this run only (RunContext keyword arguments).
+    Returns a summary dict: run_id, last mcs, wound_closed, seconds (whole run),
+    step_seconds and mcs_per_second (stepping loop only).
+    """
+
+    run_id = args.run_id
+    context = RunContext(run_id, **{**(parameters or {}), "seeding": args.seeding, "tissue_cache": args.tissue_cache,
+                                    "checkpoint_interval": args.checkpoint_interval})
+    t0 = time.perf_counter()
 
-# create file path
-    #output_file = run_dir / f"simulation_results_{run_id}.txt"
-
-    #output_file = f"simulation_results_{run_id}.txt"
-
-    
-    # clear old results
-    #with open(output_file, "w") as f:
-    #    f.write("CC3D Simulation Results\n")
-    
     random.seed(run_id)
     np.random.seed(run_id)
 
-    specs=specs_gen()
+    # resume: lattice, steppable state, phase state and RNG state from the last checkpoint
+    checkpoint_meta, lattice_state = None, None
+    if args.resume:
+        path = checkpoint_path(context)
+        if path.exists():
+            checkpoint_meta, lattice_state = load_checkpoint(path)
+            if checkpoint_meta["completed"]:
+                print(f"Run {run_id} already completed at mcs {checkpoint_meta['mcs']}, nothing to resume")
+                return {"run_id": run_id, "mcs": checkpoint_meta["mcs"], "wound_closed": None, "seconds": 0.0,
+                        "step_seconds": 0.0, "mcs_per_second": 0.0}
+            restore_run_state(context, checkpoint_meta)
+            print(f"Resuming run {run_id} from checkpoint at mcs {checkpoint_meta['mcs']}")
+        else:
+            print(f"No checkpoint {path}, starting run {run_id} from scratch")
+
+    # relaxed tissue cache: same pre-wound parameters and seed -> skip seeding, filling and relaxation
+    tissue_key, tissue_params, tissue = None, None, None
+    if args.tissue_cache and checkpoint_meta is None:
+        tissue_params = prewound_parameters(context, run_id, args.seeding, CONTACT_ENERGIES, CONTACT_NEIGHBOR_ORDER)
+        tissue_key = tissue_cache_key(tissue_params)
+        tissue = load_tissue(tissue_key, context.runs_root)
+        print(f"Tissue cache {'hit' if tissue is not None else 'miss'} for key {tissue_key}")
+        if tissue is not None:
+            # continue the mcs count of the run that saved the tissue: the wound is made at the
+            # same mcs as without the cache, and the healing phase gets the same share of t
+            context.mcs_offset = int(tissue["mcs"]) + 1
+
+    if specs is None:
+        specs=specs_gen(context)
     sim = CC3DSimService()
     sim.register_specs(specs)
-    sim.register_steppable(steppable=CircularDomainInitialiser(frequency=1))
+    initial_lattice = lattice_state if lattice_state is not None else tissue
+    sim.register_steppable(steppable=CircularDomainInitialiser(frequency=1, context=context, lattice_state=initial_lattice))
     #sim.register_steppable(CellGrowthRampSteppable(frequency=1))
     #sim.register_steppable(GapFillerSteppable(frequency=1, run_at_mcs=50))
-    sim.register_steppable(steppable=WoundMakerSteppable(frequency=1,run_id=run_id))
-    measurements_steppable = Measurements(frequency=1,run_id=run_id)
+    # one cell table / label array per MCS for all steppables
+    snapshots = SnapshotProvider.for_context(context)
+    wound_maker = WoundMakerSteppable(frequency=1, context=context,
+                                      tissue_key=tissue_key if tissue is None else None,
+                                      tissue_params=tissue_params, relaxed_tissue=tissue, snapshots=snapshots)
+    sim.register_steppable(steppable=wound_maker)
+    measurements_steppable = Measurements(frequency=1, context=context, snapshots=snapshots)
     sim.register_steppable(steppable=measurements_steppable)
-    sim.register_steppable(steppable=CellVolumeMeasurement(frequency=1, run_id=run_id))
+    cell_volume_steppable = CellVolumeMeasurement(frequency=1, context=context, snapshots=snapshots)
+    sim.register_steppable(steppable=cell_volume_steppable)
+
+    checkpointed = {
+        "wound_maker": wound_maker,
+        "measurements": measurements_steppable,
+        "cell_volume": cell_volume_steppable,
+    }
+    if checkpoint_meta is not None:
+        for name, steppable in checkpointed.items():
+            steppable.restore_checkpoint(checkpoint_meta["steppables"][name], checkpoint_meta["mcs"])
+    # registered last: checkpoints hold the state at the end of an mcs
+    checkpoint_steppable = CheckpointSteppable(frequency=1, context=context, interval=args.checkpoint_interval,
+                                               steppables=checkpointed, snapshots=snapshots)
+    sim.register_steppable(steppable=checkpoint_steppable)
+
+    # opt-in timing, see Profiling.py; without --profile nothing is wrapped
+    step = sim.step
+    profiler = None
+    if args.profile:
+        profiler = Profiler(context)
+        for name, steppable in {**checkpointed, "checkpoint": checkpoint_steppable}.items():
+            profiler.instrument(name, steppable)
+        step = profiler.wrap_step(sim.step)
     sim.run()
     sim.init()
     sim.start()
 
-    sim.visualize()
+    if not args.headless:
+        sim.visualize()
 
 
     #input('Press any key to continue...')
 
-
-    while sim.current_step < t and not measurements_steppable.wound_closed_flag:
-        sim.step()
+    # one sim.step() per mcs with the closure check after each, so a run never steps past
+    # its closure; CC3D has no multi-mcs step, so --headless only skips sim.visualize()
+    # and prints the progress every progress_every mcs
+    first_mcs = sim.current_step + context.mcs_offset
+    # live progress for EnsembleRunner / ParameterSweep, see RunStatus.py
+    status = StatusReporter(context, interval=context.status_interval)
+    status.start(first_mcs - 1)
+    t_steps = time.perf_counter()
+    while sim.current_step + context.mcs_offset < context.t and not measurements_steppable.wound_closed_flag:
+        step()
+        status.update(sim.current_step + context.mcs_offset - 1, measurements_steppable.wound_area)
+        done = sim.current_step + context.mcs_offset - first_mcs
+        if args.headless and done % max(args.progress_every, 1) == 0:
+            print(f"[run {run_id}] mcs {sim.current_step + context.mcs_offset - 1}, "
+                  f"{done / max(time.perf_counter() - t_steps, 1e-9):.1f} mcs/s", flush=True)
+    step_seconds = time.perf_counter() - t_steps
+    last_mcs = sim.current_step + context.mcs_offset - 1
+    sim.finish()
+    status.finish(last_mcs, measurements_steppable.wound_area,
+                  "closed" if measurements_steppable.wound_closed_flag else "finished")
+    if profiler is not None:
+        print(f"Profile written to {profiler.write()}")
     #with open(output_file, "a") as f:
     #    f.write(sim.profiler_report + "\n")
 
@@ -133,7 +245,23 @@ if __name__ == '__main__':
     #del sim
     #import gc
     #gc.collect()
-  
+
+    steps = last_mcs + 1 - first_mcs
+    return {"run_id": run_id, "mcs": last_mcs, "wound_closed": measurements_steppable.wound_closed_flag,
+            "seconds": time.perf_counter() - t0, "step_seconds": step_seconds,
+            "mcs_per_second": steps / max(step_seconds, 1e-9)}
+
+
+if __name__ == '__main__':
+
+
+# create file path
+    #output_file = run_dir / f"simulation_results_{run_id}.txt"
+
+    #output_file = f"simulation_results_{run_id}.txt"
 
     
-    
+    # clear old results
+    #with open(output_file, "w") as f:
+    #    f.write("CC3D Simulation Results\n")
+    run_simulation(parse_args())
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import numpy as np
+
+import Parameters
+
+## cache of relaxed (pre-wound) lattice states
+## everything before make_wound is independent of wR, so replicates that only differ
+## in the wound radius can start from the same relaxed tissue
+## <runs root>/TissueCache/<key>.npz, key = hash of all parameters that affect the pre-wound phase
+## (force too for rings seeding, whose filling phase is force driven)
+
+CACHE_NAME = "TissueCache"
+
+
+def prewound_parameters(context, seed, seeding, contact_energies, contact_neighbor_order):
+    """
+    Everything that affects seeding, filling and relaxation; wR never does.
+    force and frontier_refresh_mcs only act before the wound through the polarity
+    forces of the rings filling phase, so they are part of the key for rings seeding
+    only: voronoi tissues are confluent at mcs 0 and are shared across force and wR.
+    """
+    names = ("grid_x", "grid_y", "thick_w", "thick_f", "target_volume", "lambda_volume", "relaxation_mcs")
+    if seeding != "voronoi":
+        names += ("force", "frontier_refresh_mcs")
+    return {
+        **context.parameters(names),
+        "seeding": seeding,
+        "contact_energies": [list(entry) for entry in contact_energies],
+        "contact_neighbor_order": contact_neighbor_order,
+        "seed": seed,
+    }
+
+
+def tissue_cache_key(params):
+    blob = json.dumps(params, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def tissue_cache_path(key, runs_root=None):
+    """Cache file of `key` below runs_root (default Parameters.runs_root)."""
+    return Path(runs_root or Parameters.runs_root) / CACHE_NAME / f"{key}.npz"
+
+
+def load_tissue(key, runs_root=None):
+    """
+    Cached lattice state for `key` as a dict of arrays, or None on a cache miss.
+    Besides the lattice arrays it holds mcs (the mcs whose end state was saved) and
+    domain_filled_mcs of the run that saved it. Files without mcs are a miss.
+    """
+    path = tissue_cache_path(key, runs_root)
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        if "mcs" not in data.files:
+            return None
+        return {name: data[name] for name in data.files}
+
+
+def save_tissue(key, state, params, mcs, domain_filled_mcs, runs_root=None):
+    """Write a relaxed lattice state; written to a temp file first so concurrent runs never see half a file."""
+    path = tissue_cache_path(key, runs_root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez_compressed(
+        tmp_path,
+        mcs=np.int64(mcs),
+        domain_filled_mcs=np.int64(-1 if domain_filled_mcs is None else domain_filled_mcs),
+        params=np.array(json.dumps(params, sort_keys=True)),
+        **state,
+    )
+    os.replace(tmp_path, path)
+    return path
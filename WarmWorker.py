@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from pathlib import Path
+
+import Parameters
+from EnsembleRunner import RunResult
+from StretchableBC_main import parse_args, run_simulation, specs_gen
+
+## long-lived worker: imports cc3d and builds specs_gen() once, then runs replicate
+## after replicate in this process, each with a fresh CC3DSimService and steppables
+## (run_simulation gives every run its own RunContext, so no phase state carries over)
+## python WarmWorker.py <run_id> [<run_id> ...] [--log-dir DIR] [--results FILE] [-- <StretchableBC_main.py args>]
+
+
+class WarmWorker:
+    """
+    Runs replicates in-process. The output of each run, including what cc3d prints
+    from C++, goes to log_dir/run_<run_id>.log (same files as EnsembleRunner).
+    An exception ends only its own run; it is logged and reported as returncode 1.
+    """
+
+    def __init__(self, log_dir, extra_args=()):
+        self.log_dir = Path(log_dir)
+        self.extra_args = list(extra_args)
+        self.specs = specs_gen()
+
+    def log_path(self, run_id):
+        return self.log_dir / f"run_{run_id}.log"
+
+    def run(self, run_id, resume=False):
+        """Run one replicate, returns a RunResult."""
+        argv = [str(run_id), *self.extra_args]
+        if resume:
+            argv.append("--resume")
+        log_path = self.log_path(run_id)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+
+        t0 = time.perf_counter()
+        returncode = 0
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved = os.dup(1), os.dup(2)
+        with open(log_path, "a" if resume else "w") as log:
+            log.write(f"### warm run: {' '.join(argv)}\n")
+            log.flush()
+            # redirect the file descriptors, not only sys.stdout, so the C++ output lands in the log too
+            os.dup2(log.fileno(), 1)
+            os.dup2(log.fileno(), 2)
+            try:
+                run_simulation(parse_args(argv), specs=self.specs)
+            except (Exception, SystemExit):
+                traceback.print_exc()
+                returncode = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.dup2(saved[0], 1)
+                os.dup2(saved[1], 2)
+                os.close(saved[0])
+                os.close(saved[1])
+            log.write(f"### warm run exited with {returncode}\n")
+        return RunResult(run_id, returncode, 1, time.perf_counter() - t0, str(log_path))
+
+    def run_all(self, run_ids, results_path=None):
+        """
+        Run `run_ids` one after the other. With results_path, every RunResult is appended
+        to it as a JSON line right after its run, so a caller still sees the finished runs
+        if this process dies in the middle of the list.
+        """
+        results = []
+        for run_id in run_ids:
+            result = self.run(run_id)
+            results.append(result)
+            print(f"[WarmWorker] run {run_id}: {'ok' if result.returncode == 0 else 'FAILED'}, "
+                  f"{result.seconds:.1f} s", flush=True)
+            if results_path is not None:
+                with open(results_path, "a") as f:
+                    f.write(json.dumps(result._asdict()) + "\n")
+        return results
+
+
+def parse_worker_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run several replicates in one process.")
+    parser.add_argument("run_ids", type=int, nargs="+")
+    parser.add_argument("--log-dir", default=None,
+                        help="per-run logs (default: Runs/Lx*_Ly*/R*/logs)")
+    parser.add_argument("--results", default=None, help="JSONL file the RunResults are appended to")
+    # everything after -- goes to StretchableBC_main.py
+    argv = sys.argv[1:] if argv is None else list(argv)
+    simulation_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, simulation_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+    args.simulation_args = simulation_args
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_worker_args()
+    log_dir = args.log_dir or (Path(Parameters.runs_root) / f"Lx{Parameters.grid_x}_Ly{Parameters.grid_y}"
+                               / f"R{Parameters.wR}" / "logs")
+    worker = WarmWorker(log_dir, args.simulation_args)
+    results = worker.run_all(args.run_ids, args.results)
+    sys.exit(1 if any(result.returncode != 0 for result in results) else 0)
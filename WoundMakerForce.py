@@ -5,19 +5,41 @@ import numpy as np
 #import math
 
 #from Parameters import *
-import Parameters
+from RunContext import RunContext
+from DomainGeometry import domain_geometry
+from LatticeSnapshot import DomainFillTracker, SnapshotProvider, VolumeCache, capture_lattice_state
+from TissueCache import save_tissue
+from PolarityEngine import boundary_pixel_table, polarity_vectors, polarity_vectors_at
 
 
 
 class WoundMakerSteppable(SteppableBasePy):
-    def __init__(self, frequency=1,run_id=0):
+    def __init__(self, frequency=1, context=None, tissue_key=None, tissue_params=None, relaxed_tissue=None, snapshots=None):
         super().__init__(frequency=frequency)
-        self.run_id = run_id
+        # parameters and phase state of this simulation, shared with the measurement steppables
+        self.context = context if context is not None else RunContext()
+        # per-MCS cell table / label array shared with the other steppables (LatticeSnapshot.SnapshotProvider)
+        self.snapshots = snapshots if snapshots is not None else SnapshotProvider.for_context(self.context)
+        # tissue_key/tissue_params: save the relaxed tissue to the TissueCache under this key
+        # relaxed_tissue: state loaded from the cache, the wound is made on the first step
+        self.tissue_key = tissue_key
+        self.tissue_params = tissue_params
+        self.relaxed_tissue = relaxed_tissue
+        self.resumed = False  # set by restore_checkpoint
+        self.run_id = self.context.run_id
         self.wound_made = False   
         self.domain_filled = False
         self.wound_mcs = None
         self.wait_time_counter = 0
         self.fluid_fluid=True
+        self.fill_tracker = DomainFillTracker(self.context.grid_x, self.context.grid_y)
+        self.frontier = set()  # ids of CELLs with medium next to their boundary
+        self.frontier_mcs = None  # mcs of the last full polarity recompute
+        self.volume_cache = VolumeCache()  # last volume per cell id for lambdaVolume updates
+        self.lambda_updates = 0  # lambdaVolume writes in the last MCS
+        self.lambda_skipped = 0  # cells skipped in the last MCS because their volume did not change
+        self.lambda_updates_total = 0
+        self.lambda_skipped_total = 0
 
 
 
@@ -26,7 +48,20 @@ class WoundMakerSteppable(SteppableBasePy):
         # safe: start() is called once per simulation
         print(f"Initializing wound for run {self.run_id}")
 
+        if self.relaxed_tissue is not None:
+            # relaxation already done in the cached run: count down the last relaxation mcs only
+            # (run_simulation set mcs_offset so the mcs count continues from the cached mcs)
+            self.domain_filled = True
+            self.wait_time_counter = self.tissue_save_counter()
+            self.context.domain_filled = True
+            domain_filled_mcs = int(self.relaxed_tissue["domain_filled_mcs"])
+            self.context.domain_filled_mcs = domain_filled_mcs if domain_filled_mcs >= 0 else None
+
         
+        if self.resumed:
+            # fluid attributes come back with the checkpointed lattice (frozen or already unfrozen)
+            return
+
         #freezing fluid for relaxation phase 
         for cell in self.cell_list_by_type(self.FLUID):
             cell.lambdaVolume = 1e9
@@ -39,34 +74,39 @@ class WoundMakerSteppable(SteppableBasePy):
             
 
     def step(self,mcs):
+        mcs = mcs + self.context.mcs_offset  # resumed runs continue the mcs count of the checkpoint
         #print(f"2: Measurements step called at MCS={mcs}")  # Debug line
 
-        #if not Parameters.wound_mcs:
+        #if not self.context.wound_mcs:
             #n_cells = len(self.cell_list_by_type(self.CELL))
-            #print(f"MCS {mcs}: Cells = {n_cells}, Expected ≈ {Parameters.N_expected}")
-        #if Parameters.domain_filled and not self.wound_made:
-            #print(f"Relaxation Phase for {Parameters.relaxation_mcs} mcs")
+            #print(f"MCS {mcs}: Cells = {n_cells}, Expected ≈ {self.context.N_expected}")
+        #if self.context.domain_filled and not self.wound_made:
+            #print(f"Relaxation Phase for {self.context.relaxation_mcs} mcs")
             #if self.wait_time_counter >= 1:
-                #print(f"Domain fully occupied at MCS {Parameters.domain_filled_mcs}")
+                #print(f"Domain fully occupied at MCS {self.context.domain_filled_mcs}")
         #if self.wound_made:
             #print("Healing Phase")
 
-        min_vol = 1.0
-
-        for cell in self.cell_list_by_type(self.CELL):
-            cell.lambdaVolume = Parameters.lambda_volume*(cell.volume + Parameters.target_volume)/(max(cell.volume,min_vol))
+        table = self.snapshots.table(self, mcs)
+        self.update_lambda_volume(table)
 
         if not self.wound_made:
             if not self.domain_filled:
-                self.domain_filled = self.is_domain_filled(tolerance=0) #tolerance=0 domain must be fully occupied
+                self.domain_filled = self.is_domain_filled(tolerance=0, table=table) #tolerance=0 domain must be fully occupied
 
             if self.domain_filled:
-                Parameters.domain_filled=True
+                self.context.domain_filled=True
                 if self.wait_time_counter == 0: 
-                    Parameters.domain_filled_mcs=mcs
+                    self.context.domain_filled_mcs=mcs
                     #print(f"Domain fully occupied at MCS {mcs}")
                 self.wait_time_counter += 1
-                if self.wait_time_counter >= Parameters.relaxation_mcs: #wait another relaxation_mcs before opening wound
+                if self.tissue_key is not None and self.wait_time_counter == self.tissue_save_counter():
+                    # state at the end of this step is what a cached run starts from
+                    state = capture_lattice_state(self, self.dim.x, self.dim.y, labels=self.snapshots.labels(self, mcs))
+                    path = save_tissue(self.tissue_key, state, self.tissue_params, mcs, self.context.domain_filled_mcs,
+                                       runs_root=self.context.runs_root)
+                    print(f"Relaxed tissue saved to {path}")
+                if self.wait_time_counter >= self.context.relaxation_mcs: #wait another relaxation_mcs before opening wound
                     self.make_wound(mcs)
                     if self.fluid_fluid:
                         for cell in self.cell_list_by_type(self.FLUID):
@@ -76,56 +116,143 @@ class WoundMakerSteppable(SteppableBasePy):
 
         if self.wound_made and mcs > self.wound_mcs:
         #if mcs > woundMakerTime: 
-            for cell in self.cell_list_by_type(self.CELL):
-                if cell is None:
-                    print("cell_list_by_type returned None!")
-                vector = self.get_local_polarity_vector(cell)
-                force = Parameters.force
-                # Make sure ExternalPotential plugin is loaded
-                cell.lambdaVecX = -force*vector[0]  # force component pointing along X axis - towards positive X's
-                cell.lambdaVecY = -force*vector[1]  # force component pointing along Y axis - towards negative Y's
-                # cell.lambdaVecZ = 0.0  force component pointing along Z axis
+            self.apply_polarity_forces(mcs)
         
         #helping to fill the domain faster
         if not self.domain_filled:
         #if mcs > woundMakerTime: 
-            for cell in self.cell_list_by_type(self.CELL):
-                if cell is None:
-                    print("cell_list_by_type returned None!")
-                vector = self.get_local_polarity_vector(cell)
-                # Make sure ExternalPotential plugin is loaded
-                cell.lambdaVecX = -Parameters.force*vector[0]  # force component pointing along X axis - towards positive X's
-                cell.lambdaVecY = -Parameters.force*vector[1]  # force component pointing along Y axis - towards negative Y's
+            self.apply_polarity_forces(mcs)
+
+    def tissue_save_counter(self):
+        """
+        wait_time_counter of the mcs whose end state goes to the TissueCache: the last
+        relaxation mcs before the wound. The counter is at least 1 once the domain is
+        filled, so with relaxation_mcs <= 1 the filled mcs itself is saved (and a cached
+        run relaxes one mcs more than the run that saved it).
+        """
+        return max(self.context.relaxation_mcs - 1, 1)
+
+    def apply_polarity_forces(self, mcs):
+        # batched get_local_polarity_vector (see PolarityEngine.py)
+        # all CELLs every frontier_refresh_mcs (default 1: every mcs, the exact forces); with
+        # a longer interval only frontier cells (touching medium) and their neighbours are
+        # recomputed in between, an approximation that misses medium opening elsewhere
+        full_refresh = self.frontier_mcs is None or mcs - self.frontier_mcs >= self.context.frontier_refresh_mcs
+
+        table = self.snapshots.table(self, mcs)
+        if full_refresh:
+            rows = table.of_type(self.CELL)
+            cells = [table.cells[i] for i in rows.tolist()]
+            self.frontier_mcs = mcs
+        else:
+            cells = self.frontier_candidates()
+            rows = table.rows([cell.id for cell in cells])
+
+        new_frontier = set()
+        if cells:
+            xy, owner = boundary_pixel_table([self.get_cell_boundary_pixel_list(cell) for cell in cells])
+            com = np.column_stack((table.x[rows], table.y[rows]))
+            if full_refresh:
+                labels = self.snapshots.labels(self, mcs)
+                vectors = polarity_vectors(labels, xy, owner, com)
+            else:
+                vectors = polarity_vectors_at(self.is_medium, xy, owner, com, self.dim.x, self.dim.y)
+
+            # Make sure ExternalPotential plugin is loaded
+            # cells leaving the frontier are candidates one last time and get zeroed here
+            force = self.context.force
+            for cell, (vx, vy) in zip(cells, vectors.tolist()):
+                cell.lambdaVecX = -force*vx  # force component pointing along X axis - towards positive X's
+                cell.lambdaVecY = -force*vy  # force component pointing along Y axis - towards negative Y's
                 # cell.lambdaVecZ = 0.0  force component pointing along Z axis
+                if vx or vy:
+                    new_frontier.add(cell.id)
+
+        self.frontier = new_frontier
+
+    def frontier_candidates(self):
+        # frontier cells plus their CELL neighbours: medium next to any other cell
+        # must have moved there through one of them during the last MCS
+        candidate_ids = set(self.frontier)
+        for cell_id in self.frontier:
+            cell = self.fetch_cell_by_id(cell_id)
+            if cell is None:
+                continue
+            for neighbor, common_surface_area in self.get_cell_neighbor_data_list(cell):
+                if neighbor is not None and neighbor.type == self.CELL:
+                    candidate_ids.add(neighbor.id)
+
+        cells = (self.fetch_cell_by_id(cell_id) for cell_id in sorted(candidate_ids))
+        return [cell for cell in cells if cell is not None and cell.type == self.CELL]
+
+    def is_medium(self, pixels):
+        return np.array([self.cellField[x, y, 0] is None for x, y in pixels.tolist()], dtype=bool)
     
-    def is_domain_filled(self, tolerance=0):
-        medium_pixels = 0
-        for x in range(self.dim.x):
-            for y in range(self.dim.y):
-                if self.cellField[x, y, 0] is None:
-                    medium_pixels += 1
-                    if medium_pixels > tolerance:
-                        return False
-        return True
+    def update_lambda_volume(self, table):
+        # lambdaVolume only depends on the volume: rewrite it only for cells whose volume changed
+        min_vol = 1.0
+
+        rows = table.of_type(self.CELL)
+        volumes = table.volume[rows]
+        changed = rows[self.volume_cache.changed(table.id[rows], volumes)]
+
+        lambdas = self.context.lambda_volume*(table.volume[changed] + self.context.target_volume)/np.maximum(table.volume[changed], min_vol)
+        for i, lam in zip(changed.tolist(), lambdas.tolist()):
+            table.cells[i].lambdaVolume = lam
+        table.lambda_volume[changed] = lambdas  # keep the shared table current for the later steppables
+
+        self.lambda_updates = len(changed)
+        self.lambda_skipped = len(rows) - len(changed)
+        self.lambda_updates_total += self.lambda_updates
+        self.lambda_skipped_total += self.lambda_skipped
+
+    def checkpoint_state(self):
+        return {
+            "wound_made": self.wound_made,
+            "wound_mcs": self.wound_mcs,
+            "domain_filled": self.domain_filled,
+            "wait_time_counter": self.wait_time_counter,
+        }
+
+    def restore_checkpoint(self, state, mcs):
+        # the frontier is rebuilt from scratch (frontier_mcs is None) on the next polarity update
+        self.wound_made = state["wound_made"]
+        self.wound_mcs = state["wound_mcs"]
+        self.domain_filled = state["domain_filled"]
+        self.wait_time_counter = state["wait_time_counter"]
+        self.fill_tracker.filled = self.domain_filled
+        self.resumed = True
+
+    def finish(self):
+        n = self.lambda_updates_total + self.lambda_skipped_total
+        if n:
+            print(f"[WoundMakerSteppable] lambdaVolume updates: {self.lambda_updates_total}, "
+                  f"skipped (volume unchanged): {self.lambda_skipped_total} ({100*self.lambda_skipped_total/n:.1f}%)")
+
+    def is_domain_filled(self, tolerance=0, table=None):
+        if table is not None:
+            return self.fill_tracker.update_volumes(table.volume, tolerance=tolerance)
+        return self.fill_tracker.update(self.cell_list, tolerance=tolerance)
             
 
     def make_wound(self, mcs):
-        cx = self.dim.x // 2
-        cy = self.dim.y // 2
-        rw = Parameters.wR ** 2
-
-        counter = 0
-        for x in range(self.dim.x):
-            for y in range(self.dim.y):
-                if (x - cx)**2 + (y - cy)**2 <= rw:
-                    cell = self.cellField[x, y, 0]
-                    if cell and cell.type == self.CELL:
-                        self.deleteCell(cell)
-                        counter += 1
+        geometry = domain_geometry(self.dim.x, self.dim.y, self.context.thick_w, self.context.thick_f, self.context.wR)
+
+        # collect the CELLs touching the wound disk first, then delete each once
+        wounded = {}
+        for x, y in geometry.wound_xy.tolist():
+            cell = self.cellField[x, y, 0]
+            if cell and cell.type == self.CELL:
+                wounded[cell.id] = cell
+        for cell in wounded.values():
+            self.deleteCell(cell)
+        counter = len(wounded)
+        self.snapshots.invalidate()  # cells were deleted
 
         self.wound_made = True
         self.wound_mcs = mcs
-        Parameters.wound_mcs = mcs
+        self.frontier_mcs = None  # new wound edge: recompute every CELL on the next polarity update
+        self.context.wound_mcs = mcs
         print("Circular wound created at MCS =", mcs)
         print("Wound size in cells =", counter)
 
@@ -2,6 +2,7 @@ from pathlib import Path
 import numpy as np
 from Parameters import *
 import re 
+from RunMetadata import dataset_dirs, read_wound_mcs, read_closure_mcs as read_recorded_closure_mcs
 
 # -----------------------------
 # Configuration
@@ -10,7 +11,7 @@ RUNS_DIR = Path("Runs")
 AVERAGES_DIR = RUNS_DIR / "Averages"
 AVERAGES_DIR.mkdir(exist_ok=True)
 
-STABLE_ZERO_REQUIRED = 1  # easy to change later if we want stability logic
+STABLE_ZERO_REQUIRED = 1  # row scan of runs without a metadata sidecar only
 
 
 # -----------------------------
@@ -18,11 +19,16 @@ STABLE_ZERO_REQUIRED = 1  # easy to change later if we want stability logic
 # -----------------------------
 def read_closure_mcs(result_file):
     """
-    Reads a simulation_results_*.txt file and returns
-    the MCS at which woundArea first becomes zero.
+    Returns the MCS at which the wound of a simulation_results_*.txt run closed:
+    closure_mcs from its run_metadata_<run_id>.json, recorded by Measurements after
+    3 consecutive zero MCS. With a sparse heal_every the sampled rows cannot show
+    that, so the rows are only scanned (first zero row) for runs without a sidecar.
     Returns None if closure never occurs.
-    MCS is relative to wound_made_mcs 
     """
+    found, closure_mcs = read_recorded_closure_mcs(result_file)
+    if found:
+        return closure_mcs
+
     with open(result_file, "r") as f:
         lines = f.readlines()
 
@@ -32,10 +38,9 @@ def read_closure_mcs(result_file):
     # Remove column header
     data_lines = data_lines[1:]
 
-    for line in lines:
-            if line.startswith("# Wound created at mcs:"):
-                wound_made_mcs = int(line.split(":", 1)[1].strip())
-                break
+    wound_made_mcs = read_wound_mcs(result_file)
+    if wound_made_mcs is None:
+        return None
 
     zero_counter = 0
     for line in data_lines:
@@ -46,7 +51,6 @@ def read_closure_mcs(result_file):
         if wound_area == 0 and mcs >= wound_made_mcs:
             zero_counter += 1
             if zero_counter >= STABLE_ZERO_REQUIRED:
-                mcs 
                 return mcs
         else:
             zero_counter = 0
@@ -67,14 +71,10 @@ def process_domain(domain_dir):
         if result_file.name == "simulation_results_averages.txt": #should not be there but just in case
             continue
     
-        with open(result_file, "r") as f:
-            lines = f.readlines()
-        for line in lines:
-            if line.startswith("# Wound created at mcs:"):
-                wound_made_mcs = int(line.split(":", 1)[1].strip())
-                if wound_made_mcs is not None:
-                    wound_maker_mcs.append(wound_made_mcs)
-                break
+        # from run_metadata_<run_id>.json (header line for older runs)
+        wound_made_mcs = read_wound_mcs(result_file)
+        if wound_made_mcs is not None:
+            wound_maker_mcs.append(wound_made_mcs)
 
         mcs = read_closure_mcs(result_file)
         if mcs is not None:
@@ -111,10 +111,10 @@ def process_domain(domain_dir):
 
 def save_stats(domain_dir, domain_name, wound_dir, stats):
     """
-    Saves statistics to Runs/Averages/<domain>_avg.txt
+    Saves statistics to Runs/Averages/<domain>/<R*>[/<run_tag>]/<domain>_avg.txt
     """
-    domain_out = AVERAGES_DIR / domain_dir.name / wound_dir.name
-    domain_out.mkdir(exist_ok=True)
+    domain_out = AVERAGES_DIR / wound_dir.relative_to(RUNS_DIR)
+    domain_out.mkdir(parents=True, exist_ok=True)
 
     out_file = domain_out /f"{domain_name}_avg.txt"
 
@@ -184,14 +184,15 @@ if __name__ == "__main__":
             print("  No wound size folders found, skipping domain")
             continue
         
-        for wound_dir in sorted(wound_dirs):
+        # a sweep over force, lambda_volume, ... has one run_tag subfolder per combination
+        for wound_dir in [d for r_dir in sorted(wound_dirs) for d in dataset_dirs(r_dir)]:
+            domain_name = "_".join((domain_dir.name,) + wound_dir.relative_to(domain_dir).parts)
             # check if wound folder contains (the correct) data files
             has_raw_data = any(wound_dir.glob("simulation_results_*.txt"))
             if not has_raw_data:
-                print(f"Skipping {domain_dir.name}_{wound_dir.name} (no simulation_results_*.txt files)")
+                print(f"Skipping {domain_name} (no simulation_results_*.txt files)")
                 continue
 
-            domain_name = f"{domain_dir.name}_{wound_dir.name}"
             print(f"Processing domain: {domain_name}")
 
             stats = process_domain(wound_dir)
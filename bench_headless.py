@@ -0,0 +1,33 @@
+import sys
+import tempfile
+import numpy as np
+
+from StretchableBC_main import parse_args, run_simulation
+
+## benchmark: stepping rate (mcs/s) of StretchableBC_main.py with and without visualization
+## both modes run the same replicate (same seed) for the same number of mcs into a scratch
+## output root; the stepping loop is the same, only sim.visualize() is skipped by --headless
+## needs cc3d; python bench_headless.py [run_id]
+
+# -----------------------------
+# Configuration
+# -----------------------------
+MCS = 2000
+REPEATS = 2
+MODES = {"visual": [], "headless": ["--headless"]}
+
+
+if __name__ == "__main__":
+    run_id = sys.argv[1] if len(sys.argv) > 1 else "0"
+    rates = {mode: [] for mode in MODES}
+    for _ in range(REPEATS):
+        for mode, flags in MODES.items():
+            with tempfile.TemporaryDirectory() as runs_root:
+                args = parse_args([run_id, "--checkpoint-interval", "0", *flags])
+                summary = run_simulation(args, parameters={"t": MCS, "runs_root": runs_root})
+            rates[mode].append(summary["mcs_per_second"])
+
+    print(f"{'mode':>9} {'mean [mcs/s]':>14} {'best [mcs/s]':>14}")
+    for mode, values in rates.items():
+        print(f"{mode:>9} {np.mean(values):>14.1f} {np.max(values):>14.1f}")
+    print(f"headless speedup: {np.mean(rates['headless']) / np.mean(rates['visual']):.2f}x")
@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import Parameters
+from EnsembleRunner import SIMULATION_SCRIPT, child_env
+
+## domain-size scaling benchmark of the full simulation (needs cc3d)
+## every (grid_x, wR) of the ladder runs StretchableBC_main.py headless with --profile for a
+## fixed MCS budget and seed, in its own process (peak RSS per run from os.wait4), into a
+## scratch runs_root; one JSON line per run is appended to the results file, so results of
+## different commits/machines can be compared: --compare BASELINE flags MCS/s regressions
+## python bench_scaling.py [--mcs 1000] [--results bench_scaling.jsonl] [--compare BASELINE.jsonl]
+
+# -----------------------------
+# Configuration
+# -----------------------------
+LADDER = [(252, 20), (252, 40), (504, 40), (504, 80), (1008, 80), (1008, 160)]  # (grid_x, wR)
+SEED = 0
+REGRESSION_TOLERANCE = 0.10  # slower than the baseline by more than this fraction is reported
+
+
+def run_point(grid, wR, mcs, seeding, runs_root):
+    """One fixed-length run; returns its result record."""
+    overrides = {"grid_x": grid, "wR": wR, "t": mcs, "runs_root": runs_root}
+    command = [sys.executable, SIMULATION_SCRIPT, str(SEED), "--headless", "--profile", "--seeding", seeding,
+               "--checkpoint-interval", "0", "--no-tissue-cache"]
+    t0 = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                               env=child_env({Parameters.OVERRIDE_ENV: json.dumps(overrides)}))
+    stderr = process.stderr.read()
+    process.stderr.close()
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.perf_counter() - t0
+    if process.returncode != 0:
+        raise RuntimeError(f"grid {grid}, wR {wR} failed:\n{stderr.decode(errors='replace')}")
+
+    run_dir = Path(runs_root) / f"Lx{grid}_Ly{grid}" / f"R{wR}"
+    with open(run_dir / f"profile_{SEED}.json", "r") as f:
+        profile = json.load(f)
+    phases = profile["phases"]
+    n_mcs = sum(phase["mcs"] for phase in phases.values())
+    step_seconds = sum(phase["seconds"] for phase in phases.values())
+    output_bytes = sum(path.stat().st_size for path in run_dir.iterdir()
+                       if path.is_file() and not path.name.startswith(("profile_", "run_metadata_")))
+    steppable_seconds = {name: stats["seconds"] for name, stats in profile["steppables"].items()}
+    steppable_seconds["engine"] = sum(phase["engine_seconds"] for phase in phases.values())
+    return {
+        "grid_x": grid,
+        "wR": wR,
+        "seeding": seeding,
+        "mcs": n_mcs,
+        "wallclock_seconds": seconds,
+        "mcs_per_second": n_mcs / step_seconds if step_seconds else 0.0,
+        "phase_mcs_per_second": {name: phase["mcs_per_second"] for name, phase in phases.items()},
+        "peak_rss_mb": rusage.ru_maxrss / 1024,  # ru_maxrss is in KiB on Linux
+        "output_bytes_per_mcs": output_bytes / n_mcs if n_mcs else 0.0,
+        "time_split": {name: value / step_seconds if step_seconds else 0.0
+                       for name, value in steppable_seconds.items()},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_results(path):
+    """Latest record per (grid_x, wR, seeding, budget_mcs) of a results file."""
+    latest = {}
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                latest[(record["grid_x"], record["wR"], record["seeding"], record["budget_mcs"])] = record
+    return latest
+
+
+def compare(records, baseline_path):
+    """Print MCS/s against the baseline; returns the number of regressions."""
+    baseline = read_results(baseline_path)
+    regressions = 0
+    print(f"\n{'grid':>6} {'wR':>5} {'mcs/s':>9} {'baseline':>9} {'ratio':>7}")
+    for record in records:
+        key = (record["grid_x"], record["wR"], record["seeding"], record["budget_mcs"])
+        if key not in baseline:
+            print(f"{record['grid_x']:>6} {record['wR']:>5} {record['mcs_per_second']:>9.1f} {'-':>9}")
+            continue
+        ratio = record["mcs_per_second"] / baseline[key]["mcs_per_second"]
+        slower = ratio < 1 - REGRESSION_TOLERANCE
+        regressions += slower
+        print(f"{record['grid_x']:>6} {record['wR']:>5} {record['mcs_per_second']:>9.1f} "
+              f"{baseline[key]['mcs_per_second']:>9.1f} {ratio:>6.2f}x{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cost of the simulation against domain size and wound radius.")
+    parser.add_argument("--mcs", type=int, default=1000, help="MCS budget per run (default: 1000)")
+    parser.add_argument("--seeding", default="voronoi", help="seeding mode of every run (default: voronoi)")
+    parser.add_argument("--results", default="bench_scaling.jsonl", help="JSONL file the records are appended to")
+    parser.add_argument("--compare", default=None, metavar="BASELINE", help="results file to compare MCS/s against")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run_info = {"commit": git_commit(), "host": platform.node(), "python": platform.python_version(),
+                "time": time.time(), "budget_mcs": args.mcs}
+
+    records = []
+    print(f"{'grid':>6} {'wR':>5} {'mcs/s':>9} {'rss [MB]':>9} {'bytes/mcs':>10} {'engine':>7} {'wound':>7} "
+          f"{'meas':>6} {'cells':>6}")
+    for grid, wR in LADDER:
+        with tempfile.TemporaryDirectory() as runs_root:
+            record = {**run_info, **run_point(grid, wR, args.mcs, args.seeding, runs_root)}
+        records.append(record)
+        with open(args.results, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        split = record["time_split"]
+        print(f"{grid:>6} {wR:>5} {record['mcs_per_second']:>9.1f} {record['peak_rss_mb']:>9.0f} "
+              f"{record['output_bytes_per_mcs']:>10.0f} {split['engine']:>7.0%} {split.get('wound_maker', 0):>7.0%} "
+              f"{split.get('measurements', 0):>6.0%} {split.get('cell_volume', 0):>6.0%}")
+
+    if args.compare:
+        sys.exit(1 if compare(records, args.compare) else 0)
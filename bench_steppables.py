@@ -0,0 +1,108 @@
+import json
+import sys
+import tempfile
+import time
+import numpy as np
+
+from FakeLattice import FakeLattice, FakeSimulation, LatticeDriver, domain_lattice, install_fake_cc3d
+
+install_fake_cc3d()  # before the steppable modules import cc3d
+
+from Checkpoint import CheckpointSteppable
+from CellVolumeMeasurements import CellVolumeMeasurement
+from CircularDomainBuffer import CircularDomainInitialiser
+from DomainGeometry import domain_geometry
+from LatticeSnapshot import SnapshotProvider
+from Measurements import Measurements
+from Profiling import Profiler
+from RunContext import RunContext
+from WoundMakerForce import WoundMakerSteppable
+
+## benchmark of the steppable hot paths on synthetic tissues (FakeLattice.py), no cc3d needed
+## per domain size: CircularDomainInitialiser seeding, then WoundMakerSteppable, Measurements,
+## CellVolumeMeasurement and CheckpointSteppable over a relaxation and healing schedule driven by
+## the seeded LatticeDriver; times come from Profiling.Profiler
+## the workload is deterministic (fixed seeds), only the timings vary between runs
+## python bench_steppables.py [results.json]
+
+# -----------------------------
+# Configuration
+# -----------------------------
+GRID_SIZES = [252, 504, 1008, 2016]
+RELAXATION_MCS = 5
+HEAL_MCS = 20
+CHECKPOINT_INTERVAL = 10
+SEED = 1
+
+
+def wound_radius(grid):
+    return grid * 40 // 252  # Parameters.py default wR=40 on 252, scaled with the domain
+
+
+def time_seeding(grid, seeding, runs_root):
+    context = RunContext(0, grid_x=grid, wR=wound_radius(grid), seeding=seeding, runs_root=runs_root)
+    np.random.seed(SEED)
+    lattice = FakeLattice(grid, grid)
+    initialiser = CircularDomainInitialiser(context=context)
+    FakeSimulation(lattice).register_steppable(initialiser)
+    t0 = time.perf_counter()
+    initialiser.start()
+    return time.perf_counter() - t0, len(lattice.cells)
+
+
+def time_steppables(grid, runs_root):
+    context = RunContext(0, grid_x=grid, wR=wound_radius(grid), relaxation_mcs=RELAXATION_MCS,
+                         runs_root=runs_root, cell_output_format="binary")
+    np.random.seed(SEED)
+    geometry = domain_geometry(grid, grid, context.thick_w, context.thick_f, context.wR)
+    lattice, _, _ = domain_lattice(geometry, context.target_volume)
+    sim = FakeSimulation(lattice, LatticeDriver(lattice, seed=SEED))
+
+    snapshots = SnapshotProvider.for_context(context)
+    steppables = {
+        "wound_maker": WoundMakerSteppable(context=context, snapshots=snapshots),
+        "measurements": Measurements(context=context, snapshots=snapshots),
+        "cell_volume": CellVolumeMeasurement(context=context, snapshots=snapshots),
+    }
+    steppables["checkpoint"] = CheckpointSteppable(context=context, interval=CHECKPOINT_INTERVAL,
+                                                   steppables=dict(steppables), snapshots=snapshots)
+    profiler = Profiler(context)
+    for name, steppable in steppables.items():
+        sim.register_steppable(steppable)
+        profiler.instrument(name, steppable)
+    step = profiler.wrap_step(sim.step)
+
+    sim.start()
+    while sim.current_step < RELAXATION_MCS + HEAL_MCS and not sim.stopped:
+        step()
+    sim.finish()
+    return profiler.report(), len(lattice.cells)
+
+
+if __name__ == "__main__":
+    results = []
+    with tempfile.TemporaryDirectory() as runs_root:
+        print(f"{'grid':>6} {'cells':>7} {'seed voronoi [s]':>17} {'seed rings [s]':>15}   "
+              f"mean step [ms]: {'wound_maker':>11} {'measurements':>12} {'cell_volume':>11} {'checkpoint':>10}")
+        for grid in GRID_SIZES:
+            voronoi_seconds, _ = time_seeding(grid, "voronoi", runs_root)
+            rings_seconds, _ = time_seeding(grid, "rings", runs_root)
+            report, n_cells = time_steppables(grid, runs_root)
+            results.append({"grid": grid, "cells": n_cells, "seeding_seconds": {"voronoi": voronoi_seconds,
+                                                                                "rings": rings_seconds},
+                            "profile": report})
+            means = [1e3 * report["steppables"][name]["mean_seconds"]
+                     for name in ("wound_maker", "measurements", "cell_volume", "checkpoint")]
+            print(f"{grid:>6} {n_cells:>7} {voronoi_seconds:>17.2f} {rings_seconds:>15.2f}   "
+                  f"{'':>15} {means[0]:>11.2f} {means[1]:>12.2f} {means[2]:>11.2f} {means[3]:>10.2f}")
+
+    print("\nhot methods, mean [ms] per call:")
+    for result in results:
+        methods = result["profile"]["methods"]
+        print(f"{result['grid']:>6} " + "  ".join(
+            f"{method} {1e3 * stats['mean_seconds']:.2f}"
+            for name in methods for method, stats in methods[name].items() if stats["calls"]))
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,61 @@
+import subprocess
+import sys
+import time
+import numpy as np
+
+## benchmark: startup cost per replicate of a fresh interpreter (run_multiple.py without --warm)
+## vs. a warm process that has cc3d imported and specs_gen() built (WarmWorker.py)
+## both paths create a CC3DSimService, register the specs, run/init/start and finish it with 0 mcs,
+## so the difference is what every cold replicate pays before its first step
+## needs cc3d; python bench_warm_worker.py
+
+# -----------------------------
+# Configuration
+# -----------------------------
+REPLICATES = 5
+
+STARTUP = """
+from cc3d.CompuCellSetup.CC3DCaller import CC3DSimService
+
+def start_service(specs):
+    sim = CC3DSimService()
+    sim.register_specs(specs)
+    sim.run()
+    sim.init()
+    sim.start()
+    sim.finish()
+"""
+
+COLD = STARTUP + """
+from StretchableBC_main import specs_gen
+start_service(specs_gen())
+"""
+
+
+def cold_startup():
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", COLD], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+
+def warm_startups():
+    namespace = {}
+    exec(STARTUP, namespace)
+    from StretchableBC_main import specs_gen
+    specs = specs_gen()
+    times = []
+    for _ in range(REPLICATES):
+        t0 = time.perf_counter()
+        namespace["start_service"](specs)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+if __name__ == "__main__":
+    cold = [cold_startup() for _ in range(REPLICATES)]
+    warm = warm_startups()
+    print(f"{'mode':>6} {'mean [s]':>10} {'min [s]':>10} {'max [s]':>10}")
+    for mode, times in (("cold", cold), ("warm", warm)):
+        print(f"{mode:>6} {np.mean(times):>10.3f} {np.min(times):>10.3f} {np.max(times):>10.3f}")
+    print(f"startup saved per replicate: {np.mean(cold) - np.mean(warm):.3f} s "
+          f"({np.mean(cold) / np.mean(warm):.1f}x)")
@@ -0,0 +1,82 @@
+import time
+import numpy as np
+
+from LatticeSnapshot import cell_volumes, medium_pixel_count
+
+## microbenchmark: wound area from a per-pixel field scan (old Measurements.compute_wound_area)
+## vs. one reduction over the cell volumes (new path)
+## runs on a synthetic lattice, no cc3d needed
+
+# -----------------------------
+# Configuration
+# -----------------------------
+GRID_SIZES = [252, 504, 1008]
+TARGET_VOLUME = 100
+WOUND_RADIUS = 40
+REPEATS = 3
+
+
+class SyntheticCell:
+    def __init__(self, cell_id, volume):
+        self.id = cell_id
+        self.volume = volume
+
+
+class SyntheticField:
+    """Indexable like cellField[x, y, 0]; returns the owning cell or None for medium."""
+    def __init__(self, labels, cells):
+        self.labels = labels
+        self.cells = cells
+
+    def __getitem__(self, index):
+        x, y, _ = index
+        return self.cells.get(int(self.labels[x, y]))
+
+
+def build_lattice(grid):
+    """Square-block tissue with a circular medium wound in the centre."""
+    side = int(np.sqrt(TARGET_VOLUME))
+    xs, ys = np.meshgrid(np.arange(grid), np.arange(grid), indexing="ij")
+    labels = (xs // side) * (grid // side + 1) + (ys // side) + 1
+    c = grid // 2
+    labels[(xs - c)**2 + (ys - c)**2 <= WOUND_RADIUS**2] = 0
+
+    ids, counts = np.unique(labels[labels > 0], return_counts=True)
+    cells = {int(i): SyntheticCell(int(i), int(n)) for i, n in zip(ids, counts)}
+    return labels, cells
+
+
+def wound_area_scan(field, grid):
+    woundArea = 0
+    for x in range(grid):
+        for y in range(grid):
+            if field[x, y, 0] is None:
+                woundArea += 1
+    return woundArea
+
+
+def wound_area_reduction(cells, grid):
+    return medium_pixel_count(cell_volumes(cells), grid, grid)
+
+
+def best_time(func, *args):
+    best = np.inf
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+if __name__ == "__main__":
+    print(f"{'grid':>6} {'scan [ms]':>12} {'reduction [ms]':>16} {'speedup':>9}")
+    for grid in GRID_SIZES:
+        labels, cells = build_lattice(grid)
+        field = SyntheticField(labels, cells)
+
+        t_scan, area_scan = best_time(wound_area_scan, field, grid)
+        t_red, area_red = best_time(wound_area_reduction, list(cells.values()), grid)
+        if area_scan != area_red:
+            raise RuntimeError(f"wound area mismatch at grid {grid}: {area_scan} != {area_red}")
+
+        print(f"{grid:>6} {t_scan*1e3:>12.2f} {t_red*1e3:>16.3f} {t_scan/t_red:>8.0f}x")
@@ -4,6 +4,10 @@ import matplotlib.pyplot as plt
 from matplotlib.colors import TwoSlopeNorm
 import re
 
+from CellTrajectoryStore import load_cell_trajectories
+from RunMetadata import dataset_dirs
+from StrainBinning import load_strain_bins, mean_strain_matrix
+
 # ============================================================
 # User-defined parameters
 # ============================================================
@@ -37,6 +41,148 @@ def parse_domain_and_radius(path):
     return Lx, Ly, R
 
 
+def read_text_columns(data_file, label):
+    """
+    mcs, volume and radial distance columns of a text cell_field_data_*.txt file,
+    None if the file has invalid or no data rows.
+    """
+    rows = []
+    invalid_file = False
+
+    with data_file.open("r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            parts = line.split(",")
+
+            # We require at least columns 0, 4, 5
+            if len(parts) <= 5:
+                invalid_file = True
+                break
+
+            try:
+                mcs = int(parts[0])
+                volume = float(parts[4])
+                radial_distance = float(parts[5])
+            except ValueError:
+                invalid_file = True
+                break
+
+            rows.append((mcs, volume, radial_distance))
+
+    if invalid_file:
+        print(
+            f"File {label} skipped because invalid values in columns."
+        )
+        return None
+
+    if len(rows) == 0:
+        print(
+            f"File {label} skipped because no valid data rows."
+        )
+        return None
+
+    rows = np.array(rows)
+    return rows[:, 0].astype(int), rows[:, 1], rows[:, 2]
+
+
+def read_binary_columns(data_file, label):
+    """Same columns from a binary cell_field_data_*.bin file (see CellTrajectoryStore.py)."""
+    columns = load_cell_trajectories(data_file)
+    if len(columns["mcs"]) == 0:
+        print(f"File {label} skipped because no valid data rows.")
+        return None
+    return columns["mcs"].astype(int), columns["volume"].astype(float), columns["radial_distance"].astype(float)
+
+
+def plot_strain(data_file, strain_matrix, unique_mcs, bin_edges, Lx, Ly, R, domain_name, wound_name):
+    """Save the (bins x mcs) strain matrix and its heat map to Averages/<domain>/<wound>/Bins."""
+
+    # ------------------------------------------------------------
+    # Create output directories
+    # ------------------------------------------------------------
+
+    out_dir = AVG_ROOT / domain_name / wound_name / "Bins"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------
+    # Save averages file (2D matrix)
+    # ------------------------------------------------------------
+
+    out_file = out_dir / f"{data_file.stem}_bin_average.txt"
+
+    with out_file.open("w") as f:
+        f.write("# Bin-averaged relative strain\n")
+        f.write("# Rows: radial distance bins (increasing radius)\n")
+        f.write("# Columns: mcs values (in increasing order)\n")
+        f.write(f"# Bin width = {BIN_WIDTH} pixels\n")
+        f.write(f"# Domain Size: Lx={Lx}, Ly={Ly}\n")
+        f.write(f"# Wound Radius: R={R}\n")
+        #f.write(f"# woundMakerTime = {woundMakerTime}\n")
+        f.write(f"# V_t = {V_t}\n")
+        f.write("#\n")
+        f.write("# mcs values:\n")
+        f.write("# " + " ".join(map(str, unique_mcs)) + "\n")
+
+        np.savetxt(f, strain_matrix, fmt="%.6e")
+
+    #print(f"    Saved → {out_file.name}")
+
+    # ------------------------------------------------------------
+    # Plotting
+    # ------------------------------------------------------------
+
+    cmap = plt.cm.seismic.copy()
+    cmap.set_bad(color="black")
+
+    vmax = np.nanmax(np.abs(strain_matrix))
+    norm = TwoSlopeNorm(vmin=-vmax, vcenter=0.0, vmax=vmax)
+
+    fig, ax = plt.subplots(figsize=(8, 6))
+
+    im = ax.imshow(
+        strain_matrix,
+        origin="lower",
+        aspect="auto",
+        cmap=cmap,
+        norm=norm,
+        extent=[
+            unique_mcs.min(),
+            unique_mcs.max(),
+            bin_edges[0],
+            bin_edges[-1],
+        ],
+    )
+
+    #ax.axvline(
+    #    woundMakerTime,
+    #    color="red",
+    #    linestyle="-",
+    #    linewidth=1.5,
+    #    label="woundMakerTime",
+    #)
+
+    ax.set_xlabel("MCS")
+    ax.set_ylabel("Radial distance (pixels)")
+    ax.set_title(
+        f"Relative strain\n{domain_name}, {wound_name}, {data_file.name}"
+    )
+
+    cbar = fig.colorbar(im, ax=ax)
+    cbar.set_label("Mean relative strain")
+
+    #ax.legend(loc="upper right")
+
+    plot_file = out_dir / f"{data_file.stem}_bin_average.png"
+
+    fig.tight_layout()
+    fig.savefig(plot_file, dpi=300)
+    #print(f"    Saved plot → {plot_file.name}")
+    plt.close(fig)
+
+
 # ============================================================
 # Main processing loop
 # ============================================================
@@ -45,9 +191,10 @@ for lxly_dir in RUNS_ROOT.glob("Lx*_Ly*"):
 
     print(f"\nProcessing domain {lxly_dir.name}")
 
-    for r_dir in lxly_dir.glob("R*"):
+    # a sweep over force, lambda_volume, ... has one run_tag subfolder per combination
+    for r_dir in [d for wound_dir in lxly_dir.glob("R*") if wound_dir.is_dir() for d in dataset_dirs(wound_dir)]:
 
-        print(f"  Processing {r_dir.name}")
+        print(f"  Processing {r_dir.relative_to(lxly_dir).as_posix()}")
 
         parsed = parse_domain_and_radius(r_dir)
         if parsed is None:
@@ -55,60 +202,42 @@ for lxly_dir in RUNS_ROOT.glob("Lx*_Ly*"):
 
         Lx, Ly, R = parsed
         domain_name = lxly_dir.name
-        wound_name = r_dir.name
-
-        for data_file in r_dir.glob("cell_field_data_*.txt"):
+        wound_name = r_dir.relative_to(lxly_dir).as_posix()  # e.g. R40 or R40/F600
+
+        data_files = (sorted(r_dir.glob("strain_bins_*.bin")) +
+                      sorted(r_dir.glob("cell_field_data_*.bin")) + sorted(r_dir.glob("cell_field_data_*.txt")))
+        for data_file in data_files:
+
+            if data_file.name.startswith("strain_bins_"):
+                # ------------------------------------------------------------
+                # Already binned during the simulation
+                # ------------------------------------------------------------
+
+                header, records = load_strain_bins(data_file)
+                if len(records) == 0:
+                    print(f"File {domain_name}_{wound_name} skipped because no valid data rows.")
+                    continue
+                if header["bin_width"] != BIN_WIDTH or header["target_volume"] != V_t:
+                    print(f"File {data_file.name} skipped because it was binned with a different BIN_WIDTH or V_t.")
+                    continue
+
+                unique_mcs = np.asarray(records["mcs"])
+                strain_matrix = mean_strain_matrix(records)
+                n_bins = int(header["n_bins"])
+                bin_edges = np.arange(0, (n_bins + 1) * BIN_WIDTH, BIN_WIDTH)
+                plot_strain(data_file, strain_matrix, unique_mcs, bin_edges, Lx, Ly, R, domain_name, wound_name)
+                continue
 
             # ------------------------------------------------------------
-            # Read file and validate rows
+            # Read file (binary or text)
             # ------------------------------------------------------------
 
-            rows = []
-            invalid_file = False
-
-            with data_file.open("r") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith("#"):
-                        continue
-
-                    parts = line.split(",")
-
-                    # We require at least columns 0, 4, 5
-                    if len(parts) <= 5:
-                        invalid_file = True
-                        break
-
-                    try:
-                        mcs = int(parts[0])
-                        volume = float(parts[4])
-                        radial_distance = float(parts[5])
-                    except ValueError:
-                        invalid_file = True
-                        break
-
-                    rows.append((mcs, volume, radial_distance))
-
-            if invalid_file:
-                print(
-                    f"File {domain_name}_{wound_name} skipped because invalid values in columns."
-                )
+            read_columns = read_binary_columns if data_file.suffix == ".bin" else read_text_columns
+            columns = read_columns(data_file, f"{domain_name}_{wound_name}")
+            if columns is None:
                 continue
 
-            if len(rows) == 0:
-                print(
-                    f"File {domain_name}_{wound_name} skipped because no valid data rows."
-                )
-                continue
-
-            # ------------------------------------------------------------
-            # Convert to arrays
-            # ------------------------------------------------------------
-
-            rows = np.array(rows) 
-            mcs_values = rows[:, 0].astype(int)
-            volumes = rows[:, 1]
-            radial_distances = rows[:, 2]
+            mcs_values, volumes, radial_distances = columns
 
             relative_strain = (volumes - V_t) / V_t
 
@@ -139,86 +268,6 @@ for lxly_dir in RUNS_ROOT.glob("Lx*_Ly*"):
                     if np.any(mask_bin):
                         strain_matrix[b, j] = np.mean(strain_mcs[mask_bin])
 
-            # ------------------------------------------------------------
-            # Create output directories
-            # ------------------------------------------------------------
-
-            out_dir = AVG_ROOT / domain_name / wound_name / "Bins"
-            out_dir.mkdir(parents=True, exist_ok=True)
-
-            # ------------------------------------------------------------
-            # Save averages file (2D matrix)
-            # ------------------------------------------------------------
-
-            out_file = out_dir / data_file.name.replace(".txt", "_bin_average.txt")
-
-            with out_file.open("w") as f:
-                f.write("# Bin-averaged relative strain\n")
-                f.write("# Rows: radial distance bins (increasing radius)\n")
-                f.write("# Columns: mcs values (in increasing order)\n")
-                f.write(f"# Bin width = {BIN_WIDTH} pixels\n")
-                f.write(f"# Domain Size: Lx={Lx}, Ly={Ly}\n")
-                f.write(f"# Wound Radius: R={R}\n")
-                #f.write(f"# woundMakerTime = {woundMakerTime}\n")
-                f.write(f"# V_t = {V_t}\n")
-                f.write("#\n")
-                f.write("# mcs values:\n")
-                f.write("# " + " ".join(map(str, unique_mcs)) + "\n")
-
-                np.savetxt(f, strain_matrix, fmt="%.6e")
-            
-            #print(f"    Saved → {out_file.name}")
-
-            # ------------------------------------------------------------
-            # Plotting
-            # ------------------------------------------------------------
-
-            cmap = plt.cm.seismic.copy()
-            cmap.set_bad(color="black")
-
-            vmax = np.nanmax(np.abs(strain_matrix))
-            norm = TwoSlopeNorm(vmin=-vmax, vcenter=0.0, vmax=vmax)
-
-            fig, ax = plt.subplots(figsize=(8, 6))
-
-            im = ax.imshow(
-                strain_matrix,
-                origin="lower",
-                aspect="auto",
-                cmap=cmap,
-                norm=norm,
-                extent=[
-                    unique_mcs.min(),
-                    unique_mcs.max(),
-                    bin_edges[0],
-                    bin_edges[-1],
-                ],
-            )
-
-            #ax.axvline(
-            #    woundMakerTime,
-            #    color="red",
-            #    linestyle="-",
-            #    linewidth=1.5,
-            #    label="woundMakerTime",
-            #)
-
-            ax.set_xlabel("MCS")
-            ax.set_ylabel("Radial distance (pixels)")
-            ax.set_title(
-                f"Relative strain\n{domain_name}, {wound_name}, {data_file.name}"
-            )
-
-            cbar = fig.colorbar(im, ax=ax)
-            cbar.set_label("Mean relative strain")
-
-            #ax.legend(loc="upper right")
-
-            plot_file = out_dir / data_file.name.replace(".txt", "_bin_average.png")
-
-            fig.tight_layout()
-            fig.savefig(plot_file, dpi=300)
-            #print(f"    Saved plot → {plot_file.name}")
-            plt.close(fig)
+            plot_strain(data_file, strain_matrix, unique_mcs, bin_edges, Lx, Ly, R, domain_name, wound_name)
 
         print(f"    Saved all files and plots in → {domain_name}_{wound_name}_Bins")
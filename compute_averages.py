@@ -2,9 +2,10 @@ from pathlib import Path
 import numpy as np
 import re
 from Parameters import * #only using this for target_volume normalisation
+from RunMetadata import dataset_dirs, read_wound_mcs
 
 ## this script computes the mean wound area (over replicates) for each mcs 
-## data is saved in 'simulation_results_averages.txt' in the Averages > LxLy > R folder 
+## data is saved in 'simulation_results_averages.txt' in the Averages > LxLy > R (> run_tag) folder 
 
 
 # -----------------------------
@@ -21,15 +22,15 @@ def load_runs(domain_dir):
     """Cut runs to start at individual wound_maker_time."""
     runs = []
     for filepath in sorted(domain_dir.glob("simulation_results_*.txt")):
-        with open(filepath, "r") as fp:
-            lines = fp.readlines()
-        for line in lines:
-            if line.startswith("# Wound created at mcs:"):
-                wound_made_mcs = int(line.split(":", 1)[1].strip())
-
-        header_length=4 #check if header is 4 lines
-        total_skip=header_length+wound_made_mcs
-        data = np.loadtxt(filepath, delimiter=",", skiprows=total_skip) 
+        # wound_mcs from run_metadata_<run_id>.json (header line for older runs)
+        wound_made_mcs = read_wound_mcs(filepath)
+        if wound_made_mcs is None:
+            print(f"  {filepath.name} skipped (no wound made)")
+            continue
+
+        # header: '#' lines and the 'mcs,woundArea' column line
+        data = np.loadtxt(filepath, delimiter=",", comments=("#", "mcs"), ndmin=2)
+        data = data[data[:, 0] >= wound_made_mcs]
         # rebase MCS so wound starts at 0
         data[:, 0] -= data[0, 0]
         if data.shape[1] != 2:
@@ -39,17 +40,20 @@ def load_runs(domain_dir):
 
 
 def pad_runs(runs):
-    """Pad runs to the same maximum MCS using PAD_VALUE."""
-    max_mcs = int(max(run[-1, 0] for run in runs))
+    """
+    Put runs on a common MCS grid (the union of all sampled MCS) and pad them
+    to the same maximum MCS using PAD_VALUE.
+    Runs recorded with a sparser cadence (see SamplingCadence.py) are linearly
+    interpolated between their samples; with every MCS recorded the grid is
+    0..max_mcs and nothing is interpolated.
+    """
+    grid = np.unique(np.concatenate([run[:, 0] for run in runs]))
     padded = []
 
     for run in runs:
-        last_mcs = int(run[-1, 0])
-        if last_mcs < max_mcs:
-            pad_mcs = np.arange(last_mcs + 1, max_mcs + 1)
-            pad_vals = np.full_like(pad_mcs, PAD_VALUE)
-            run = np.vstack((run, np.column_stack((pad_mcs, pad_vals))))
-        padded.append(run)
+        values = np.interp(grid, run[:, 0], run[:, 1])
+        values[grid > run[-1, 0]] = PAD_VALUE
+        padded.append(np.column_stack((grid, values)))
 
     return np.stack(padded)
 
@@ -70,7 +74,7 @@ def save_averages(domain_dir, wound_dir, Lx, Ly, radius, mcs, mean, std, sem):
     """Save averaged data to file."""
     #out_file = wound_dir / "simulation_results_averages.txt"
     avg_root = RUNS_ROOT / "Averages"
-    out_dir = avg_root / domain_dir.name / wound_dir.name
+    out_dir = avg_root / wound_dir.relative_to(RUNS_ROOT)
     out_dir.mkdir(parents=True, exist_ok=True)
 
     out_file = out_dir / "simulation_results_averages.txt"  
@@ -112,8 +116,9 @@ for domain_dir in sorted(RUNS_ROOT.glob("Lx*_Ly*")):
         print("  No wound size folders found, skipping domain")
         continue
 
-    for wound_dir in sorted(wound_dirs):
-        radius = wound_dir.name  # e.g., "R50"
+    # a sweep over force, lambda_volume, ... has one run_tag subfolder per combination
+    for wound_dir in [d for r_dir in sorted(wound_dirs) for d in dataset_dirs(r_dir)]:
+        radius = wound_dir.relative_to(domain_dir).as_posix()  # e.g., "R50" or "R50/F600"
         print(f"  Processing wound size {radius}")    
 
         # delete old averages file if present
@@ -123,7 +128,7 @@ for domain_dir in sorted(RUNS_ROOT.glob("Lx*_Ly*")):
         #    print("  Deleted old averages file")
         # delete old averages file if present (in Averages folder)
         avg_root = RUNS_ROOT / "Averages"
-        avg_dir = avg_root / domain_dir.name / wound_dir.name
+        avg_dir = avg_root / wound_dir.relative_to(RUNS_ROOT)
         avg_file = avg_dir / "simulation_results_averages.txt"
 
         if avg_file.exists():
@@ -1,34 +1,56 @@
-import subprocess
+import argparse
+import sys
 import cc3d
 from pathlib import Path
 import shutil
 
 from Parameters import *
+from EnsembleRunner import EnsembleRunner
+from RunStatus import MONITOR_INTERVAL
 
-simulation_script = "StretchableBC_main.py"
-#optional: clean folder
-r_folder = Path("Runs") / f"Lx{grid_x}_Ly{grid_y}" / f"R{wR}"
-if r_folder.exists():
-    for f in r_folder.iterdir():
-        if f.is_file():
-            f.unlink()
-        elif f.is_dir():
-            shutil.rmtree(f) #erases subfolders 
-    print(f"[run_multiple] Cleared folder {r_folder}")
-
-for run_id in range(N):
-    print(f"\n=== Starting simulation {run_id} ===")
-    
-    # Run each simulation in a separate Python process
-    result = subprocess.run(
-        ["python", simulation_script, str(run_id)],
-        capture_output=True, text=True
-    )
-
-    # Print simulation stdout and stderr
-    print(result.stdout)
-    if result.stderr:
-        print("Errors / Warnings:")
-        print(result.stderr)
-    
-    print(f"=== Finished simulation {run_id} ===\n")
+## runs the N replicates of StretchableBC_main.py in parallel, see EnsembleRunner.py
+## python run_multiple.py [--workers W] [--retries K] [--keep] [--warm] [--status-every S] [-- <args for StretchableBC_main.py>]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the N replicates of StretchableBC_main.py in parallel.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="replicates running at the same time (default: one per CPU core, at most N)")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="reruns of a failed replicate, resumed from its last checkpoint (default: 1)")
+    parser.add_argument("--keep", action="store_true",
+                        help="do not clear the Runs/Lx*_Ly*/R* folder first")
+    parser.add_argument("--warm", action="store_true",
+                        help="one WarmWorker.py process per worker, importing cc3d once for all its replicates")
+    parser.add_argument("--status-every", type=float, default=MONITOR_INTERVAL, metavar="SECONDS",
+                        help="seconds between progress tables of the replicates, 0 disables them "
+                             f"(default: {MONITOR_INTERVAL:g})")
+    # everything after -- goes to StretchableBC_main.py
+    argv = sys.argv[1:] if argv is None else list(argv)
+    simulation_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, simulation_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+    args.simulation_args = simulation_args
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    r_folder = Path(runs_root) / f"Lx{grid_x}_Ly{grid_y}" / f"R{wR}"
+    #optional: clean folder
+    if r_folder.exists() and not args.keep:
+        for f in r_folder.iterdir():
+            if f.is_file():
+                f.unlink()
+            elif f.is_dir():
+                shutil.rmtree(f) #erases subfolders
+        print(f"[run_multiple] Cleared folder {r_folder}")
+
+    runner = EnsembleRunner(range(N), log_dir=r_folder / "logs", workers=args.workers,
+                            retries=args.retries, extra_args=args.simulation_args, warm=args.warm,
+                            status_interval=args.status_every)
+    runner.run()
+    sys.exit(1 if runner.failed else 0)
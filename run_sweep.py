@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import Parameters
+from ParameterSweep import (ParameterSweep, expand_sweep, job_cost, job_run_dir, merge_shards,
+                            shard_jobs, shard_root)
+from RunStatus import MONITOR_INTERVAL
+
+## parameter sweep from a JSON description, see ParameterSweep.py
+## python run_sweep.py sweep.json [--workers W] [--retries K] [--ledger PATH] [--dry-run] [-- <StretchableBC_main.py args>]
+##
+## sweep.json:
+## {
+##   "grid": {"grid_x": [252, 504], "wR": [20, 40]},   every combination is run
+##   "fixed": {"t": 50001},                            same for all jobs (optional)
+##   "replicates": 8                                   run ids per combination (default: Parameters.N)
+## }
+## combinations that differ in force, lambda_volume, seeding, ... (ParameterSweep.TAG_PARAMETERS)
+## write to their own subfolder of Runs/Lx*_Ly*/R*, e.g. Runs/Lx252_Ly252/R40/F600
+##
+## sharded (batch arrays):  python run_sweep.py sweep.json --shard $SLURM_ARRAY_TASK_ID/8
+##   then once all shards are done:  python run_sweep.py --merge
+## local test of the sharding:  python run_sweep.py sweep.json --local-shards 4 --workers 8
+
+
+def shard_spec(value):
+    index, n_shards = (int(part) for part in value.split("/"))
+    if not 0 <= index < n_shards:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{n_shards - 1}, got {index}")
+    return index, n_shards
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a parameter sweep of StretchableBC_main.py.")
+    parser.add_argument("sweep", nargs="?", help="JSON file with grid, fixed and replicates")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="jobs running at the same time (default: one per CPU core)")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="reruns of a failed job, resumed from its last checkpoint (default: 1)")
+    parser.add_argument("--ledger", default=None,
+                        help="job ledger, completed jobs in it are skipped (default: <runs root>/sweep_ledger.jsonl)")
+    parser.add_argument("--dry-run", action="store_true", help="list the pending jobs and exit")
+    sharding = parser.add_mutually_exclusive_group()
+    sharding.add_argument("--shard", type=shard_spec, default=None, metavar="I/N",
+                          help="run only shard I (0-based) of N, writing below Runs/shards/shard_I_of_N")
+    sharding.add_argument("--local-shards", type=int, default=None, metavar="N",
+                          help="run all N shards as local processes, then merge them")
+    sharding.add_argument("--merge", action="store_true", help="merge Runs/shards/* into Runs/ and exit")
+    parser.add_argument("--status-every", type=float, default=MONITOR_INTERVAL, metavar="SECONDS",
+                        help="seconds between progress tables of the running jobs, 0 disables them "
+                             f"(default: {MONITOR_INTERVAL:g})")
+    # everything after -- goes to StretchableBC_main.py
+    argv = sys.argv[1:] if argv is None else list(argv)
+    simulation_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, simulation_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+    if args.sweep is None and not args.merge:
+        parser.error("the sweep file is required unless --merge is given")
+    args.simulation_args = simulation_args
+    return args
+
+
+def run_local_shards(args):
+    """Start every shard as its own run_sweep.py process, wait for all, then merge."""
+    n_shards = args.local_shards
+    workers = max(1, (args.workers or os.cpu_count() or 1) // n_shards)
+    processes = []
+    for index in range(n_shards):
+        root = shard_root(index, n_shards)
+        root.mkdir(parents=True, exist_ok=True)
+        command = [sys.executable, sys.argv[0], args.sweep, "--shard", f"{index}/{n_shards}",
+                   "--workers", str(workers), "--retries", str(args.retries),
+                   "--status-every", str(args.status_every)]
+        if args.simulation_args:
+            command += ["--", *args.simulation_args]
+        log = open(root / "sweep.log", "a")
+        processes.append((index, subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT), log))
+        print(f"[run_sweep] shard {index}/{n_shards} started, log in {root / 'sweep.log'}")
+
+    failed = 0
+    for index, process, log in processes:
+        returncode = process.wait()
+        log.close()
+        failed += returncode != 0
+        print(f"[run_sweep] shard {index}/{n_shards} exited with {returncode}")
+    print(f"[run_sweep] merged {merge_shards()} files into {Parameters.runs_root}")
+    return failed
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.merge:
+        print(f"[run_sweep] merged {merge_shards()} files into {Parameters.runs_root}")
+        sys.exit(0)
+    if args.local_shards:
+        sys.exit(1 if run_local_shards(args) else 0)
+
+    with open(args.sweep, "r") as f:
+        spec = json.load(f)
+
+    jobs = expand_sweep(spec["grid"], spec.get("fixed"), spec.get("replicates", Parameters.N))
+    runs_root = None
+    if args.shard is not None:
+        index, n_shards = args.shard
+        jobs = shard_jobs(jobs, n_shards)[index]
+        runs_root = shard_root(index, n_shards)
+        print(f"[run_sweep] shard {index}/{n_shards}: {len(jobs)} jobs, cost {sum(map(job_cost, jobs)):.3g}")
+    sweep = ParameterSweep(jobs, ledger_path=args.ledger, workers=args.workers,
+                           retries=args.retries, extra_args=args.simulation_args, runs_root=runs_root,
+                           status_interval=args.status_every)
+
+    if args.dry_run:
+        for job in sweep.pending():
+            print(f"{job_run_dir(job, sweep.runs_root)} run {job.run_id}: {job.params}")
+        sys.exit(0)
+
+    results = sweep.run()
+    sys.exit(1 if any(result.returncode != 0 for result in results) else 0)
@@ -0,0 +1,11 @@
+import sys
+from pathlib import Path
+
+## the tests run without CC3D: FakeLattice.py stands in for cc3d, installed before any
+## test module imports Parameters.py or a steppable module
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from FakeLattice import install_fake_cc3d
+
+install_fake_cc3d()
@@ -0,0 +1,34 @@
+from BufferedWriter import BufferedWriter
+
+
+def test_rows_are_buffered_until_max_bytes(tmp_path):
+    path = tmp_path / "rows.txt"
+    writer = BufferedWriter(path, max_bytes=10, max_seconds=1e9)
+    writer.write("1,2\n")
+    writer.write(b"3,4\n")
+    assert path.read_bytes() == b""
+    writer.write("5,6\n")  # 12 bytes buffered
+    assert path.read_bytes() == b"1,2\n3,4\n5,6\n"
+    assert writer.stats()["bytes_written"] == 12
+    assert writer.stats()["n_flushes"] == 1
+    writer.close()
+
+
+def test_max_seconds_zero_writes_every_row(tmp_path):
+    path = tmp_path / "rows.txt"
+    writer = BufferedWriter(path, max_bytes=1 << 20, max_seconds=0)
+    writer.write("1,2\n")
+    assert path.read_bytes() == b"1,2\n"
+    writer.close()
+
+
+def test_close_flushes_and_appends(tmp_path):
+    path = tmp_path / "rows.txt"
+    path.write_bytes(b"# header\n")
+    writer = BufferedWriter(path, max_bytes=1 << 20, max_seconds=1e9)
+    writer.write("1,2\n")
+    writer.close()
+    writer.close()  # closing twice is harmless
+    writer.flush()
+    assert path.read_bytes() == b"# header\n1,2\n"
+    assert "4 bytes in 1 flushes" in writer.summary()
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from BufferedWriter import BufferedWriter
+from CellTrajectoryStore import (HEADER_DTYPE, CellTrajectoryWriter, export_text, index_path, lambda_volumes,
+                                 load_cell_trajectories, load_index, read_header, header_layout,
+                                 truncate_cell_trajectories, write_header)
+
+CENTER = (30.0, 30.0)
+
+
+def blocks():
+    """Per mcs: cell ids, xCOM, yCOM, volume, lambda_volume; cell 3 is deleted after mcs 1."""
+    rng = np.random.default_rng(0)
+    for mcs in range(5):
+        ids = np.array([1, 2, 3]) if mcs < 2 else np.array([1, 2])
+        x = rng.uniform(0, 60, len(ids))
+        y = rng.uniform(0, 60, len(ids))
+        volume = rng.integers(50, 150, len(ids))
+        yield mcs, ids, x, y, volume, lambda_volumes(volume, 100.0, 1.0)
+
+
+def write_file(path, layout):
+    write_header(path, 60, 60, 100.0, 1.0, CENTER, layout=layout)
+    writer = CellTrajectoryWriter(BufferedWriter(path), BufferedWriter(index_path(path)), path.stat().st_size, layout)
+    for mcs, ids, x, y, volume, lam in blocks():
+        writer.append(mcs, ids, x, y, volume, lam)
+    writer.close()
+
+
+@pytest.mark.parametrize("layout, com_tolerance", [("full", 1e-4), ("compact", 1 / 32)])
+def test_round_trip(tmp_path, layout, com_tolerance):
+    path = tmp_path / "cell_field_data_0.bin"
+    write_file(path, layout)
+    assert header_layout(read_header(path)) == layout
+
+    columns = load_cell_trajectories(path)
+    expected = list(blocks())
+    assert columns["mcs"].tolist() == [mcs for mcs, ids, *_ in expected for _ in ids]
+    assert columns["cell_id"].tolist() == [i for _, ids, *_ in expected for i in ids.tolist()]
+    assert np.allclose(columns["xCOM"], np.concatenate([b[2] for b in expected]), atol=com_tolerance)
+    assert np.allclose(columns["yCOM"], np.concatenate([b[3] for b in expected]), atol=com_tolerance)
+    assert columns["volume"].tolist() == np.concatenate([b[4] for b in expected]).tolist()
+    # the full layout stores lambda_volume, the compact layout recomputes it from the volume
+    assert np.allclose(columns["lambda_volume"], np.concatenate([b[5] for b in expected]), rtol=1e-6)
+    distance = np.hypot(columns["xCOM"] - CENTER[0], columns["yCOM"] - CENTER[1])
+    assert np.allclose(columns["radial_distance"], distance, atol=1e-4)
+
+
+def test_full_layout_keeps_lambda_volumes_that_do_not_follow_the_volume(tmp_path):
+    path = tmp_path / "cell_field_data_0.bin"
+    write_header(path, 60, 60, 100.0, 1.0, CENTER)
+    writer = CellTrajectoryWriter(BufferedWriter(path), BufferedWriter(index_path(path)), path.stat().st_size)
+    writer.append(0, [1, 2], [1.0, 2.0], [3.0, 4.0], [100, 100], [1.0, 7.5])
+    writer.close()
+    assert load_cell_trajectories(path)["lambda_volume"].tolist() == [1.0, 7.5]
+
+
+def test_compact_layout_rejects_large_grids(tmp_path):
+    with pytest.raises(ValueError, match="compact"):
+        write_header(tmp_path / "cell_field_data_0.bin", 4096, 4096, 100.0, 1.0, CENTER, layout="compact")
+
+
+@pytest.mark.parametrize("layout", ["full", "compact"])
+def test_truncate_drops_later_and_partial_blocks(tmp_path, layout):
+    path = tmp_path / "cell_field_data_0.bin"
+    write_file(path, layout)
+    with open(path, "ab") as f:
+        f.write(b"\x05\0\0\0\x02\0\0\0")  # partial block header of an interrupted write
+    truncate_cell_trajectories(path, 2)
+    assert load_index(path)["mcs"].tolist() == [0, 1, 2]
+    assert np.unique(load_cell_trajectories(path)["mcs"]).tolist() == [0, 1, 2]
+
+    # a resumed run appends after the truncated end, with the ids written again
+    writer = CellTrajectoryWriter(BufferedWriter(path), BufferedWriter(index_path(path)), path.stat().st_size, layout)
+    writer.append(3, [2, 1], [1.0, 2.0], [3.0, 4.0], [90, 110], lambda_volumes([90, 110], 100.0, 1.0))
+    writer.close()
+    columns = load_cell_trajectories(path)
+    assert columns["cell_id"][columns["mcs"] == 3].tolist() == [2, 1]
+
+
+def test_missing_index_is_rebuilt(tmp_path):
+    path = tmp_path / "cell_field_data_0.bin"
+    write_file(path, "full")
+    entries = load_index(path)
+    index_path(path).unlink()
+    assert load_index(path).tolist() == entries.tolist()
+    assert entries["offset"][0] == HEADER_DTYPE.itemsize
+
+
+def test_export_text(tmp_path):
+    path = tmp_path / "cell_field_data_0.bin"
+    write_file(path, "full")
+    export_text(path, tmp_path / "cell_field_data_0.txt")
+    rows = [line for line in (tmp_path / "cell_field_data_0.txt").read_text().splitlines() if not line.startswith("#")]
+    assert len(rows) == len(load_cell_trajectories(path)["mcs"])
+    assert all(len(row.split(",")) == 7 for row in rows)
@@ -0,0 +1,113 @@
+import random
+
+import numpy as np
+import pytest
+
+from FakeLattice import FakeSimulation, LatticeDriver, domain_lattice
+from CellTrajectoryStore import load_cell_trajectories
+from CellVolumeMeasurements import CellVolumeMeasurement
+from Checkpoint import (CheckpointSteppable, checkpoint_path, load_checkpoint, restore_run_state, save_checkpoint,
+                        truncate_text_output)
+from DomainGeometry import domain_geometry
+from LatticeSnapshot import SnapshotProvider
+from Measurements import Measurements
+from RunContext import RunContext
+from StrainBinning import load_strain_bins
+
+GRID = 60
+CHECKPOINT_INTERVAL = 5
+
+
+def test_truncate_text_output(tmp_path):
+    path = tmp_path / "simulation_results_0.txt"
+    path.write_text("# Domain Size: Lx=60, Ly=60\nmcs,woundArea\n0,5\n1,4\n2,3\n3,2\n4,")
+    truncate_text_output(path, 2)
+    assert path.read_text() == "# Domain Size: Lx=60, Ly=60\nmcs,woundArea\n0,5\n1,4\n2,3\n"
+    # a partial last line before last_mcs goes too
+    path.write_text("mcs,woundArea\n0,5\n1,")
+    truncate_text_output(path, 10)
+    assert path.read_text() == "mcs,woundArea\n0,5\n"
+    truncate_text_output(tmp_path / "missing.txt", 0)
+
+
+def test_save_load_and_rng_state(tmp_path):
+    context = RunContext(0, runs_root=str(tmp_path))
+    context.wound_mcs, context.domain_filled, context.domain_filled_mcs = 40, True, 20
+    random.seed(1)
+    np.random.seed(1)
+    path = tmp_path / "checkpoint_0.npz"
+    save_checkpoint(path, 42, {"labels": np.arange(6).reshape(2, 3)}, {"measurements": {"closed_counter": 1}},
+                    context.phase_state())
+    expected = (random.random(), np.random.random())
+
+    meta, lattice_state = load_checkpoint(path)
+    assert meta["mcs"] == 42 and not meta["completed"]
+    assert meta["steppables"] == {"measurements": {"closed_counter": 1}}
+    assert lattice_state["labels"].tolist() == [[0, 1, 2], [3, 4, 5]]
+
+    resumed = RunContext(0, runs_root=str(tmp_path))
+    restore_run_state(resumed, meta)
+    assert resumed.phase_state() == context.phase_state()
+    assert resumed.mcs_offset == 43
+    assert (random.random(), np.random.random()) == expected
+
+
+def simulation(context, seed):
+    """FakeSimulation with the measurement and checkpoint steppables of StretchableBC_main.py."""
+    np.random.seed(seed)
+    geometry = domain_geometry(GRID, GRID, context.thick_w, context.thick_f, context.wR)
+    lattice, _, _ = domain_lattice(geometry, context.target_volume)
+    sim = FakeSimulation(lattice, LatticeDriver(lattice, seed=seed))
+    snapshots = SnapshotProvider.for_context(context)
+    steppables = {
+        "measurements": Measurements(context=context, snapshots=snapshots),
+        "cell_volume": CellVolumeMeasurement(context=context, snapshots=snapshots),
+    }
+    return sim, steppables, snapshots
+
+
+def recorded_mcs(context):
+    rows = np.loadtxt(context.run_dir / "simulation_results_0.txt", delimiter=",", comments=("#", "mcs"), ndmin=2)
+    measurement_mcs = rows[:, 0].astype(int).tolist()
+    if context.cell_output_format == "bins":
+        cell_mcs = load_strain_bins(context.run_dir / "strain_bins_0.bin")[1]["mcs"].tolist()
+    elif context.cell_output_format == "text":
+        rows = np.loadtxt(context.run_dir / "cell_field_data_0.txt", delimiter=",", ndmin=2)
+        cell_mcs = np.unique(rows[:, 0].astype(int)).tolist()
+    else:
+        cell_mcs = np.unique(load_cell_trajectories(context.run_dir / "cell_field_data_0.bin")["mcs"]).tolist()
+    return measurement_mcs, cell_mcs
+
+
+@pytest.mark.parametrize("cell_output_format", ["binary", "binary_compact", "text", "bins"])
+def test_resume_truncates_the_outputs_to_the_checkpoint(tmp_path, cell_output_format):
+    parameters = dict(grid_x=GRID, wR=8, runs_root=str(tmp_path), cell_output_format=cell_output_format,
+                      output_flush_seconds=1e9)
+    context = RunContext(0, **parameters)
+    sim, steppables, snapshots = simulation(context, seed=1)
+    for steppable in steppables.values():
+        sim.register_steppable(steppable)
+    sim.register_steppable(CheckpointSteppable(context=context, interval=CHECKPOINT_INTERVAL,
+                                               steppables=steppables, snapshots=snapshots))
+    sim.start()
+    for _ in range(8):
+        sim.step()
+    # crash after mcs 7: rows past the checkpoint reached the disk, finish() never ran
+    for steppable in steppables.values():
+        steppable.flush_outputs()
+    assert recorded_mcs(context) == (list(range(8)), list(range(8)))
+
+    meta, _ = load_checkpoint(checkpoint_path(context))
+    assert meta["mcs"] == CHECKPOINT_INTERVAL
+    resumed = RunContext(0, **parameters)
+    restore_run_state(resumed, meta)
+    sim, steppables, _ = simulation(resumed, seed=2)
+    for name, steppable in steppables.items():
+        sim.register_steppable(steppable)
+        steppable.restore_checkpoint(meta["steppables"][name], meta["mcs"])
+    sim.start()
+    assert recorded_mcs(resumed) == (list(range(6)), list(range(6)))
+    for _ in range(4):
+        sim.step()
+    sim.finish()
+    assert recorded_mcs(resumed) == (list(range(10)), list(range(10)))
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+import Parameters
+from ParameterSweep import (Job, JobLedger, LEDGER_NAME, expand_sweep, job_cost, job_key, job_run_dir,
+                            merge_shards, run_tag, shard_jobs, shard_root)
+from RunContext import RunContext
+
+
+def test_expand_sweep_layout_parameters_share_the_r_folder():
+    jobs = expand_sweep({"grid_x": [252, 504], "wR": [20]}, fixed={"t": 5001}, replicates=2)
+    assert [(job.params, job.run_id) for job in jobs] == [
+        ({"t": 5001, "grid_x": 252, "wR": 20}, 0), ({"t": 5001, "grid_x": 252, "wR": 20}, 1),
+        ({"t": 5001, "grid_x": 504, "wR": 20}, 0), ({"t": 5001, "grid_x": 504, "wR": 20}, 1),
+    ]
+    assert job_run_dir(jobs[2], "Runs").as_posix() == "Runs/Lx504_Ly504/R20"
+
+
+def test_expand_sweep_tags_every_combination_of_the_dynamics():
+    jobs = expand_sweep({"force": [600, 1200]}, fixed={"lambda_volume": 2}, replicates=2)
+    assert [(job.params["run_tag"], job.run_id) for job in jobs] == [
+        ("LV2_F600", 0), ("LV2_F600", 1), ("LV2_F1200", 0), ("LV2_F1200", 1)]
+    run_dir = job_run_dir(jobs[0], "Runs")
+    assert run_dir.as_posix() == f"Runs/Lx{Parameters.grid_x}_Ly{Parameters.grid_y}/R{Parameters.wR}/LV2_F600"
+    # the simulation writes where the sweep looks for it
+    assert RunContext(0, **jobs[0].params, runs_root="Runs").run_dir == run_dir
+    # the folder follows the values, not the grid order
+    reordered = expand_sweep({"force": [1200, 600]}, fixed={"lambda_volume": 2}, replicates=2)
+    assert {job_key(job) for job in reordered} == {job_key(job) for job in jobs}
+
+
+def test_run_tag():
+    assert run_tag({"grid_x": 252, "t": 10}) == ""
+    assert run_tag({"seeding": "voronoi", "force": 600}) == "Svoronoi_F600"
+
+
+def test_shard_jobs_balances_cost_and_is_deterministic():
+    jobs = expand_sweep({"grid_x": [120, 252, 504]}, fixed={"t": 100}, replicates=4)
+    shards = shard_jobs(jobs, 3)
+    assert sorted(job_key(job) for shard in shards for job in shard) == sorted(job_key(job) for job in jobs)
+    totals = [sum(job_cost(job) for job in shard) for shard in shards]
+    assert max(totals) - min(totals) <= max(job_cost(job) for job in jobs)
+    assert shard_jobs(list(reversed(jobs)), 3) == shards
+
+
+def test_ledger_resumes_from_the_last_record(tmp_path):
+    path = tmp_path / LEDGER_NAME
+    job, other = Job({"force": 600}, 0), Job({"force": 600}, 1)
+    ledger = JobLedger(path)
+    ledger.record(job, "running")
+    ledger.record(other, "running")
+    ledger.record(job, "done", returncode=0)
+    with open(path, "a") as f:
+        f.write('{"key": "partial')  # last line of an interrupted sweep
+
+    reloaded = JobLedger(path)
+    assert reloaded.status(job) == "done"
+    assert reloaded.status(other) == "running"
+    assert reloaded.status(Job({"force": 600}, 2)) is None
+
+
+def write_shard(shards_dir, index, run_id, content):
+    root = shard_root(index, 2, shards_dir)
+    run_dir = root / "Lx60_Ly60" / "R10" / "F600"
+    run_dir.mkdir(parents=True)
+    (run_dir / f"simulation_results_{run_id}.txt").write_text(content)
+    record = {"key": f"k{run_id}", "status": "done"}
+    (root / LEDGER_NAME).write_text(json.dumps(record) + "\n")
+    return record
+
+
+def test_merge_shards(tmp_path):
+    shards_dir, runs_root = tmp_path / "shards", tmp_path / "Runs"
+    records = [write_shard(shards_dir, 0, 0, "mcs,woundArea\n0,5\n"), write_shard(shards_dir, 1, 1, "mcs,woundArea\n0,7\n")]
+    assert merge_shards(shards_dir, runs_root) == 2
+    run_dir = runs_root / "Lx60_Ly60" / "R10" / "F600"
+    assert (run_dir / "simulation_results_1.txt").read_text() == "mcs,woundArea\n0,7\n"
+
+    # merging again copies nothing and does not repeat ledger lines
+    assert merge_shards(shards_dir, runs_root) == 0
+    ledger = [json.loads(line) for line in (runs_root / LEDGER_NAME).read_text().splitlines()]
+    assert ledger == records
+
+    # the same file with other content means the shards overlap
+    (run_dir / "simulation_results_0.txt").write_text("mcs,woundArea\n0,6\n")
+    with pytest.raises(FileExistsError):
+        merge_shards(shards_dir, runs_root)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from FakeLattice import FakeSimulation, LatticeDriver, domain_lattice
+from DomainGeometry import domain_geometry
+from PolarityEngine import boundary_pixel_table, polarity_vectors, polarity_vectors_at
+from RunContext import RunContext
+from WoundMakerForce import WoundMakerSteppable
+
+GRID = 84
+
+# get_local_polarity_vector divides without out=, as it always has
+pytestmark = pytest.mark.filterwarnings("ignore:'where' used without 'out'")
+
+
+@pytest.fixture
+def wound_maker(tmp_path):
+    """WoundMakerSteppable on a Voronoi tissue with a freshly made wound and some healing steps."""
+    context = RunContext(0, grid_x=GRID, wR=12, runs_root=str(tmp_path))
+    np.random.seed(3)
+    geometry = domain_geometry(GRID, GRID, context.thick_w, context.thick_f, context.wR)
+    lattice, _, _ = domain_lattice(geometry, context.target_volume)
+    sim = FakeSimulation(lattice, LatticeDriver(lattice, seed=3))
+    steppable = WoundMakerSteppable(context=context)
+    sim.register_steppable(steppable)
+    steppable.make_wound(0)
+    for _ in range(3):
+        sim.driver.mcs()
+    steppable.snapshots.invalidate()
+    return steppable
+
+
+def per_cell(steppable, cells):
+    return np.array([steppable.get_local_polarity_vector(cell) for cell in cells]).reshape(-1, 2)
+
+
+def batch_inputs(steppable):
+    cells = steppable.cell_list_by_type(steppable.CELL)
+    xy, owner = boundary_pixel_table([steppable.get_cell_boundary_pixel_list(cell) for cell in cells])
+    com = np.array([(cell.xCOM, cell.yCOM) for cell in cells])
+    return cells, xy, owner, com
+
+
+def test_polarity_vectors_match_get_local_polarity_vector(wound_maker):
+    cells, xy, owner, com = batch_inputs(wound_maker)
+    labels = wound_maker.snapshots.labels(wound_maker, 0)
+    expected = per_cell(wound_maker, cells)
+    assert np.count_nonzero(expected.any(axis=1)) > 0  # the wound edge has polarized cells
+    assert np.allclose(polarity_vectors(labels, xy, owner, com), expected)
+
+
+def test_polarity_vectors_at_match_get_local_polarity_vector(wound_maker):
+    cells, xy, owner, com = batch_inputs(wound_maker)
+    vectors = polarity_vectors_at(wound_maker.is_medium, xy, owner, com, wound_maker.dim.x, wound_maker.dim.y)
+    assert np.allclose(vectors, per_cell(wound_maker, cells))
+
+
+@pytest.mark.parametrize("frontier_refresh_mcs", [1, 5])
+def test_apply_polarity_forces(wound_maker, frontier_refresh_mcs):
+    wound_maker.context.frontier_refresh_mcs = frontier_refresh_mcs
+    wound_maker.apply_polarity_forces(0)  # first call: every CELL
+    cells = wound_maker.cell_list_by_type(wound_maker.CELL)
+    forces = np.array([(cell.lambdaVecX, cell.lambdaVecY) for cell in cells])
+    assert np.allclose(forces, -wound_maker.context.force * per_cell(wound_maker, cells))
+    assert wound_maker.frontier == {cell.id for cell, force in zip(cells, forces) if force.any()}
+
+
+def test_frontier_refresh_recomputes_the_frontier_cells(wound_maker):
+    wound_maker.context.frontier_refresh_mcs = 5
+    wound_maker.apply_polarity_forces(0)
+    wound_maker.simulation.driver.mcs()
+    candidates = wound_maker.frontier_candidates()
+    wound_maker.apply_polarity_forces(1)  # between full refreshes: frontier cells and their neighbours only
+    forces = np.array([(cell.lambdaVecX, cell.lambdaVecY) for cell in candidates])
+    assert np.allclose(forces, -wound_maker.context.force * per_cell(wound_maker, candidates))
@@ -0,0 +1,44 @@
+from RunMetadata import (dataset_dirs, metadata_path, read_closure_mcs, read_metadata, read_wound_mcs,
+                         sidecar_for, start_metadata, update_metadata)
+
+
+def test_start_and_update(tmp_path):
+    path = metadata_path(tmp_path, 3)
+    assert read_metadata(path) is None
+    start_metadata(path, 3, {"force": 1200})
+    update_metadata(path, wound_mcs=250)
+    metadata = read_metadata(path)
+    assert metadata == {"run_id": 3, "parameters": {"force": 1200},
+                        "domain_filled_mcs": None, "wound_mcs": 250, "closure_mcs": None}
+    assert not list(tmp_path.glob("*.tmp.json"))
+
+
+def test_sidecar_for():
+    assert sidecar_for("Runs/R40/simulation_results_12.txt").name == "run_metadata_12.json"
+    assert sidecar_for("Runs/R40/cell_field_data_12.bin").name == "run_metadata_12.json"
+    assert sidecar_for("Runs/R40/simulation_results_averages.txt") is None
+
+
+def test_phase_events_from_the_sidecar(tmp_path):
+    data_file = tmp_path / "simulation_results_0.txt"
+    data_file.write_text("mcs,woundArea\n")
+    start_metadata(metadata_path(tmp_path, 0), 0, {})
+    assert read_wound_mcs(data_file) is None
+    assert read_closure_mcs(data_file) == (True, None)
+    update_metadata(metadata_path(tmp_path, 0), wound_mcs=250, closure_mcs=900)
+    assert read_wound_mcs(data_file) == 250
+    assert read_closure_mcs(data_file) == (True, 900)
+
+
+def test_runs_without_a_sidecar(tmp_path):
+    data_file = tmp_path / "simulation_results_0.txt"
+    data_file.write_text("# Wound created at mcs: 250\nmcs,woundArea\n0,10\n")
+    assert read_wound_mcs(data_file) == 250
+    assert read_closure_mcs(data_file) == (False, None)
+
+
+def test_dataset_dirs(tmp_path):
+    for name in ("logs", "LV2_F600", "F1200"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "simulation_results_0.txt").write_text("")
+    assert dataset_dirs(tmp_path) == [tmp_path, tmp_path / "F1200", tmp_path / "LV2_F600"]
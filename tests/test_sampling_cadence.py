@@ -0,0 +1,43 @@
+import pytest
+
+from SamplingCadence import SamplingCadence
+
+
+def sampled(cadence, mcs_range, domain_filled_mcs=None, wound_mcs=None, wound_area=None):
+    return [mcs for mcs in mcs_range
+            if cadence.should_sample(mcs, domain_filled_mcs is not None and mcs >= domain_filled_mcs,
+                                     domain_filled_mcs, wound_mcs if wound_mcs is not None and mcs >= wound_mcs else None,
+                                     wound_area)]
+
+
+def test_default_records_every_mcs():
+    cadence = SamplingCadence()
+    assert cadence.every_mcs
+    assert not cadence.needs_wound_area
+    assert sampled(cadence, range(50), domain_filled_mcs=10, wound_mcs=20) == list(range(50))
+
+
+def test_phase_intervals_and_events():
+    cadence = SamplingCadence(fill_every=10, relax_every=5, heal_every=4)
+    assert not cadence.every_mcs
+    mcs = sampled(cadence, range(40), domain_filled_mcs=13, wound_mcs=22)
+    # mcs 0, domain filled and wound made are always recorded
+    assert mcs == [0, 10, 13, 15, 20, 22, 24, 28, 32, 36]
+
+
+def test_dense_after_wound():
+    cadence = SamplingCadence(heal_every=10, dense_every=2, dense_after_wound=6)
+    assert sampled(cadence, range(21, 50), domain_filled_mcs=5, wound_mcs=21) == [21, 22, 24, 26, 30, 40]
+
+
+def test_dense_below_area():
+    cadence = SamplingCadence(heal_every=10, dense_every=1, dense_below_area=100)
+    assert cadence.needs_wound_area
+    assert cadence.should_sample(33, True, 0, 20, wound_area=50)
+    assert not cadence.should_sample(33, True, 0, 20, wound_area=500)
+    assert not cadence.should_sample(33, True, 0, 20)
+
+
+def test_intervals_below_one_are_rejected():
+    with pytest.raises(ValueError, match="heal_every"):
+        SamplingCadence(heal_every=0)
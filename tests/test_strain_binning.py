@@ -0,0 +1,52 @@
+import numpy as np
+
+import StrainBinning
+from StrainBinning import (bin_layout, bin_strain, encode_record, load_strain_bins, mean_strain_matrix,
+                           std_strain_matrix, truncate_strain_bins, write_header)
+
+
+def write_file(path, n_records, n_bins=3):
+    write_header(path, n_bins, 10, 100.0, 60, 60, (30.0, 30.0))
+    with open(path, "ab") as f:
+        for mcs in range(n_records):
+            count = np.arange(n_bins) + mcs
+            f.write(encode_record(mcs, count, 0.5 * count, 0.25 * count))
+
+
+def test_bin_layout_matches_the_plotting_script():
+    assert bin_layout(252, 100) == (10, 13)
+
+
+def test_bin_strain():
+    count, total, total_sq = bin_strain([0.0, 5.0, 12.0, 99.0], [100, 150, 50, 100], 100.0, 10, 3)
+    assert count.tolist() == [2, 1, 0]  # the cell at r=99 is beyond the last bin
+    assert np.allclose(total, [0.5, -0.5, 0.0])
+    assert np.allclose(total_sq, [0.25, 0.25, 0.0])
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "strain_bins_0.bin"
+    write_file(path, 4)
+    header, records = load_strain_bins(path)
+    assert header["n_bins"] == 3 and header["bin_width"] == 10
+    assert records["mcs"].tolist() == [0, 1, 2, 3]
+    mean = mean_strain_matrix(records)
+    assert mean.shape == (3, 4)
+    assert np.isnan(mean[0, 0]) and np.allclose(mean[1:, 0], 0.5)
+    assert np.allclose(std_strain_matrix(records)[1:], 0.0)
+
+
+def test_truncate_drops_later_and_partial_records(tmp_path):
+    path = tmp_path / "strain_bins_0.bin"
+    write_file(path, 5)
+    with open(path, "ab") as f:
+        f.write(b"\0" * 7)  # partial record of an interrupted write
+    truncate_strain_bins(path, 2)
+    _, records = load_strain_bins(path)
+    assert records["mcs"].tolist() == [0, 1, 2]
+    assert path.stat().st_size == StrainBinning.HEADER_DTYPE.itemsize + 3 * StrainBinning.record_dtype(3).itemsize
+
+
+def test_truncate_of_a_missing_file_is_a_no_op(tmp_path):
+    truncate_strain_bins(tmp_path / "strain_bins_0.bin", 10)
+    assert not (tmp_path / "strain_bins_0.bin").exists()